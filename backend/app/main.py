@@ -1,12 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from utils.json_response import FastJSONResponse
 from routers.pre_analysis import router as pre_analysis_router
 
 app = FastAPI(
     title="Leilão Insights API",
     description="API para análise e monitoramento de leilões do B3",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
 )
 
 # Configuração do CORS
@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class AlertaBase(BaseModel):
+class AlertaBase(MongoModel):
     nome: str
     descricao: str
     nivel: str  # info, warning, error, critical
@@ -31,7 +16,7 @@ class AlertaBase(BaseModel):
 class AlertaCreate(AlertaBase):
     pass
 
-class AlertaUpdate(BaseModel):
+class AlertaUpdate(MongoModel):
     status: Optional[str] = None
     resolucao: Optional[str] = None
 
@@ -46,13 +31,5 @@ class AlertaInDB(AlertaBase):
     user_agent: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Alerta(AlertaInDB):
     pass 
\ No newline at end of file
@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class ArquivoBase(BaseModel):
+class ArquivoBase(MongoModel):
     nome: str
     tipo: str  # imagem, documento, video, etc
     tamanho: int  # em bytes
@@ -31,7 +16,7 @@ class ArquivoBase(BaseModel):
 class ArquivoCreate(ArquivoBase):
     pass
 
-class ArquivoUpdate(BaseModel):
+class ArquivoUpdate(MongoModel):
     nome: Optional[str] = None
     ativo: Optional[bool] = None
 
@@ -44,13 +29,5 @@ class ArquivoInDB(ArquivoBase):
     hash: Optional[str] = None
     metadata: Optional[dict] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Arquivo(ArquivoInDB):
     pass 
\ No newline at end of file
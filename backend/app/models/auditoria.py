@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class AuditoriaBase(BaseModel):
+class AuditoriaBase(MongoModel):
     acao: str  # create, update, delete, login, logout, etc
     modulo: str  # usuario, leilao, lance, etc
     usuario_id: Optional[PyObjectId] = None
@@ -37,13 +22,5 @@ class AuditoriaInDB(AuditoriaBase):
     criado_em: datetime = Field(default_factory=datetime.utcnow)
     metadata: Optional[Dict[str, Any]] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Auditoria(AuditoriaInDB):
     pass 
\ No newline at end of file
@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class BackupBase(BaseModel):
+class BackupBase(MongoModel):
     tipo: str  # completo, incremental, diferencial
     status: str = "pendente"  # pendente, em_andamento, concluido, erro
     tamanho: Optional[int] = None  # em bytes
@@ -29,7 +14,7 @@ class BackupBase(BaseModel):
 class BackupCreate(BackupBase):
     pass
 
-class BackupUpdate(BaseModel):
+class BackupUpdate(MongoModel):
     status: Optional[str] = None
     tamanho: Optional[int] = None
     erro: Optional[str] = None
@@ -45,13 +30,5 @@ class BackupInDB(BackupBase):
     user_agent: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Backup(BackupInDB):
     pass 
\ No newline at end of file
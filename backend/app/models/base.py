@@ -0,0 +1,99 @@
+"""
+Base compartilhada dos modelos Pydantic v2.
+
+Concentra o tipo PyObjectId, a configuração comum dos modelos persistidos
+no MongoDB e TypeAdapters em cache para validar e serializar listas de
+documentos sem reconstruir o schema a cada chamada.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Type, TypeVar
+
+from bson import ObjectId
+from pydantic import BaseModel, ConfigDict, GetCoreSchemaHandler, GetJsonSchemaHandler, TypeAdapter
+from pydantic.json_schema import JsonSchemaValue
+from pydantic_core import core_schema
+
+
+class PyObjectId(ObjectId):
+    """
+    ObjectId com schema nativo do Pydantic v2.
+
+    Aceita ObjectId ou string hexadecimal na validação e serializa como
+    string apenas no modo JSON, mantendo o ObjectId ao gravar no Mongo.
+    """
+
+    @classmethod
+    def validate(cls, value: Any) -> ObjectId:
+        if isinstance(value, ObjectId):
+            return value
+        if isinstance(value, (str, bytes)) and ObjectId.is_valid(value):
+            return cls(value)
+        raise ValueError("Invalid ObjectId")
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, _source_type: Any, _handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                str, when_used="json"
+            ),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(
+        cls, _core_schema: core_schema.CoreSchema, handler: GetJsonSchemaHandler
+    ) -> JsonSchemaValue:
+        return handler(core_schema.str_schema())
+
+
+class MongoModel(BaseModel):
+    """
+    Modelo base para documentos do MongoDB.
+
+    Sem json_encoders (caminho lento e depreciado no v2): ObjectId e
+    datetime são serializados pelo próprio core schema.
+    """
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        revalidate_instances="never",
+        validate_assignment=False,
+        protected_namespaces=(),
+    )
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[M]) -> TypeAdapter:
+    """
+    Retorna o TypeAdapter de List[model], construído uma única vez por modelo.
+    """
+    return TypeAdapter(List[model])  # type: ignore[valid-type]
+
+
+def validate_many(model: Type[M], documents: Iterable[Dict[str, Any]]) -> List[M]:
+    """
+    Valida uma lista de documentos em uma única chamada ao core do Pydantic.
+    """
+    if not isinstance(documents, list):
+        documents = list(documents)
+    return list_adapter(model).validate_python(documents)
+
+
+def dump_many(model: Type[M], items: List[M], mode: str = "python") -> List[Dict[str, Any]]:
+    """
+    Serializa uma lista de modelos usando os aliases (_id).
+    """
+    return list_adapter(model).dump_python(items, mode=mode, by_alias=True)
+
+
+def dump_many_json(model: Type[M], items: List[M]) -> bytes:
+    """
+    Serializa uma lista de modelos direto para bytes JSON.
+    """
+    return list_adapter(model).dump_json(items, by_alias=True)
@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class CategoriaBase(BaseModel):
+class CategoriaBase(MongoModel):
     nome: str
     descricao: Optional[str] = None
     icone: Optional[str] = None
@@ -28,7 +13,7 @@ class CategoriaBase(BaseModel):
 class CategoriaCreate(CategoriaBase):
     pass
 
-class CategoriaUpdate(BaseModel):
+class CategoriaUpdate(MongoModel):
     nome: Optional[str] = None
     descricao: Optional[str] = None
     icone: Optional[str] = None
@@ -41,13 +26,5 @@ class CategoriaInDB(CategoriaBase):
     atualizado_em: datetime = Field(default_factory=datetime.utcnow)
     criado_por: PyObjectId
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Categoria(CategoriaInDB):
     pass 
\ No newline at end of file
@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class ConfiguracaoBase(BaseModel):
+class ConfiguracaoBase(MongoModel):
     chave: str
     valor: Any
     descricao: Optional[str] = None
@@ -29,7 +14,7 @@ class ConfiguracaoBase(BaseModel):
 class ConfiguracaoCreate(ConfiguracaoBase):
     pass
 
-class ConfiguracaoUpdate(BaseModel):
+class ConfiguracaoUpdate(MongoModel):
     valor: Optional[Any] = None
     descricao: Optional[str] = None
     tipo: Optional[str] = None
@@ -43,13 +28,5 @@ class ConfiguracaoInDB(ConfiguracaoBase):
     criado_por: PyObjectId
     atualizado_por: Optional[PyObjectId] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Configuracao(ConfiguracaoInDB):
     pass 
\ No newline at end of file
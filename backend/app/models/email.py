@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field, EmailStr
-from bson import ObjectId
+from pydantic import Field, EmailStr
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class EmailBase(BaseModel):
+class EmailBase(MongoModel):
     assunto: str
     destinatarios: List[EmailStr]
     template: str
@@ -29,7 +14,7 @@ class EmailBase(BaseModel):
 class EmailCreate(EmailBase):
     pass
 
-class EmailUpdate(BaseModel):
+class EmailUpdate(MongoModel):
     status: Optional[str] = None
     erro: Optional[str] = None
 
@@ -43,13 +28,5 @@ class EmailInDB(EmailBase):
     user_agent: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Email(EmailInDB):
     pass 
\ No newline at end of file
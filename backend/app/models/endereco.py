@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field, validator
-from bson import ObjectId
+from pydantic import Field, field_validator
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class EnderecoBase(BaseModel):
+class EnderecoBase(MongoModel):
     cep: str
     logradouro: str
     numero: str
@@ -31,7 +16,8 @@ class EnderecoBase(BaseModel):
     principal: bool = False
     usuario_id: PyObjectId
 
-    @validator('cep')
+    @field_validator('cep')
+    @classmethod
     def validar_cep(cls, v):
         # Remove caracteres não numéricos
         cep = ''.join(filter(str.isdigit, v))
@@ -41,7 +27,8 @@ class EnderecoBase(BaseModel):
             
         return cep
 
-    @validator('estado')
+    @field_validator('estado')
+    @classmethod
     def validar_estado(cls, v):
         estados = [
             'AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MT', 'MS', 'MG',
@@ -54,7 +41,7 @@ class EnderecoBase(BaseModel):
 class EnderecoCreate(EnderecoBase):
     pass
 
-class EnderecoUpdate(BaseModel):
+class EnderecoUpdate(MongoModel):
     cep: Optional[str] = None
     logradouro: Optional[str] = None
     numero: Optional[str] = None
@@ -66,7 +53,8 @@ class EnderecoUpdate(BaseModel):
     tipo: Optional[str] = None
     principal: Optional[bool] = None
 
-    @validator('cep')
+    @field_validator('cep')
+    @classmethod
     def validar_cep(cls, v):
         if v is not None:
             # Remove caracteres não numéricos
@@ -78,7 +66,8 @@ class EnderecoUpdate(BaseModel):
             return cep
         return v
 
-    @validator('estado')
+    @field_validator('estado')
+    @classmethod
     def validar_estado(cls, v):
         if v is not None:
             estados = [
@@ -96,13 +85,5 @@ class EnderecoInDB(EnderecoBase):
     atualizado_em: datetime = Field(default_factory=datetime.utcnow)
     ativo: bool = True
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Endereco(EnderecoInDB):
     pass 
\ No newline at end of file
@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class ErroBase(BaseModel):
+class ErroBase(MongoModel):
     nivel: str  # error, warning, critical
     mensagem: str
     stack_trace: Optional[str] = None
@@ -32,7 +17,7 @@ class ErroBase(BaseModel):
 class ErroCreate(ErroBase):
     pass
 
-class ErroUpdate(BaseModel):
+class ErroUpdate(MongoModel):
     resolvido: bool = False
     resolucao: Optional[str] = None
 
@@ -44,13 +29,5 @@ class ErroInDB(ErroBase):
     resolucao: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Erro(ErroInDB):
     pass 
\ No newline at end of file
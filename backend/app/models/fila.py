@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class FilaBase(BaseModel):
+class FilaBase(MongoModel):
     nome: str
     acao: str  # enqueue, dequeue, process
     status: str = "pendente"  # pendente, processando, concluido, erro
@@ -30,7 +15,7 @@ class FilaBase(BaseModel):
 class FilaCreate(FilaBase):
     pass
 
-class FilaUpdate(BaseModel):
+class FilaUpdate(MongoModel):
     status: Optional[str] = None
     tentativas: Optional[int] = None
     erro: Optional[str] = None
@@ -45,13 +30,5 @@ class FilaInDB(FilaBase):
     user_agent: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Fila(FilaInDB):
     pass 
\ No newline at end of file
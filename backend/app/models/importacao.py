@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+from pydantic import Field
+from .base import MongoModel, PyObjectId
+
+class ImportacaoBase(MongoModel):
+    origem: str  # caixa
+    fontes: List[str]  # arquivos ou UFs
+    status: str = "pendente"  # pendente, em_andamento, concluido, erro
+    inseridos: int = 0
+    atualizados: int = 0
+    inalterados: int = 0
+    invalidos: int = 0
+    erro: Optional[str] = None
+
+class ImportacaoCreate(ImportacaoBase):
+    pass
+
+class ImportacaoInDB(ImportacaoBase):
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    criado_em: datetime = Field(default_factory=datetime.utcnow)
+    atualizado_em: datetime = Field(default_factory=datetime.utcnow)
+    iniciado_em: Optional[datetime] = None
+    concluido_em: Optional[datetime] = None
+    usuario_id: Optional[PyObjectId] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+class Importacao(ImportacaoInDB):
+    pass
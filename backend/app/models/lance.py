@@ -1,29 +1,15 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field, validator
-from bson import ObjectId
+from pydantic import Field, field_validator
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class LanceBase(BaseModel):
+class LanceBase(MongoModel):
     valor: float
     leilao_id: PyObjectId
     usuario_id: PyObjectId
 
-    @validator('valor')
+    @field_validator('valor')
+    @classmethod
     def validar_valor(cls, v):
         if v <= 0:
             raise ValueError('O valor do lance deve ser maior que zero')
@@ -32,10 +18,11 @@ class LanceBase(BaseModel):
 class LanceCreate(LanceBase):
     pass
 
-class LanceUpdate(BaseModel):
+class LanceUpdate(MongoModel):
     valor: Optional[float] = None
 
-    @validator('valor')
+    @field_validator('valor')
+    @classmethod
     def validar_valor(cls, v):
         if v is not None and v <= 0:
             raise ValueError('O valor do lance deve ser maior que zero')
@@ -47,13 +34,5 @@ class LanceInDB(LanceBase):
     status: str = "pendente"  # pendente, aceito, rejeitado
     observacao: Optional[str] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Lance(LanceInDB):
     pass 
\ No newline at end of file
@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel, Field, validator
-from bson import ObjectId
+from pydantic import Field, ValidationInfo, field_validator
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class LeilaoBase(BaseModel):
+class LeilaoBase(MongoModel):
     titulo: str
     descricao: str
     valor_inicial: float
@@ -29,20 +14,24 @@ class LeilaoBase(BaseModel):
     imagens: List[str] = []
     ativo: bool = True
 
-    @validator('valor_inicial')
+    @field_validator('valor_inicial')
+    @classmethod
     def validar_valor_inicial(cls, v):
         if v <= 0:
             raise ValueError('O valor inicial deve ser maior que zero')
         return round(v, 2)
 
-    @validator('valor_minimo_incremento')
+    @field_validator('valor_minimo_incremento')
+    @classmethod
     def validar_valor_minimo_incremento(cls, v):
         if v <= 0:
             raise ValueError('O valor mínimo de incremento deve ser maior que zero')
         return round(v, 2)
 
-    @validator('data_fim')
-    def validar_data_fim(cls, v, values):
+    @field_validator('data_fim')
+    @classmethod
+    def validar_data_fim(cls, v, info: ValidationInfo):
+        values = info.data
         if 'data_inicio' in values and v <= values['data_inicio']:
             raise ValueError('A data de fim deve ser posterior à data de início')
         return v
@@ -50,7 +39,7 @@ class LeilaoBase(BaseModel):
 class LeilaoCreate(LeilaoBase):
     pass
 
-class LeilaoUpdate(BaseModel):
+class LeilaoUpdate(MongoModel):
     titulo: Optional[str] = None
     descricao: Optional[str] = None
     valor_inicial: Optional[float] = None
@@ -61,20 +50,24 @@ class LeilaoUpdate(BaseModel):
     imagens: Optional[List[str]] = None
     ativo: Optional[bool] = None
 
-    @validator('valor_inicial')
+    @field_validator('valor_inicial')
+    @classmethod
     def validar_valor_inicial(cls, v):
         if v is not None and v <= 0:
             raise ValueError('O valor inicial deve ser maior que zero')
         return round(v, 2) if v is not None else v
 
-    @validator('valor_minimo_incremento')
+    @field_validator('valor_minimo_incremento')
+    @classmethod
     def validar_valor_minimo_incremento(cls, v):
         if v is not None and v <= 0:
             raise ValueError('O valor mínimo de incremento deve ser maior que zero')
         return round(v, 2) if v is not None else v
 
-    @validator('data_fim')
-    def validar_data_fim(cls, v, values):
+    @field_validator('data_fim')
+    @classmethod
+    def validar_data_fim(cls, v, info: ValidationInfo):
+        values = info.data
         if v is not None and 'data_inicio' in values and values['data_inicio'] is not None:
             if v <= values['data_inicio']:
                 raise ValueError('A data de fim deve ser posterior à data de início')
@@ -89,15 +82,8 @@ class LeilaoInDB(LeilaoBase):
     valor_atual: float = Field(default_factory=lambda: 0.0)
     ultimo_lance: Optional[PyObjectId] = None
     total_lances: int = 0
-    total_visualizacoes: int = 0
-
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
+    # Visualizações, favoritos e compartilhamentos ficam nos shards de
+    # contadores_leilao (GET /leiloes/{id}/contadores), não no documento
 
 class Leilao(LeilaoInDB):
     pass 
\ No newline at end of file
@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class ManutencaoBase(BaseModel):
+class ManutencaoBase(MongoModel):
     tipo: str  # sistema, banco_dados, cache, etc
     descricao: str
     status: str = "pendente"  # pendente, em_andamento, concluido, erro
@@ -30,7 +15,7 @@ class ManutencaoBase(BaseModel):
 class ManutencaoCreate(ManutencaoBase):
     pass
 
-class ManutencaoUpdate(BaseModel):
+class ManutencaoUpdate(MongoModel):
     status: Optional[str] = None
     data_fim: Optional[datetime] = None
     erro: Optional[str] = None
@@ -44,13 +29,5 @@ class ManutencaoInDB(ManutencaoBase):
     user_agent: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Manutencao(ManutencaoInDB):
     pass 
\ No newline at end of file
@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class NotificacaoBase(BaseModel):
+class NotificacaoBase(MongoModel):
     titulo: str
     mensagem: str
     tipo: str  # lance, leilao, sistema
@@ -29,7 +14,7 @@ class NotificacaoBase(BaseModel):
 class NotificacaoCreate(NotificacaoBase):
     pass
 
-class NotificacaoUpdate(BaseModel):
+class NotificacaoUpdate(MongoModel):
     lida: bool = False
 
 class NotificacaoInDB(NotificacaoBase):
@@ -38,13 +23,5 @@ class NotificacaoInDB(NotificacaoBase):
     lida: bool = False
     lida_em: Optional[datetime] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Notificacao(NotificacaoInDB):
     pass 
\ No newline at end of file
@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field, validator
-from bson import ObjectId
+from pydantic import Field, field_validator
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class PagamentoBase(BaseModel):
+class PagamentoBase(MongoModel):
     valor: float
     tipo: str  # boleto, cartao, pix, transferencia
     status: str = "pendente"  # pendente, aprovado, rejeitado, cancelado
@@ -28,13 +13,15 @@ class PagamentoBase(BaseModel):
     parcelas: int = 1
     dados_pagamento: Optional[Dict[str, Any]] = None
 
-    @validator('valor')
+    @field_validator('valor')
+    @classmethod
     def validar_valor(cls, v):
         if v <= 0:
             raise ValueError('O valor deve ser maior que zero')
         return round(v, 2)
 
-    @validator('parcelas')
+    @field_validator('parcelas')
+    @classmethod
     def validar_parcelas(cls, v):
         if v < 1:
             raise ValueError('O número de parcelas deve ser maior que zero')
@@ -43,7 +30,7 @@ class PagamentoBase(BaseModel):
 class PagamentoCreate(PagamentoBase):
     pass
 
-class PagamentoUpdate(BaseModel):
+class PagamentoUpdate(MongoModel):
     status: Optional[str] = None
     dados_pagamento: Optional[Dict[str, Any]] = None
 
@@ -59,13 +46,5 @@ class PagamentoInDB(PagamentoBase):
     mensagem_erro: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Pagamento(PagamentoInDB):
     pass 
\ No newline at end of file
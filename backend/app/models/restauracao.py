@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class RestauracaoBase(BaseModel):
+class RestauracaoBase(MongoModel):
     backup_id: PyObjectId
     status: str = "pendente"  # pendente, em_andamento, concluido, erro
     local_origem: str
@@ -28,7 +13,7 @@ class RestauracaoBase(BaseModel):
 class RestauracaoCreate(RestauracaoBase):
     pass
 
-class RestauracaoUpdate(BaseModel):
+class RestauracaoUpdate(MongoModel):
     status: Optional[str] = None
     erro: Optional[str] = None
 
@@ -43,13 +28,5 @@ class RestauracaoInDB(RestauracaoBase):
     user_agent: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Restauracao(RestauracaoInDB):
     pass 
\ No newline at end of file
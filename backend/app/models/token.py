@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class TokenBase(BaseModel):
+class TokenBase(MongoModel):
     token: str
     tipo: str  # access, refresh, reset_password, email_verification
     usuario_id: PyObjectId
@@ -28,7 +13,7 @@ class TokenBase(BaseModel):
 class TokenCreate(TokenBase):
     pass
 
-class TokenUpdate(BaseModel):
+class TokenUpdate(MongoModel):
     usado: bool = False
 
 class TokenInDB(TokenBase):
@@ -38,13 +23,5 @@ class TokenInDB(TokenBase):
     ip: Optional[str] = None
     user_agent: Optional[str] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Token(TokenInDB):
     pass 
\ No newline at end of file
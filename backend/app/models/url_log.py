@@ -1,24 +1,9 @@
 from datetime import datetime
-from typing import Optional, Any
-from pydantic import BaseModel, Field, ConfigDict
-from bson import ObjectId
+from typing import Optional
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __get_pydantic_json_schema__(cls, _schema_generator: Any) -> dict[str, Any]:
-        return {"type": "string"}
-
-class URLLogBase(BaseModel):
+class URLLogBase(MongoModel):
     url: str
     dominio: str
     status: str  # valores: "confiável", "suspeito"
@@ -30,14 +15,5 @@ class URLLogInDB(URLLogBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
-    model_config = ConfigDict(
-        populate_by_name=True,
-        arbitrary_types_allowed=True,
-        json_encoders={
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-    )
-
 class URLLog(URLLogInDB):
     pass 
\ No newline at end of file
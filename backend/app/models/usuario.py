@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, Field, EmailStr, validator
-from bson import ObjectId
+from pydantic import Field, EmailStr, field_validator
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class UsuarioBase(BaseModel):
+class UsuarioBase(MongoModel):
     nome: str
     email: EmailStr
     cpf: str
@@ -26,7 +11,8 @@ class UsuarioBase(BaseModel):
     ativo: bool = True
     tipo: str = "cliente"  # cliente, admin, corretor
 
-    @validator('cpf')
+    @field_validator('cpf')
+    @classmethod
     def validar_cpf(cls, v):
         # Remove caracteres não numéricos
         cpf = ''.join(filter(str.isdigit, v))
@@ -55,7 +41,7 @@ class UsuarioBase(BaseModel):
 class UsuarioCreate(UsuarioBase):
     senha: str
 
-class UsuarioUpdate(BaseModel):
+class UsuarioUpdate(MongoModel):
     nome: Optional[str] = None
     email: Optional[EmailStr] = None
     telefone: Optional[str] = None
@@ -72,13 +58,5 @@ class UsuarioInDB(UsuarioBase):
     leiloes_favoritos: List[PyObjectId] = []
     leiloes_participados: List[PyObjectId] = []
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Usuario(UsuarioInDB):
     pass 
\ No newline at end of file
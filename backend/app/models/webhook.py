@@ -1,24 +1,9 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from pydantic import Field
+from .base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
-
-class WebhookBase(BaseModel):
+class WebhookBase(MongoModel):
     url: str
     evento: str
     metodo: str = "POST"
@@ -32,7 +17,7 @@ class WebhookBase(BaseModel):
 class WebhookCreate(WebhookBase):
     pass
 
-class WebhookUpdate(BaseModel):
+class WebhookUpdate(MongoModel):
     status: Optional[str] = None
     status_code: Optional[int] = None
     resposta: Optional[Dict[str, Any]] = None
@@ -48,13 +33,5 @@ class WebhookInDB(WebhookBase):
     user_agent: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda dt: dt.isoformat()
-        }
-
 class Webhook(WebhookInDB):
     pass 
\ No newline at end of file
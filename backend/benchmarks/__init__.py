@@ -0,0 +1,3 @@
+"""
+Pacote benchmarks
+"""
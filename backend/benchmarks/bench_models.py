@@ -0,0 +1,93 @@
+"""
+Micro-benchmark de validação e serialização dos modelos.
+
+Compara a validação item a item (model_validate em laço) com a validação
+em lote pelo TypeAdapter em cache, e o dump item a item com o dump em lote.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_models --rows 5000 --repeat 5
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from bson import ObjectId
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.base import dump_many, dump_many_json, validate_many  # noqa: E402
+from app.models.lance import LanceInDB  # noqa: E402
+from app.models.leilao import LeilaoInDB  # noqa: E402
+
+
+def gerar_lances(rows: int) -> List[Dict]:
+    leilao_id = ObjectId()
+    return [
+        {
+            "_id": ObjectId(),
+            "valor": 1000.0 + i,
+            "leilao_id": leilao_id,
+            "usuario_id": ObjectId(),
+            "criado_em": datetime.utcnow(),
+            "status": "aceito",
+        }
+        for i in range(rows)
+    ]
+
+
+def gerar_leiloes(rows: int) -> List[Dict]:
+    return [
+        {
+            "_id": ObjectId(),
+            "titulo": f"Imóvel {i}",
+            "descricao": "Apartamento 2 quartos",
+            "valor_inicial": 250000.0,
+            "valor_minimo_incremento": 1000.0,
+            "data_inicio": datetime(2024, 4, 1),
+            "data_fim": datetime(2024, 4, 15),
+            "categoria_id": ObjectId(),
+            "criado_por": ObjectId(),
+            "imagens": [f"https://cdn.exemplo.com/{i}/{j}.jpg" for j in range(5)],
+        }
+        for i in range(rows)
+    ]
+
+
+def medir(nome: str, rows: int, repeat: int, func: Callable[[], object]) -> None:
+    melhor = float("inf")
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    print(f"{nome:<40} {melhor * 1000:9.2f} ms  {rows / melhor:12,.0f} docs/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for model, documentos in (
+        (LanceInDB, gerar_lances(args.rows)),
+        (LeilaoInDB, gerar_leiloes(args.rows)),
+    ):
+        nome = model.__name__
+        itens = validate_many(model, documentos)
+        medir(f"{nome} model_validate (laço)", args.rows, args.repeat,
+              lambda: [model.model_validate(doc) for doc in documentos])
+        medir(f"{nome} validate_many", args.rows, args.repeat,
+              lambda: validate_many(model, documentos))
+        medir(f"{nome} model_dump (laço)", args.rows, args.repeat,
+              lambda: [item.model_dump(by_alias=True) for item in itens])
+        medir(f"{nome} dump_many", args.rows, args.repeat,
+              lambda: dump_many(model, itens))
+        medir(f"{nome} dump_many_json", args.rows, args.repeat,
+              lambda: dump_many_json(model, itens))
+
+
+if __name__ == "__main__":
+    main()
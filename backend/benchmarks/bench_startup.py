@@ -0,0 +1,116 @@
+"""
+Benchmark de cold start da API.
+
+Mede o tempo de import dos módulos (via ``python -X importtime``) e o tempo
+até a primeira requisição respondida por um processo uvicorn novo.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_startup --app main:app --runs 3
+    python -m benchmarks.bench_startup --output startup.jsonl
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def perfil_de_import(module: str, top: int) -> Tuple[float, List[Tuple[str, int]]]:
+    """
+    Retorna o tempo total de import (ms) e os módulos mais caros.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    cumulativos: Dict[str, int] = {}
+    for linha in proc.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|")
+        cumulativos[nome.strip()] = int(cumulativo)
+    total = cumulativos.get(module, 0) / 1000
+    mais_caros = sorted(cumulativos.items(), key=lambda item: item[1], reverse=True)
+    return total, mais_caros[:top]
+
+
+def _porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def tempo_ate_primeira_requisicao(app: str, path: str, timeout: float) -> float:
+    """
+    Sobe um uvicorn novo e mede quanto tempo leva até a primeira resposta.
+    """
+    porta = _porta_livre()
+    url = f"http://127.0.0.1:{porta}{path}"
+    inicio = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(porta), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    try:
+        while time.perf_counter() - inicio < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status < 500:
+                        return (time.perf_counter() - inicio) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise TimeoutError(f"Sem resposta em {url} após {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="arquivo JSONL onde o resultado é acrescentado")
+    args = parser.parse_args()
+
+    module = args.app.split(":")[0]
+    total_import, mais_caros = perfil_de_import(module, args.top)
+    print(f"Import de {module}: {total_import:.1f} ms")
+    for nome, cumulativo in mais_caros:
+        print(f"  {cumulativo / 1000:9.1f} ms  {nome}")
+
+    tempos = [
+        tempo_ate_primeira_requisicao(args.app, args.path, args.timeout)
+        for _ in range(args.runs)
+    ]
+    print(f"Primeira requisição: melhor {min(tempos):.1f} ms, pior {max(tempos):.1f} ms")
+
+    if args.output:
+        registro = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "app": args.app,
+            "import_ms": round(total_import, 1),
+            "first_request_ms": [round(t, 1) for t in tempos],
+        }
+        with open(args.output, "a", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps(registro) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel
+import asyncio
 import os
 from dotenv import load_dotenv
 import logging
@@ -12,6 +14,8 @@ logger = logging.getLogger(__name__)
 # Configurações do MongoDB
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "leilao_insights")
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
 
 # Cliente MongoDB
 client = None
@@ -49,45 +53,163 @@ async def close_database():
 class MongoDB:
     client = None
     db = None
+    # Sinalizadores de prontidão atualizados pela tarefa em background
+    connected = False
+    indexes_ready = False
+    _index_task = None
+
+    # Índices por coleção; create_indexes é idempotente, então a
+    # reconciliação apenas garante que todos existam
+    INDEXES = {
+        "url_logs": [
+            IndexModel("url", unique=True),
+            IndexModel("dominio"),
+            IndexModel("timestamp"),
+        ],
+        "extraction_results": [
+            IndexModel("url"),
+            IndexModel("timestamp"),
+            # Marca d'água dos backups incrementais
+            IndexModel("atualizado_em"),
+            # Busca de imóveis: igualdades (ativo, estado, cidade) antes da
+            # ordenação e de _id, que desempata o cursor
+            IndexModel([("busca.ativo", 1), ("busca.preco", 1), ("_id", 1)]),
+            IndexModel([("busca.ativo", 1), ("busca.desconto", -1), ("_id", -1)]),
+            IndexModel([("busca.ativo", 1), ("busca.data_fim", 1), ("_id", 1)]),
+            IndexModel([("busca.ativo", 1), ("busca.estado", 1), ("busca.cidade", 1), ("busca.preco", 1), ("_id", 1)]),
+            IndexModel([("busca.ativo", 1), ("busca.estado", 1), ("busca.cidade", 1), ("busca.desconto", -1), ("_id", -1)]),
+            IndexModel([("busca.ativo", 1), ("busca.estado", 1), ("busca.cidade", 1), ("busca.data_fim", 1), ("_id", 1)]),
+            # Importação da Caixa: upsert pelo número do imóvel
+            IndexModel("caixa.numero", unique=True, partialFilterExpression={"caixa.numero": {"$type": "string"}}),
+        ],
+        "importacoes": [
+            IndexModel([("origem", 1), ("criado_em", -1)]),
+        ],
+        "pre_analysis_logs": [
+            IndexModel("url", unique=True),
+            IndexModel("dominio"),
+            IndexModel("data"),
+            IndexModel("updated_at"),
+        ],
+        "lances": [
+            IndexModel([("leilao_id", 1), ("criado_em", -1)]),
+            IndexModel([("leilao_id", 1), ("valor", -1)]),
+        ],
+        "leiloes": [
+            IndexModel([("status", 1), ("data_inicio", 1)]),
+            IndexModel([("status", 1), ("data_fim", 1)]),
+            IndexModel("atualizado_em"),
+        ],
+        "contadores_leilao": [
+            IndexModel("leilao_id"),
+        ],
+        "atividades_horarias": [
+            IndexModel([("item_id", 1), ("hora", -1)]),
+        ],
+        "webhook_assinaturas": [
+            IndexModel([("evento", 1), ("ativo", 1)]),
+        ],
+        "webhooks": [
+            IndexModel([("evento", 1), ("status", 1), ("criado_em", -1)]),
+        ],
+        "arquivos": [
+            IndexModel("hash", unique=True, partialFilterExpression={"hash": {"$type": "string"}}),
+            IndexModel("metadata.fontes"),
+        ],
+        "backups": [
+            IndexModel([("status", 1), ("tipo", 1), ("concluido_em", -1)]),
+        ],
+        "documentos": [
+            IndexModel("fontes"),
+        ],
+        "documento_paginas": [
+            IndexModel([("hash", 1), ("pagina", 1)], unique=True),
+        ],
+        "page_fingerprints": [
+            IndexModel("dominio"),
+        ],
+        "monitoramento": [
+            IndexModel([("ativo", 1), ("proxima_em", 1)]),
+            IndexModel("dominio"),
+        ],
+        "monitoramento_alteracoes": [
+            IndexModel([("url", 1), ("em", -1)]),
+        ],
+        "lotes_descobertos": [
+            IndexModel([("dominio", 1), ("descoberto_em", -1)]),
+        ],
+        "scheduler_leases": [
+            IndexModel("expires_at", expireAfterSeconds=3600),
+        ],
+    }
 
     @classmethod
-    async def connect_to_database(cls, url: str):
+    async def connect_to_database(cls, url: str, wait_for_indexes: bool = False):
+        """
+        Configura o cliente e agenda ping e índices em background.
+
+        O AsyncIOMotorClient conecta de forma preguiçosa, então o worker
+        pode começar a atender sem esperar o MongoDB responder.
+        """
         try:
             logger.info(f"Conectando ao MongoDB em: {url}")
-            cls.client = AsyncIOMotorClient(url)
-            # Testa a conexão
-            await cls.client.admin.command('ping')
-            logger.info("Conexão com MongoDB estabelecida com sucesso!")
+            cls.client = AsyncIOMotorClient(
+                url,
+                minPoolSize=MONGODB_MIN_POOL_SIZE,
+                maxPoolSize=MONGODB_MAX_POOL_SIZE,
+            )
             
             # Configura o banco de dados
             db_name = os.getenv("MONGODB_DB", "leilao_insights")
             cls.db = cls.client[db_name]
             logger.info(f"Banco de dados '{db_name}' configurado")
             
-            # Cria índices necessários
-            await cls.create_indexes()
+            # Ping e índices rodam fora do caminho de inicialização
+            cls._index_task = asyncio.create_task(cls.reconcile_indexes())
+            if wait_for_indexes:
+                await cls._index_task
             
         except Exception as e:
             logger.error(f"Erro ao conectar com MongoDB: {str(e)}", exc_info=True)
             raise
 
+    @classmethod
+    async def reconcile_indexes(cls, retries: int = 5, delay: float = 1.0):
+        """
+        Testa a conexão e cria os índices de todas as coleções em paralelo.
+
+        Falhas são registradas e repetidas com backoff em vez de derrubar
+        o worker.
+        """
+        for attempt in range(1, retries + 1):
+            try:
+                await cls.client.admin.command('ping')
+                cls.connected = True
+                logger.info("Conexão com MongoDB estabelecida com sucesso!")
+                await cls.create_indexes()
+                return
+            except Exception as e:
+                logger.error(
+                    f"Erro ao preparar MongoDB (tentativa {attempt}/{retries}): {str(e)}"
+                )
+                if attempt < retries:
+                    await asyncio.sleep(delay * 2 ** (attempt - 1))
+
     @classmethod
     async def create_indexes(cls):
         try:
-            # Índice para url_logs
-            await cls.db.url_logs.create_index("url", unique=True)
-            await cls.db.url_logs.create_index("dominio")
-            await cls.db.url_logs.create_index("timestamp")
-            
-            # Índice para extraction_results
-            await cls.db.extraction_results.create_index("url")
-            await cls.db.extraction_results.create_index("timestamp")
-            
-            # Índice para pre_analysis_logs
-            await cls.db.pre_analysis_logs.create_index("url", unique=True)
-            await cls.db.pre_analysis_logs.create_index("dominio")
-            await cls.db.pre_analysis_logs.create_index("data")
+            results = await asyncio.gather(
+                *(
+                    cls.db[collection].create_indexes(indexes)
+                    for collection, indexes in cls.INDEXES.items()
+                ),
+                return_exceptions=True,
+            )
+            errors = [r for r in results if isinstance(r, Exception)]
+            if errors:
+                raise errors[0]
             
+            cls.indexes_ready = True
             logger.info("Índices criados com sucesso")
         except Exception as e:
             logger.error(f"Erro ao criar índices: {str(e)}", exc_info=True)
@@ -96,10 +218,14 @@ class MongoDB:
     @classmethod
     async def close_database_connection(cls):
         try:
+            if cls._index_task and not cls._index_task.done():
+                cls._index_task.cancel()
             if cls.client:
                 cls.client.close()
                 cls.client = None
                 cls.db = None
+                cls.connected = False
+                cls.indexes_ready = False
                 logger.info("Conexão com MongoDB fechada com sucesso")
         except Exception as e:
             logger.error(f"Erro ao fechar conexão com MongoDB: {str(e)}", exc_info=True)
@@ -107,7 +233,7 @@ class MongoDB:
 
     @classmethod
     def get_database(cls):
-        if not cls.db:
+        if cls.db is None:
             logger.error("Database não inicializado")
             raise Exception("Database not initialized")
         return cls.db 
\ No newline at end of file
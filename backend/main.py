@@ -1,16 +1,33 @@
 from fastapi import FastAPI, HTTPException, status, Request
 from pydantic import BaseModel, HttpUrl
 from urllib.parse import urlparse
-import httpx
-from routers import pre_analysis
+from routers import pre_analysis, health, lances, live, atividades, backups, documentos, imoveis, importacoes, analytics, avaliacao
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-from models.url_log import URLLog
+from fastapi.staticfiles import StaticFiles
 from config import MongoDB
+from utils.json_response import FastJSONResponse
+from utils.http_client import get_http_client, close_http_client
+from services.analysis_cache import analysis_cache
+from services.warmup import run_warmup
+from services.shutdown import coordinator, resume_requeued_analyses
+from services.analysis_service import analyze_property
+from services.domain_reputation import find_lookalike
+from services.bid_engine import bid_sequencer
+from services.live_feed import live_feed
+from services.activity_counter import activity_counter
+from services.notifications import notification_dispatcher
+from services.webhooks import EXTRACAO_CONCLUIDA, webhook_engine
+from services.image_pipeline import IMAGE_PUBLIC_PREFIX, IMAGE_STORE_DIR, image_pipeline
+from services.document_pipeline import document_pipeline, document_urls
+from services.property_search import retire_previous, search_fields
+from utils.normalization import normalized_fields
+from services.valuation import valuation_engine
+from services.page_fingerprint import clone_detector
+from services.auction_scheduler import auction_scheduler, AUCTION_SCHEDULER_ENABLED
+from services.recrawl import recrawl_scheduler, RECRAWL_ENABLED
+from services.discovery_crawler import discovery_crawler, CRAWLER_ENABLED
 import asyncio
 from datetime import datetime
-import aiohttp
-from bs4 import BeautifulSoup
 import re
 from typing import List, Optional, Dict, Any
 import os
@@ -34,7 +51,8 @@ load_dotenv()
 app = FastAPI(
     title="LFCom Leilão Insights API",
     description="API para análise de imóveis em leilão",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Configuração do CORS
@@ -48,6 +66,27 @@ app.add_middleware(
 
 # Inclui os routers
 app.include_router(pre_analysis.router, prefix="/api", tags=["analysis"])
+app.include_router(health.router, tags=["health"])
+app.include_router(lances.router, prefix="/api", tags=["lances"])
+app.include_router(live.router, tags=["live"])
+app.include_router(atividades.router, prefix="/api", tags=["atividades"])
+app.include_router(backups.router, prefix="/api", tags=["backups"])
+app.include_router(documentos.router, prefix="/api", tags=["documentos"])
+app.include_router(imoveis.router, prefix="/api", tags=["imoveis"])
+app.include_router(importacoes.router, prefix="/api", tags=["importacoes"])
+app.include_router(analytics.router, prefix="/api", tags=["analytics"])
+app.include_router(avaliacao.router, prefix="/api", tags=["avaliacao"])
+
+# Imagens importadas pelo pipeline (armazenamento endereçado por conteúdo)
+app.mount(IMAGE_PUBLIC_PREFIX, StaticFiles(directory=IMAGE_STORE_DIR, check_dir=False), name="media")
+
+# Lances enfileirados no sequenciador são processados antes do desligamento
+coordinator.register_flush(bid_sequencer.flush)
+coordinator.register_flush(live_feed.close_all)
+# Contadores de atividade acumulados em memória são gravados antes de sair
+coordinator.register_flush(activity_counter.flush)
+coordinator.register_flush(notification_dispatcher.flush)
+coordinator.register_flush(webhook_engine.flush)
 
 # Exemplo estático; depois podemos carregar do Mongo
 AUTHORIZED_DOMAINS = ["innlei.org.br"]  # Adicione outros domínios conforme necessário
@@ -68,6 +107,13 @@ class ExtractionCallback(BaseModel):
     address: Optional[str] = None
     documents: Optional[List[Dict[str, str]]] = None
     images: Optional[List[str]] = None
+    cidade: Optional[str] = None
+    estado: Optional[str] = None
+    quartos: Optional[str] = None
+    vagas: Optional[str] = None
+    area_privada: Optional[str] = None
+    aceita_financiamento: Optional[str] = None
+    aceita_fgts: Optional[str] = None
 
 @app.post("/api/extraction-callback")
 async def extraction_callback(data: ExtractionCallback):
@@ -76,21 +122,59 @@ async def extraction_callback(data: ExtractionCallback):
         logger.debug(f"Dados recebidos: {data.dict()}")
         
         # Adiciona timestamp
+        now = datetime.utcnow()
         result = {
             **data.dict(),
-            "timestamp": datetime.utcnow()
+            "timestamp": now,
+            "atualizado_em": now,
         }
+        # Preços em centavos e datas reais, para consultas por faixa e ordenação
+        result.update(normalized_fields(result))
+        result["busca"] = search_fields(result)
+        # Estimativa por comparáveis da mesma cidade (índice em memória)
+        try:
+            result["estimativa_comparaveis"] = valuation_engine.estimate(result["busca"], url=data.url)
+        except Exception as e:
+            logger.error(f"Erro ao estimar valor por comparáveis {data.url}: {str(e)}", exc_info=True)
+            result["estimativa_comparaveis"] = None
         
         # Salva no MongoDB
         db = MongoDB.get_database()
-        if not db:
+        if db is None:
             logger.error("Database não inicializado")
             raise HTTPException(status_code=500, detail="Database não inicializado")
             
         collection = db.extraction_results
         await collection.insert_one(result)
+        analysis_cache.invalidate(data.url)
         logger.info(f"Dados salvos com sucesso para URL: {data.url}")
         
+        # Só o resultado mais recente de cada URL aparece na busca de imóveis
+        try:
+            await retire_previous(data.url, result.get("_id"))
+        except Exception as e:
+            logger.error(f"Erro ao indexar resultado para busca {data.url}: {str(e)}", exc_info=True)
+        try:
+            valuation_engine.add(data.url, result["busca"])
+        except Exception as e:
+            logger.error(f"Erro ao indexar comparável {data.url}: {str(e)}", exc_info=True)
+        
+        # Copia as fotos para o armazenamento local em background
+        imagens = (data.images or []) + ([data.imagem] if data.imagem else [])
+        if imagens:
+            image_pipeline.schedule(data.url, imagens)
+        
+        # Editais e matrículas: baixados uma vez por conteúdo e indexados por página
+        documentos = document_urls(data.documents)
+        if documentos:
+            document_pipeline.schedule(data.url, documentos)
+        
+        # Avisa as integrações parceiras; a entrega acontece em background
+        try:
+            await webhook_engine.dispatch(EXTRACAO_CONCLUIDA, result)
+        except Exception as e:
+            logger.error(f"Erro ao agendar webhooks para URL {data.url}: {str(e)}", exc_info=True)
+        
         return {"success": True, "message": "Dados recebidos e salvos com sucesso"}
     except Exception as e:
         logger.error(f"Erro ao processar callback: {str(e)}", exc_info=True)
@@ -100,14 +184,22 @@ async def extraction_callback(data: ExtractionCallback):
 async def validate_url(payload: UrlPayload):
     try:
         host = urlparse(str(payload.url)).hostname or ""
+        suspeita = find_lookalike(host)
+        if suspeita is not None and host not in AUTHORIZED_DOMAINS:
+            logger.warning(f"Domínio parecido com {suspeita.semelhante_a}: {host}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"error":"lookalike_domain","domain":host,"similar_to":suspeita.semelhante_a,"distance":suspeita.distancia}
+            )
         if host not in AUTHORIZED_DOMAINS:
             logger.warning(f"Domínio não autorizado: {host}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={"error":"domain_not_allowed","domain":host}
             )
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            resp = await client.head(str(payload.url), follow_redirects=True)
+        # Cliente compartilhado: reaproveita o pool aquecido no startup
+        client = get_http_client()
+        resp = await client.head(str(payload.url), follow_redirects=True, timeout=5.0)
         if resp.status_code >= 400:
             logger.warning(f"URL inacessível: {payload.url} (status: {resp.status_code})")
             raise HTTPException(
@@ -115,6 +207,8 @@ async def validate_url(payload: UrlPayload):
                 detail={"error":"unreachable_url","status_code":resp.status_code}
             )
         return {"status":"ok"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao validar URL: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -130,13 +224,52 @@ async def startup_db_client():
         
         await MongoDB.connect_to_database(mongodb_url)
         logger.info("Conexão com MongoDB estabelecida com sucesso!")
+        
+        # O aquecimento roda em background; /health/ready responde 503 até terminar
+        app.state.warmup_task = asyncio.create_task(start_background_work())
     except Exception as e:
         logger.error(f"Erro ao conectar com MongoDB: {str(e)}", exc_info=True)
         raise
 
+async def start_background_work():
+    """
+    Aquece o worker, inicia o agendador de leilões e retoma análises
+    devolvidas por workers encerrados.
+    """
+    await run_warmup()
+    activity_counter.start()
+    valuation_engine.schedule_load()
+    clone_detector.schedule_load()
+    if AUCTION_SCHEDULER_ENABLED:
+        auction_scheduler.start()
+    if RECRAWL_ENABLED:
+        recrawl_scheduler.start()
+    if CRAWLER_ENABLED:
+        discovery_crawler.start()
+    try:
+        await resume_requeued_analyses(analyze_property)
+    except Exception as e:
+        logger.error(f"Erro ao retomar análises pendentes: {str(e)}", exc_info=True)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     try:
+        # Drena as análises em andamento antes de fechar o MongoDB
+        requeued = await coordinator.drain()
+        if requeued:
+            logger.warning(f"{len(requeued)} análises devolvidas para outro worker")
+        
+        warmup_task = getattr(app.state, "warmup_task", None)
+        if warmup_task and not warmup_task.done():
+            warmup_task.cancel()
+        await auction_scheduler.stop()
+        await recrawl_scheduler.stop()
+        await discovery_crawler.stop()
+        await activity_counter.stop()
+        await image_pipeline.close()
+        await document_pipeline.close()
+        await close_http_client()
+        
         logger.info("Fechando conexão com MongoDB...")
         await MongoDB.close_database_connection()
         logger.info("Conexão com MongoDB fechada com sucesso!")
@@ -145,6 +278,8 @@ async def shutdown_db_client():
         raise
 
 async def check_url(url: str) -> dict:
+    # Importado sob demanda para não pesar no cold start
+    import aiohttp
     try:
         async with aiohttp.ClientSession() as session:
             async with session.get(url) as response:
@@ -175,7 +310,9 @@ async def check_urls(urls: List[str]):
         db = MongoDB.get_database()
         await db.url_logs.insert_many(results)
         
-        return results
+        # insert_many adiciona o _id (ObjectId) em cada item; a resposta
+        # rápida serializa direto, sem revalidar item a item
+        return FastJSONResponse(results)
     except Exception as e:
         logger.error(f"Erro ao verificar URLs: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -187,7 +324,7 @@ async def get_url_logs(dominio: Optional[str] = None, limit: int = 100):
         query = {"dominio": dominio} if dominio else {}
         cursor = db.url_logs.find(query).sort("timestamp", -1).limit(limit)
         results = await cursor.to_list(length=limit)
-        return results
+        return FastJSONResponse(results)
     except Exception as e:
         logger.error(f"Erro ao buscar logs de URL: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -197,7 +334,7 @@ async def get_dominios():
     try:
         db = MongoDB.get_database()
         dominios = await db.url_logs.distinct("dominio")
-        return dominios
+        return FastJSONResponse(dominios)
     except Exception as e:
         logger.error(f"Erro ao buscar domínios: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -207,8 +344,12 @@ async def get_extraction_results(url: str):
     try:
         logger.info(f"Buscando resultados para URL: {url}")
         
+        cached = analysis_cache.get(url)
+        if cached is not None:
+            return FastJSONResponse({"success": True, "data": cached})
+        
         db = MongoDB.get_database()
-        if not db:
+        if db is None:
             logger.error("Database não inicializado")
             raise HTTPException(status_code=500, detail="Database não inicializado")
             
@@ -227,8 +368,9 @@ async def get_extraction_results(url: str):
         # Remove o _id do resultado
         result.pop("_id", None)
         logger.info(f"Resultado encontrado: {result}")
+        analysis_cache.put(url, result)
         
-        return {"success": True, "data": result}
+        return FastJSONResponse({"success": True, "data": result})
     except Exception as e:
         logger.error(f"Erro ao buscar resultados: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,19 +1,10 @@
 from datetime import datetime
-from typing import Optional, Any
-from pydantic import BaseModel, Field, ConfigDict
-from bson import ObjectId
+from typing import Optional
+from pydantic import Field
+from app.models.base import MongoModel, PyObjectId
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_pydantic_core_schema__(cls, _source_type: Any, _handler: Any) -> dict[str, Any]:
-        return {
-            'type': 'string',
-            'description': 'ObjectId',
-            'custom_validator': lambda x: ObjectId(x) if isinstance(x, str) else x
-        }
-
-class PreAnalysisLog(BaseModel):
-    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+class PreAnalysisLog(MongoModel):
+    id: Optional[PyObjectId] = Field(alias="_id", default_factory=PyObjectId)
     url: str
     status: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -21,26 +12,11 @@ class PreAnalysisLog(BaseModel):
     error: Optional[str] = None
     result: Optional[dict] = None
 
-    model_config = ConfigDict(
-        json_encoders={
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        },
-        populate_by_name=True,
-        arbitrary_types_allowed=True
-    )
-
-class PreAnalysisLogCreate(BaseModel):
+class PreAnalysisLogCreate(MongoModel):
     url: str
     status: str
     error: Optional[str] = None
     result: Optional[dict] = None
 
-    model_config = ConfigDict(
-        arbitrary_types_allowed=True
-    )
-
 class PreAnalysisLogInDB(PreAnalysisLog):
-    model_config = ConfigDict(
-        arbitrary_types_allowed=True
-    ) 
\ No newline at end of file
+    pass
@@ -1,13 +1,14 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import ConfigDict, Field
 from typing import Optional, Dict, Any
 from datetime import datetime
+from app.models.base import MongoModel
 
-class URLLogBase(BaseModel):
+class URLLogBase(MongoModel):
     url: str
     dominio: str
     status: str
     dados_extraidos: Optional[Dict[str, Any]] = None
-    timestamp: datetime = datetime.utcnow()
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class URLLogCreate(URLLogBase):
     pass
@@ -15,5 +16,4 @@ class URLLogCreate(URLLogBase):
 class URLLog(URLLogBase):
     id: str
 
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from services.market_analytics import AnalyticsUnavailable, market_analytics
+from services.property_search import normalize_term
+from utils.json_response import FastJSONResponse
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/analytics/mercado")
+async def market_stats(
+    agrupar: str = "cidade_tipo",
+    estado: Optional[str] = None,
+    cidade: Optional[str] = None,
+    tipo: Optional[str] = None,
+):
+    """
+    Preço/m², desconto sobre a avaliação e preço por grupo (cidade e tipo
+    por padrão): média, percentis 10/25/50/75/90 e quantidade de outliers.
+    """
+    try:
+        versao, grupos = await market_analytics.stats(agrupar)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except AnalyticsUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro ao calcular estatísticas de mercado: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao calcular estatísticas de mercado")
+
+    filtros = {"estado": estado.upper() if estado else None, "cidade": normalize_term(cidade), "tipo": normalize_term(tipo)}
+    filtros = {k: v for k, v in filtros.items() if v}
+    grupos = [g for g in grupos if all(g.get(k, v) == v for k, v in filtros.items())]
+    return FastJSONResponse({"versao": versao, "agrupamento": agrupar, "grupos": grupos})
+
+@router.get("/analytics/oportunidades")
+async def market_bargains(agrupar: str = "cidade_tipo", limite: int = 20):
+    """
+    Imóveis com preço/m² abaixo da cerca inferior de Tukey do seu grupo.
+    """
+    try:
+        versao, itens = await market_analytics.bargains(agrupar)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except AnalyticsUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro ao buscar oportunidades: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao buscar oportunidades")
+    return FastJSONResponse({"versao": versao, "oportunidades": itens[:max(limite, 0)]})
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from pydantic import BaseModel
+from typing import Optional
+from app.models.base import PyObjectId
+from services.activity_counter import COUNTER_FIELDS, activity_counter
+from utils.json_response import FastJSONResponse
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+class AtividadePayload(BaseModel):
+    tipo: str
+    usuario_id: Optional[PyObjectId] = None
+
+@router.post("/leiloes/{leilao_id}/atividades", status_code=status.HTTP_202_ACCEPTED)
+async def register_activity(leilao_id: PyObjectId, payload: AtividadePayload, request: Request):
+    """
+    Registra uma visualização, favorito ou compartilhamento. A gravação é
+    feita em lote pelo agregador, por isso a resposta é 202.
+    """
+    if payload.tipo not in COUNTER_FIELDS:
+        raise HTTPException(status_code=422, detail=f"Tipo de atividade inválido: {payload.tipo}")
+    activity_counter.record(
+        leilao_id,
+        payload.tipo,
+        usuario_id=payload.usuario_id,
+        ip=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+    return {"status": "accepted"}
+
+@router.get("/leiloes/{leilao_id}/contadores")
+async def get_counters(leilao_id: PyObjectId):
+    """
+    Retorna os totais de visualizações, favoritos e compartilhamentos.
+    """
+    try:
+        totals = await activity_counter.totals(leilao_id)
+    except Exception as e:
+        logger.error(f"Erro ao buscar contadores do leilão {leilao_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao buscar contadores")
+    return FastJSONResponse({"leilao_id": leilao_id, **totals})
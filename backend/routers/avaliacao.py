@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException
+from services.valuation import valuation_engine
+from utils.json_response import FastJSONResponse
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/avaliacao/comparaveis/{url:path}")
+async def get_comparables(url: str):
+    """
+    Estimativa de valor e imóveis comparáveis para a URL extraída.
+    """
+    try:
+        estimativa = await valuation_engine.estimate_url(url)
+    except Exception as e:
+        logger.error(f"Erro ao estimar valor por comparáveis para {url}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao buscar comparáveis")
+    if estimativa is None:
+        raise HTTPException(status_code=404, detail="Sem comparáveis para este imóvel")
+    return FastJSONResponse({"url": url, **estimativa})
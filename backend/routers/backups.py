@@ -0,0 +1,73 @@
+from fastapi import APIRouter, HTTPException, status
+from pydantic import BaseModel
+from app.models.base import PyObjectId
+from config import MongoDB
+from services.backup import (
+    COMPLETO, DIFERENCIAL, INCREMENTAL, create_backup, create_restore, run_backup, run_restore, start_in_background,
+)
+from utils.json_response import FastJSONResponse
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+class BackupRequest(BaseModel):
+    tipo: str = INCREMENTAL
+    retencao: int = 7
+
+class RestauracaoRequest(BaseModel):
+    local_destino: str = ""
+
+@router.post("/backups", status_code=status.HTTP_202_ACCEPTED)
+async def start_backup(payload: BackupRequest):
+    """
+    Inicia um backup em background e retorna o registro para acompanhamento.
+    """
+    if payload.tipo not in (COMPLETO, INCREMENTAL, DIFERENCIAL):
+        raise HTTPException(status_code=422, detail=f"Tipo de backup inválido: {payload.tipo}")
+    try:
+        backup = await create_backup(payload.tipo, payload.retencao)
+    except Exception as e:
+        logger.error(f"Erro ao criar backup: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao criar backup")
+    start_in_background(run_backup(backup))
+    return FastJSONResponse(backup, status_code=status.HTTP_202_ACCEPTED)
+
+@router.get("/backups/{backup_id}")
+async def get_backup(backup_id: PyObjectId):
+    """
+    Retorna o status, o tamanho e o progresso de um backup.
+    """
+    backup = await MongoDB.get_database().backups.find_one({"_id": backup_id})
+    if not backup:
+        raise HTTPException(status_code=404, detail="Backup não encontrado")
+    return FastJSONResponse(backup)
+
+@router.post("/backups/{backup_id}/restauracoes", status_code=status.HTTP_202_ACCEPTED)
+async def start_restore(backup_id: PyObjectId, payload: RestauracaoRequest):
+    """
+    Inicia a restauração de um backup concluído.
+    """
+    db = MongoDB.get_database()
+    backup = await db.backups.find_one({"_id": backup_id})
+    if not backup:
+        raise HTTPException(status_code=404, detail="Backup não encontrado")
+    if backup.get("status") != "concluido":
+        raise HTTPException(status_code=409, detail="Backup ainda não concluído")
+    try:
+        restauracao = await create_restore(backup, payload.local_destino)
+    except Exception as e:
+        logger.error(f"Erro ao criar restauração do backup {backup_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao criar restauração")
+    start_in_background(run_restore(restauracao))
+    return FastJSONResponse(restauracao, status_code=status.HTTP_202_ACCEPTED)
+
+@router.get("/restauracoes/{restauracao_id}")
+async def get_restore(restauracao_id: PyObjectId):
+    """
+    Retorna o status e o progresso de uma restauração.
+    """
+    restauracao = await MongoDB.get_database().restauracoes.find_one({"_id": restauracao_id})
+    if not restauracao:
+        raise HTTPException(status_code=404, detail="Restauração não encontrada")
+    return FastJSONResponse(restauracao)
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from config import MongoDB
+from services.document_pipeline import document_pipeline
+from utils.json_response import FastJSONResponse
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/documentos/{digest}/paginas")
+async def find_pages(digest: str, q: Optional[str] = None, lote: Optional[str] = None, texto: bool = False):
+    """
+    Localiza as páginas de um edital/matrícula que citam um lote ou contêm
+    os termos buscados, usando o texto já extraído (sem reler o PDF).
+    """
+    try:
+        db = MongoDB.get_database()
+        documento = await db.documentos.find_one({"_id": digest}, {"paginas": 1, "fontes": 1})
+        if documento is None:
+            raise HTTPException(status_code=404, detail="Documento não encontrado")
+
+        index = document_pipeline.index
+        paginas = list(range(1, (documento.get("paginas") or 0) + 1))
+        if lote:
+            citadas = set(await index.lot_pages(digest, lote))
+            paginas = [p for p in paginas if p in citadas]
+        if q:
+            encontradas = set(await index.search(digest, q))
+            paginas = [p for p in paginas if p in encontradas]
+
+        resultado = {"hash": digest, "fontes": documento.get("fontes", []), "paginas": paginas}
+        if texto and (lote or q):
+            cursor = db.documento_paginas.find(
+                {"hash": digest, "pagina": {"$in": paginas}}, {"_id": 0, "pagina": 1, "texto": 1}
+            ).sort("pagina", 1)
+            resultado["trechos"] = [p async for p in cursor]
+        return FastJSONResponse(resultado)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao buscar páginas do documento {digest}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao buscar páginas do documento")
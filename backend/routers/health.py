@@ -0,0 +1,32 @@
+from fastapi import APIRouter, status
+from config import MongoDB
+from services.warmup import WarmupState, is_ready
+from utils.json_response import FastJSONResponse
+
+router = APIRouter()
+
+@router.get("/health/live")
+async def liveness():
+    """
+    Indica que o processo está de pé e respondendo.
+    """
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness():
+    """
+    Indica se o worker pode receber tráfego: aquecimento concluído e
+    MongoDB acessível. Responde 503 enquanto não estiver pronto.
+    """
+    ready = is_ready()
+    return FastJSONResponse(
+        {
+            "status": "ready" if ready else "warming_up",
+            "mongodb": {
+                "connected": MongoDB.connected,
+                "indexes_ready": MongoDB.indexes_ready,
+            },
+            "warmup": WarmupState.as_dict(),
+        },
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
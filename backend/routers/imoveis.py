@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from services.property_search import search_properties
+from utils.json_response import FastJSONResponse
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/imoveis/busca")
+async def search(
+    cidade: Optional[str] = None,
+    estado: Optional[str] = None,
+    tipo: Optional[str] = None,
+    modalidade: Optional[str] = None,
+    preco_min: Optional[float] = None,
+    preco_max: Optional[float] = None,
+    quartos: Optional[int] = None,
+    vagas: Optional[int] = None,
+    desconto_min: Optional[float] = None,
+    area_min: Optional[float] = None,
+    aceita_financiamento: Optional[bool] = None,
+    aceita_fgts: Optional[bool] = None,
+    ordenar: str = "preco",
+    limite: int = 20,
+    cursor: Optional[str] = None,
+    facetas: bool = True,
+):
+    """
+    Busca imóveis extraídos com os mesmos filtros da tela de imóveis da
+    Caixa. Para a próxima página, repasse ``proximo_cursor`` em ``cursor``.
+    """
+    filtros = {
+        "cidade": cidade,
+        "estado": estado,
+        "tipo": tipo,
+        "modalidade": modalidade,
+        "preco_min": preco_min,
+        "preco_max": preco_max,
+        "quartos": quartos,
+        "vagas": vagas,
+        "desconto_min": desconto_min,
+        "area_min": area_min,
+        "aceita_financiamento": aceita_financiamento,
+        "aceita_fgts": aceita_fgts,
+    }
+    try:
+        resultado = await search_properties(filtros, ordenar, limite, cursor, facetas)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro ao buscar imóveis: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao buscar imóveis")
+    return FastJSONResponse(resultado)
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, File, HTTPException, UploadFile, status
+from pydantic import BaseModel
+from typing import List
+from app.models.base import PyObjectId
+from config import MongoDB
+from services.caixa_import import UFS, create_import, run_import, start_in_background
+from utils.json_response import FastJSONResponse
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+class ImportacaoCaixaRequest(BaseModel):
+    estados: List[str] = []
+    todos: bool = False
+
+def _spool_upload(upload: UploadFile) -> str:
+    fd, path = tempfile.mkstemp(prefix="caixa_upload_", suffix=".csv")
+    with os.fdopen(fd, "wb") as f:
+        shutil.copyfileobj(upload.file, f, length=1024 * 1024)
+    return path
+
+@router.post("/importacoes/caixa", status_code=status.HTTP_202_ACCEPTED)
+async def import_states(payload: ImportacaoCaixaRequest):
+    """
+    Baixa e importa as planilhas da Caixa das UFs pedidas (ou de todas).
+    """
+    estados = UFS if payload.todos else [uf.upper() for uf in payload.estados]
+    invalidos = [uf for uf in estados if uf not in UFS]
+    if not estados or invalidos:
+        raise HTTPException(status_code=422, detail=f"UFs inválidas: {invalidos or estados}")
+    try:
+        importacao = await create_import(estados)
+    except Exception as e:
+        logger.error(f"Erro ao criar importação: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao criar importação")
+    start_in_background(run_import(importacao))
+    return FastJSONResponse(importacao, status_code=status.HTTP_202_ACCEPTED)
+
+@router.post("/importacoes/caixa/arquivo", status_code=status.HTTP_202_ACCEPTED)
+async def import_file(arquivo: UploadFile = File(...)):
+    """
+    Importa uma planilha enviada. O arquivo é copiado em disco e lido em
+    blocos em background, sem carregar a planilha inteira na memória.
+    """
+    try:
+        path = await asyncio.to_thread(_spool_upload, arquivo)
+        importacao = await create_import([path], temporarios=[path])
+    except Exception as e:
+        logger.error(f"Erro ao receber planilha {arquivo.filename}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao receber planilha")
+    start_in_background(run_import(importacao))
+    return FastJSONResponse(importacao, status_code=status.HTTP_202_ACCEPTED)
+
+@router.get("/importacoes/{importacao_id}")
+async def get_import(importacao_id: PyObjectId):
+    """
+    Retorna o status e as contagens de uma importação.
+    """
+    importacao = await MongoDB.get_database().importacoes.find_one({"_id": importacao_id})
+    if not importacao:
+        raise HTTPException(status_code=404, detail="Importação não encontrada")
+    return FastJSONResponse(importacao)
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from app.models.base import PyObjectId
+from app.models.lance import LanceCreate
+from services.bid_book import bid_books
+from services.bid_engine import ACEITO, submit_bid
+from utils.json_response import FastJSONResponse
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.post("/lances")
+async def create_lance(lance: LanceCreate):
+    """
+    Registra um lance. Responde 201 quando aceito e 409 quando rejeitado,
+    com o motivo em "observacao".
+    """
+    try:
+        result = await submit_bid(lance)
+    except Exception as e:
+        logger.error(f"Erro ao processar lance no leilão {lance.leilao_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao processar lance")
+
+    return FastJSONResponse(
+        result.model_dump(mode="json", by_alias=True),
+        status_code=status.HTTP_201_CREATED if result.status == ACEITO else status.HTTP_409_CONFLICT,
+    )
+
+@router.get("/leiloes/{leilao_id}/ranking")
+async def get_ranking(leilao_id: PyObjectId, k: int = Query(10, ge=1, le=100)):
+    """
+    Retorna os k maiores lances aceitos do leilão.
+    """
+    try:
+        book = await bid_books.get(leilao_id)
+    except Exception as e:
+        logger.error(f"Erro ao buscar ranking do leilão {leilao_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao buscar ranking")
+    return FastJSONResponse({
+        "leilao_id": leilao_id,
+        "total_lances": len(book),
+        "participantes": book.participantes,
+        "lances": book.top_k(k),
+    })
+
+@router.get("/leiloes/{leilao_id}/ranking/{usuario_id}")
+async def get_user_rank(leilao_id: PyObjectId, usuario_id: PyObjectId):
+    """
+    Retorna a posição do usuário no leilão, pelo seu maior lance.
+    """
+    try:
+        book = await bid_books.get(leilao_id)
+    except Exception as e:
+        logger.error(f"Erro ao buscar ranking do leilão {leilao_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao buscar ranking")
+    posicao = book.rank(usuario_id)
+    if posicao is None:
+        raise HTTPException(status_code=404, detail="Usuário sem lances neste leilão")
+    return FastJSONResponse({
+        "leilao_id": leilao_id,
+        "usuario_id": usuario_id,
+        "posicao": posicao,
+        "maior_lance": book.melhor_por_usuario[usuario_id],
+        "participantes": book.participantes,
+    })
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from bson import ObjectId
+from datetime import datetime
+from typing import List
+from services.live_feed import Subscriber, live_feed
+from utils.json_response import dumps
+import asyncio
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+def _valid_ids(ids) -> List[str]:
+    if not isinstance(ids, list):
+        return []
+    return [i for i in ids if isinstance(i, str) and ObjectId.is_valid(i)]
+
+async def _receive_commands(websocket: WebSocket, subscriber: Subscriber) -> None:
+    """
+    Processa mensagens {"subscribe": [...]} e {"unsubscribe": [...]} do cliente.
+    """
+    while True:
+        message = await websocket.receive_json()
+        if not isinstance(message, dict):
+            continue
+        if "subscribe" in message:
+            live_feed.subscribe(subscriber, _valid_ids(message["subscribe"]))
+        if "unsubscribe" in message:
+            live_feed.unsubscribe(subscriber, _valid_ids(message["unsubscribe"]))
+
+@router.websocket("/ws/leiloes")
+async def live_auction_feed(websocket: WebSocket, leilao_id: List[str] = Query([])):
+    """
+    Feed ao vivo dos leilões: lances aceitos e mudanças de status.
+
+    As mensagens são arrays JSON com os eventos acumulados desde o último
+    envio. A primeira mensagem traz o horário do servidor para o cliente
+    sincronizar a contagem regressiva.
+    """
+    await websocket.accept()
+    subscriber = Subscriber(websocket)
+    leiloes = _valid_ids(leilao_id)
+    live_feed.subscribe(subscriber, leiloes)
+    await websocket.send_text(dumps({"tipo": "inscrito", "leiloes": leiloes, "agora": datetime.utcnow()}).decode())
+
+    sender = asyncio.create_task(subscriber.run())
+    receiver = asyncio.create_task(_receive_commands(websocket, subscriber))
+    try:
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, WebSocketDisconnect):
+                logger.error(f"Erro no feed ao vivo: {str(error)}", exc_info=error)
+    finally:
+        live_feed.unsubscribe(subscriber)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks
 from typing import Optional, Dict, Any
 from models.pre_analysis_log import PreAnalysisLog, PreAnalysisLogCreate
 from services.analysis_service import analyze_property
+from services.shutdown import coordinator, REQUEUED_STATUS
 from utils.pre_analysis_logger import save_pre_analysis
 import logging
 
@@ -29,6 +30,10 @@ async def create_pre_analysis(url: str, background_tasks: BackgroundTasks) -> Di
     Inicia uma nova análise prévia para uma URL.
     A análise é executada em background.
     """
+    if not coordinator.accepting:
+        # Worker em desligamento: o cliente deve tentar outro worker
+        raise HTTPException(status_code=503, detail="Servidor em desligamento, tente novamente")
+
     try:
         # Verifica se já existe uma análise
         existing_analysis = await PreAnalysisLog.find_one({"url": url})
@@ -49,7 +54,7 @@ async def create_pre_analysis(url: str, background_tasks: BackgroundTasks) -> Di
         saved_analysis = await analysis.save()
         
         # Inicia a análise em background
-        background_tasks.add_task(analyze_property, url)
+        background_tasks.add_task(coordinator.run, url, analyze_property)
         
         return {
             "message": "Análise iniciada",
@@ -79,7 +84,7 @@ async def get_analysis_results(url: str) -> Dict[str, Any]:
                 "result": None
             }
             
-        if analysis.status == "pending":
+        if analysis.status in ("pending", REQUEUED_STATUS):
             return {
                 "status": "pending",
                 "message": "Análise em andamento"
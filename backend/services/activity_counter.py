@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import os
+import random
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.models.atividade import AtividadeInDB
+from config import MongoDB
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "5"))
+ACTIVITY_COUNTER_SHARDS = int(os.getenv("ACTIVITY_COUNTER_SHARDS", "8"))
+ACTIVITY_SAMPLE_RATE = float(os.getenv("ACTIVITY_SAMPLE_RATE", "0.01"))
+
+# tipo de atividade -> campo do contador
+COUNTER_FIELDS = {
+    "visualizacao": "total_visualizacoes",
+    "favorito": "total_favoritos",
+    "compartilhamento": "total_compartilhamentos",
+}
+
+def _hour(now: datetime) -> datetime:
+    return now.replace(minute=0, second=0, microsecond=0)
+
+class ActivityAggregator:
+    """
+    Acumula em memória as atividades dos leilões e grava em lote.
+
+    Os contadores ficam em ``contadores_leilao``, divididos em shards, e
+    não no documento do leilão: visualizações não disputam o documento
+    com o findOneAndUpdate dos lances. Cada processo escreve sempre no
+    mesmo shard, com um bulk_write de $inc por intervalo. As atividades
+    individuais viram totais por hora em ``atividades_horarias``, e só
+    uma amostra é gravada em ``atividades``.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = ACTIVITY_FLUSH_INTERVAL,
+        shards: int = ACTIVITY_COUNTER_SHARDS,
+        sample_rate: float = ACTIVITY_SAMPLE_RATE,
+    ):
+        self.flush_interval = flush_interval
+        self.shard = random.randrange(max(shards, 1))
+        self.sample_rate = sample_rate
+        self._counts: Dict[Tuple[ObjectId, str], int] = {}
+        self._hourly: Dict[Tuple[ObjectId, str, datetime], int] = {}
+        self._samples: List[Dict] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def record(
+        self,
+        leilao_id: ObjectId,
+        tipo: str,
+        usuario_id: Optional[ObjectId] = None,
+        ip: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ) -> None:
+        """
+        Registra uma atividade sem acessar o banco.
+        """
+        if tipo not in COUNTER_FIELDS:
+            raise ValueError(f"Tipo de atividade inválido: {tipo}")
+        now = now or datetime.utcnow()
+        key = (leilao_id, tipo)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        hourly_key = (leilao_id, tipo, _hour(now))
+        self._hourly[hourly_key] = self._hourly.get(hourly_key, 0) + 1
+
+        if usuario_id is not None and random.random() < self.sample_rate:
+            self._samples.append(AtividadeInDB(
+                usuario_id=usuario_id,
+                tipo=tipo,
+                modulo="leilao",
+                item_id=leilao_id,
+                criado_em=now,
+                ip=ip,
+                user_agent=user_agent,
+                metadata={"amostra": self.sample_rate},
+            ).model_dump(by_alias=True))
+
+    @property
+    def pending(self) -> int:
+        return sum(self._counts.values())
+
+    def _counter_ops(self, counts: Dict[Tuple[ObjectId, str], int]) -> List[UpdateOne]:
+        por_leilao: Dict[ObjectId, Dict[str, int]] = {}
+        for (leilao_id, tipo), total in counts.items():
+            por_leilao.setdefault(leilao_id, {})[COUNTER_FIELDS[tipo]] = total
+        return [
+            UpdateOne(
+                {"_id": f"{leilao_id}:{self.shard}"},
+                {"$inc": incs, "$setOnInsert": {"leilao_id": leilao_id, "shard": self.shard}},
+                upsert=True,
+            )
+            for leilao_id, incs in por_leilao.items()
+        ]
+
+    def _hourly_ops(self, hourly: Dict[Tuple[ObjectId, str, datetime], int]) -> List[UpdateOne]:
+        return [
+            UpdateOne(
+                {"_id": f"{leilao_id}:{tipo}:{hora:%Y%m%d%H}"},
+                {
+                    "$inc": {"total": total},
+                    "$setOnInsert": {"modulo": "leilao", "item_id": leilao_id, "tipo": tipo, "hora": hora},
+                },
+                upsert=True,
+            )
+            for (leilao_id, tipo, hora), total in hourly.items()
+        ]
+
+    def _restore(self, counts: Dict, hourly: Dict) -> None:
+        for key, total in counts.items():
+            self._counts[key] = self._counts.get(key, 0) + total
+        for key, total in hourly.items():
+            self._hourly[key] = self._hourly.get(key, 0) + total
+
+    async def flush(self) -> None:
+        """
+        Grava os incrementos acumulados; em caso de erro eles voltam ao buffer.
+        """
+        counts, self._counts = self._counts, {}
+        hourly, self._hourly = self._hourly, {}
+        samples, self._samples = self._samples, []
+        if not counts and not samples:
+            return
+
+        try:
+            db = MongoDB.get_database()
+            if counts:
+                await db.contadores_leilao.bulk_write(self._counter_ops(counts), ordered=False)
+        except Exception as e:
+            logger.error(f"Erro ao gravar contadores de atividade: {str(e)}", exc_info=True)
+            self._restore(counts, hourly)
+            return
+        try:
+            if hourly:
+                await db.atividades_horarias.bulk_write(self._hourly_ops(hourly), ordered=False)
+            if samples:
+                await db.atividades.insert_many(samples, ordered=False)
+        except Exception as e:
+            # Os contadores já foram gravados; perder parte do histórico é aceitável
+            logger.error(f"Erro ao gravar histórico de atividades: {str(e)}", exc_info=True)
+
+    async def totals(self, leilao_id: ObjectId) -> Dict[str, int]:
+        """
+        Soma os shards gravados e os incrementos ainda em memória.
+        """
+        totals = {campo: 0 for campo in COUNTER_FIELDS.values()}
+        db = MongoDB.get_database()
+        async for shard in db.contadores_leilao.find({"leilao_id": leilao_id}):
+            for campo in totals:
+                totals[campo] += shard.get(campo, 0)
+        for (pending_id, tipo), total in self._counts.items():
+            if pending_id == leilao_id:
+                totals[COUNTER_FIELDS[tipo]] += total
+        return totals
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Erro no agregador de atividades: {str(e)}", exc_info=True)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+activity_counter = ActivityAggregator()
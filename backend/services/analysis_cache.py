@@ -0,0 +1,50 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "1000"))
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "60"))
+
+class AnalysisCache:
+    """
+    Cache LRU em memória dos resultados de extração, por URL.
+
+    O TTL limita o tempo que um worker pode servir um resultado antigo
+    quando outro worker recebe um callback novo para a mesma URL.
+    """
+
+    def __init__(self, max_size: int = ANALYSIS_CACHE_SIZE, ttl: float = ANALYSIS_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        item = self._items.get(url)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._items[url]
+            return None
+        self._items.move_to_end(url)
+        return value
+
+    def put(self, url: str, value: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        self._items[url] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(url)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def invalidate(self, url: str) -> None:
+        self._items.pop(url, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+analysis_cache = AnalysisCache()
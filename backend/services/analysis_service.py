@@ -1,40 +1,54 @@
 import logging
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 from typing import Dict, Any, Optional
 from utils.pre_analysis_logger import save_pre_analysis
+from utils.normalization import normalized_fields
+from services.domain_reputation import assess_domain
+from services.page_fingerprint import clone_detector
+from services.page_fetch import fetch_page, store_extraction
+from services.recrawl import recrawl_scheduler
+from services.valuation import valuation_engine
 
 logger = logging.getLogger(__name__)
 
-# Headers para simular um navegador
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-    'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
-    'Accept-Encoding': 'gzip, deflate, br',
-    'Connection': 'keep-alive',
-    'Upgrade-Insecure-Requests': '1',
-    'Sec-Fetch-Dest': 'document',
-    'Sec-Fetch-Mode': 'navigate',
-    'Sec-Fetch-Site': 'none',
-    'Sec-Fetch-User': '?1'
-}
-
-async def analyze_property(url: str) -> None:
+async def analyze_property(url: str, user_agent: Optional[str] = None) -> None:
     """
     Analisa uma propriedade a partir da URL fornecida.
     Esta função é executada em background.
     """
+    # Bibliotecas de scraping são carregadas na primeira análise, não no boot
+    import httpx
+
     try:
         logger.info(f"Iniciando análise da propriedade: {url}")
         
-        # Faz o scraping da página
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
+        # Busca condicional: página inalterada reaproveita a extração guardada
+        page = await fetch_page(url, user_agent=user_agent)
+        if page.unchanged:
+            extracted_data = dict(page.extracao)
+        else:
+            # Extrai os dados básicos
+            extracted_data = await extract_basic_data(page.text, url)
+            
+            # Página quase idêntica à de um leiloeiro confiável em outro domínio
+            try:
+                extracted_data["clone_suspeito"] = await clone_detector.check(url, page.text)
+            except Exception as e:
+                logger.warning(f"Erro ao comparar assinatura da página {url}: {str(e)}")
+            
+            try:
+                await store_extraction(page, extracted_data)
+            except Exception as e:
+                logger.warning(f"Erro ao guardar extração de {url}: {str(e)}")
         
-        # Extrai os dados básicos
-        extracted_data = await extract_basic_data(response.text, url)
+        # Reputação do domínio, incluindo imitações de leiloeiros conhecidos
+        extracted_data["dominio"] = assess_domain(urlparse(url).hostname or "")
+        
+        # Estimativa por comparáveis, quando já há extração completa da URL
+        try:
+            extracted_data["estimativa_comparaveis"] = await valuation_engine.estimate_url(url)
+        except Exception as e:
+            logger.warning(f"Erro ao estimar valor por comparáveis para {url}: {str(e)}")
         
         # Salva o resultado
         await save_pre_analysis(
@@ -44,9 +58,21 @@ async def analyze_property(url: str) -> None:
             error=None
         )
         
+        # Passa a acompanhar mudanças de preço, data e status do lote
+        try:
+            await recrawl_scheduler.track(
+                url,
+                extracted_data,
+                etag=page.etag,
+                last_modified=page.last_modified,
+                hash_conteudo=page.hash,
+            )
+        except Exception as e:
+            logger.warning(f"Erro ao registrar monitoramento de {url}: {str(e)}")
+        
         logger.info(f"Análise concluída com sucesso para URL: {url}")
         
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Erro ao acessar URL {url}: {str(e)}")
         await save_pre_analysis(
             url=url,
@@ -67,6 +93,8 @@ async def extract_basic_data(html: str, url: str) -> Dict[str, Any]:
     """
     Extrai dados básicos de uma página de leilão de imóveis.
     """
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, 'html.parser')
     domain = urlparse(url).netloc
     
@@ -133,12 +161,15 @@ async def extract_basic_data(html: str, url: str) -> Dict[str, Any]:
     if not titulo and soup.title:
         titulo = soup.title.text.strip()
     
-    return {
+    result = {
         "titulo": titulo,
         "valor_minimo": valor_minimo,
         "imagem": imagem,
         "data_leilao": data_leilao
     }
+    # Valores numéricos para filtros por faixa de preço e data
+    result.update(normalized_fields(result))
+    return result
 
 def extract_value_minimo(text: str) -> Optional[str]:
     """
@@ -0,0 +1,232 @@
+import asyncio
+import heapq
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from config import MongoDB
+from services.bid_book import bid_books
+from services.bid_engine import bid_sequencer
+from services.live_feed import live_feed
+from services.notifications import LEILAO_ENCERRADO, format_brl, notify_users
+
+logger = logging.getLogger(__name__)
+
+AUCTION_SCHEDULER_ENABLED = os.getenv("AUCTION_SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_HORIZON = float(os.getenv("SCHEDULER_HORIZON", "300"))
+SCHEDULER_RELOAD_INTERVAL = float(os.getenv("SCHEDULER_RELOAD_INTERVAL", "60"))
+SCHEDULER_LEASE_TTL = float(os.getenv("SCHEDULER_LEASE_TTL", "30"))
+
+ABRIR = "abrir"
+ENCERRAR = "encerrar"
+
+# transição -> (status de origem aceitos, status de destino, campo de data)
+TRANSITIONS = {
+    ABRIR: (["pendente"], "em_andamento", "data_inicio"),
+    ENCERRAR: (["pendente", "em_andamento"], "finalizado", "data_fim"),
+}
+
+Listener = Callable[[ObjectId, str, str], Awaitable[None]]
+
+class AuctionScheduler:
+    """
+    Agenda a abertura e o encerramento dos leilões em data_inicio/data_fim.
+
+    Só os eventos do próximo horizonte ficam em memória, num heap ordenado
+    pelo prazo; o laço dorme até o próximo prazo (ou até um evento novo
+    mais cedo) e recarrega o horizonte periodicamente. Entre nós, cada
+    evento é disparado por quem conseguir o lease no MongoDB, e a própria
+    transição é condicional ao status atual.
+    """
+
+    def __init__(
+        self,
+        horizon: float = SCHEDULER_HORIZON,
+        reload_interval: float = SCHEDULER_RELOAD_INTERVAL,
+        lease_ttl: float = SCHEDULER_LEASE_TTL,
+        node_id: Optional[str] = None,
+    ):
+        self.horizon = horizon
+        self.reload_interval = reload_interval
+        self.lease_ttl = lease_ttl
+        self.node_id = node_id or f"{socket.gethostname()}:{uuid.uuid4().hex[:8]}"
+        self._heap: List[Tuple[datetime, int, ObjectId, str]] = []
+        self._scheduled: Set[Tuple[ObjectId, str, datetime]] = set()
+        self._seq = 0
+        self._listeners: List[Listener] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._next_reload: Optional[datetime] = None
+
+    def add_listener(self, listener: Listener) -> None:
+        """
+        Registra uma rotina chamada após cada transição (leilao_id, transição, status).
+        """
+        self._listeners.append(listener)
+
+    def schedule(self, leilao_id: ObjectId, when: datetime, transition: str) -> None:
+        """
+        Agenda um evento; eventos além do horizonte são carregados depois.
+        """
+        key = (leilao_id, transition, when)
+        if key in self._scheduled:
+            return
+        self._scheduled.add(key)
+        self._seq += 1
+        heapq.heappush(self._heap, (when, self._seq, leilao_id, transition))
+        self._wakeup.set()
+
+    async def load_horizon(self, now: Optional[datetime] = None) -> int:
+        """
+        Carrega do MongoDB os eventos com prazo até agora + horizonte.
+        """
+        now = now or datetime.utcnow()
+        limite = now + timedelta(seconds=self.horizon)
+        db = MongoDB.get_database()
+        total = 0
+        for transition, (origens, _, campo) in TRANSITIONS.items():
+            cursor = db.leiloes.find(
+                {"status": {"$in": origens}, "ativo": True, campo: {"$lte": limite}},
+                {campo: 1},
+            ).sort(campo, 1)
+            async for leilao in cursor:
+                self.schedule(leilao["_id"], leilao[campo], transition)
+                total += 1
+        self._next_reload = now + timedelta(seconds=self.reload_interval)
+        return total
+
+    async def _acquire_lease(self, key: str, now: datetime) -> bool:
+        db = MongoDB.get_database()
+        try:
+            await db.scheduler_leases.update_one(
+                {"_id": key, "expires_at": {"$lt": now}},
+                {"$set": {"owner": self.node_id, "expires_at": now + timedelta(seconds=self.lease_ttl)}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            # Outro nó detém um lease válido para este evento
+            return False
+
+    async def fire(self, leilao_id: ObjectId, transition: str, when: datetime, now: Optional[datetime] = None) -> bool:
+        """
+        Dispara a transição se este nó obtiver o lease do evento.
+        """
+        now = now or datetime.utcnow()
+        origens, destino, campo = TRANSITIONS[transition]
+        key = f"{leilao_id}:{transition}:{when.isoformat()}"
+        if not await self._acquire_lease(key, now):
+            return False
+
+        db = MongoDB.get_database()
+        result = await db.leiloes.update_one(
+            {"_id": leilao_id, "status": {"$in": origens}, campo: {"$lte": now}},
+            {"$set": {"status": destino, "atualizado_em": now}},
+        )
+        if not result.modified_count:
+            return False
+
+        logger.info(f"Leilão {leilao_id}: {transition} -> {destino} (atraso {(now - when).total_seconds():.3f}s)")
+        for listener in self._listeners:
+            try:
+                await listener(leilao_id, transition, destino)
+            except Exception as e:
+                logger.error(f"Erro no listener do agendador para o leilão {leilao_id}: {str(e)}", exc_info=True)
+        return True
+
+    async def run_due(self, now: Optional[datetime] = None) -> List[Tuple[ObjectId, str]]:
+        """
+        Dispara todos os eventos com prazo vencido.
+        """
+        now = now or datetime.utcnow()
+        fired = []
+        while self._heap and self._heap[0][0] <= now:
+            when, _, leilao_id, transition = heapq.heappop(self._heap)
+            self._scheduled.discard((leilao_id, transition, when))
+            try:
+                if await self.fire(leilao_id, transition, when, now):
+                    fired.append((leilao_id, transition))
+            except Exception as e:
+                logger.error(f"Erro ao disparar {transition} do leilão {leilao_id}: {str(e)}", exc_info=True)
+        return fired
+
+    def _seconds_until_next(self, now: datetime) -> float:
+        deadlines = [self._next_reload] if self._next_reload else []
+        if self._heap:
+            deadlines.append(self._heap[0][0])
+        if not deadlines:
+            return self.reload_interval
+        return max((min(deadlines) - now).total_seconds(), 0.0)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                now = datetime.utcnow()
+                if self._next_reload is None or now >= self._next_reload:
+                    await self.load_horizon(now)
+                await self.run_due(now)
+                self._wakeup.clear()
+                delay = self._seconds_until_next(datetime.utcnow())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro no agendador de leilões: {str(e)}", exc_info=True)
+                self._next_reload = datetime.utcnow() + timedelta(seconds=self.reload_interval)
+                await asyncio.sleep(1)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"Agendador de leilões iniciado no nó {self.node_id}")
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+async def release_closed_auction(leilao_id: ObjectId, transition: str, status: str) -> None:
+    """
+    Libera o livro de lances e o estado do sequenciador de um leilão encerrado.
+    """
+    if transition == ENCERRAR:
+        bid_books.evict(leilao_id)
+        bid_sequencer.forget(leilao_id)
+
+async def publish_status_change(leilao_id: ObjectId, transition: str, status: str) -> None:
+    """
+    Avisa os clientes do feed ao vivo sobre a mudança de status.
+    """
+    await live_feed.publish(leilao_id, "status", {"status": status})
+
+async def notify_closed_auction(leilao_id: ObjectId, transition: str, status: str) -> None:
+    """
+    Avisa os participantes (quem teve lance aceito) do encerramento.
+    """
+    if transition != ENCERRAR:
+        return
+    db = MongoDB.get_database()
+    leilao = await db.leiloes.find_one({"_id": leilao_id}, {"titulo": 1, "valor_atual": 1}) or {}
+    participantes = await db.lances.distinct("usuario_id", {"leilao_id": leilao_id, "status": "aceito"})
+    await notify_users(
+        LEILAO_ENCERRADO,
+        participantes,
+        {"leilao": leilao.get("titulo") or str(leilao_id), "valor": format_brl(leilao.get("valor_atual") or 0)},
+        tipo="leilao",
+        leilao_id=leilao_id,
+    )
+
+auction_scheduler = AuctionScheduler()
+auction_scheduler.add_listener(release_closed_auction)
+auction_scheduler.add_listener(publish_status_change)
+auction_scheduler.add_listener(notify_closed_auction)
@@ -0,0 +1,345 @@
+import argparse
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import bson
+from bson import json_util
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import ReadPreference, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from app.models.backup import BackupInDB
+from app.models.restauracao import RestauracaoInDB
+from config import MongoDB
+
+logger = logging.getLogger(__name__)
+
+BACKUP_DIR = os.getenv("BACKUP_DIR", str(Path(__file__).resolve().parent.parent / "backups"))
+BACKUP_COLLECTIONS = [
+    c.strip()
+    for c in os.getenv("BACKUP_COLLECTIONS", "extraction_results,url_logs,pre_analysis_logs,leiloes,lances").split(",")
+    if c.strip()
+]
+BACKUP_CHUNK_DOCS = int(os.getenv("BACKUP_CHUNK_DOCS", "5000"))
+BACKUP_RESTORE_CONCURRENCY = int(os.getenv("BACKUP_RESTORE_CONCURRENCY", "4"))
+
+COMPLETO = "completo"
+INCREMENTAL = "incremental"
+DIFERENCIAL = "diferencial"
+
+MANIFEST = "manifest.json"
+
+# Coleções atualizadas no lugar usam um campo de data como marca d'água,
+# gravado em toda escrita; as demais só recebem inserções e usam o _id.
+WATERMARK_FIELDS = {
+    "pre_analysis_logs": "updated_at",
+    "extraction_results": "atualizado_em",
+    "leiloes": "atualizado_em",
+}
+
+RAW_CODEC = CodecOptions(document_class=RawBSONDocument)
+DUPLICATE_KEY = 11000
+
+_tasks: Set[asyncio.Task] = set()
+
+def _encode(doc) -> bytes:
+    raw = getattr(doc, "raw", None)
+    return raw if raw is not None else bson.encode(doc)
+
+def _write_chunk(path: Path, docs: List[bytes]) -> Dict[str, Any]:
+    """
+    Comprime e grava um bloco de documentos BSON; roda fora do event loop.
+    """
+    data = gzip.compress(b"".join(docs), compresslevel=6)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return {"arquivo": path.name, "sha256": hashlib.sha256(data).hexdigest(), "documentos": len(docs), "bytes": len(data)}
+
+def _read_chunk(path: Path, sha256: str) -> List[RawBSONDocument]:
+    data = path.read_bytes()
+    if hashlib.sha256(data).hexdigest() != sha256:
+        raise ValueError(f"Checksum inválido no bloco {path}")
+    return bson.decode_all(gzip.decompress(data), RAW_CODEC)
+
+def _write_manifest(root: Path, manifest: Dict[str, Any]) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    (root / MANIFEST).write_text(json_util.dumps(manifest, indent=2))
+
+def load_manifest(root: Path) -> Dict[str, Any]:
+    return json_util.loads((Path(root) / MANIFEST).read_text())
+
+async def _find_base(db, tipo: str) -> Optional[Dict]:
+    """
+    Backup de referência: o último concluído (incremental) ou o último completo (diferencial).
+    """
+    if tipo == COMPLETO:
+        return None
+    query = {"status": "concluido"}
+    if tipo == DIFERENCIAL:
+        query["tipo"] = COMPLETO
+    return await db.backups.find_one(query, sort=[("concluido_em", -1)])
+
+async def _dump_collection(db, backup_id, root: Path, name: str, since: Any, tamanho: int) -> Dict[str, Any]:
+    field = WATERMARK_FIELDS.get(name, "_id")
+    collection = db.get_collection(
+        name, codec_options=RAW_CODEC, read_preference=ReadPreference.SECONDARY_PREFERRED
+    )
+    query = {field: {"$gt": since}} if since is not None else {}
+    sort = [(field, 1)] if field == "_id" else [(field, 1), ("_id", 1)]
+
+    chunks: List[Dict[str, Any]] = []
+    buffer: List[bytes] = []
+    watermark = since
+    documentos = 0
+
+    async def flush():
+        nonlocal buffer, tamanho
+        path = root / name / f"{len(chunks):06d}.bson.gz"
+        chunk = await asyncio.to_thread(_write_chunk, path, buffer)
+        chunks.append(chunk)
+        tamanho += chunk["bytes"]
+        buffer = []
+        await db.backups.update_one(
+            {"_id": backup_id},
+            {"$set": {
+                f"metadata.progresso.{name}": documentos,
+                "tamanho": tamanho,
+                "atualizado_em": datetime.utcnow(),
+            }},
+        )
+
+    async for doc in collection.find(query, sort=sort, batch_size=min(BACKUP_CHUNK_DOCS, 1000)):
+        buffer.append(_encode(doc))
+        documentos += 1
+        value = doc.get(field)
+        if value is not None:
+            watermark = value
+        if len(buffer) >= BACKUP_CHUNK_DOCS:
+            await flush()
+    if buffer:
+        await flush()
+
+    logger.info(f"Backup {backup_id}: {name} com {documentos} documentos em {len(chunks)} blocos")
+    return {"campo": field, "watermark": watermark, "documentos": documentos, "chunks": chunks, "tamanho": tamanho}
+
+async def run_backup(backup: Dict[str, Any], collections: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Executa um backup em blocos BSON comprimidos, coleção a coleção, em ordem
+    de _id (ou da marca d'água). A memória fica limitada a um bloco por vez.
+
+    Backups incrementais e diferenciais só copiam o que passou da marca
+    d'água do backup de referência.
+    """
+    db = MongoDB.get_database()
+    backup_id = backup["_id"]
+    root = Path(backup["local"])
+    base = await _find_base(db, backup["tipo"])
+    base_colecoes = (base or {}).get("metadata", {}).get("colecoes", {})
+
+    now = datetime.utcnow()
+    await db.backups.update_one(
+        {"_id": backup_id},
+        {"$set": {
+            "status": "em_andamento",
+            "iniciado_em": now,
+            "atualizado_em": now,
+            "metadata.base_id": base["_id"] if base else None,
+        }},
+    )
+
+    manifest: Dict[str, Any] = {
+        "backup_id": backup_id,
+        "tipo": backup["tipo"],
+        "base": base["local"] if base else None,
+        "criado_em": now,
+        "colecoes": {},
+    }
+    tamanho = 0
+    try:
+        for name in collections or BACKUP_COLLECTIONS:
+            anterior = base_colecoes.get(name, {})
+            # Marca d'água de outro campo (base anterior à troca) não serve
+            # de ponto de partida: a coleção é copiada inteira
+            since = anterior.get("watermark") if anterior.get("campo", "_id") == WATERMARK_FIELDS.get(name, "_id") else None
+            entry = await _dump_collection(db, backup_id, root, name, since, tamanho)
+            tamanho = entry.pop("tamanho")
+            manifest["colecoes"][name] = entry
+        await asyncio.to_thread(_write_manifest, root, manifest)
+
+        resumo = {
+            name: {"campo": e["campo"], "watermark": e["watermark"], "documentos": e["documentos"]}
+            for name, e in manifest["colecoes"].items()
+        }
+        await db.backups.update_one(
+            {"_id": backup_id},
+            {"$set": {
+                "status": "concluido",
+                "tamanho": tamanho,
+                "concluido_em": datetime.utcnow(),
+                "atualizado_em": datetime.utcnow(),
+                "metadata.colecoes": resumo,
+            }},
+        )
+        logger.info(f"Backup {backup_id} ({backup['tipo']}) concluído: {tamanho} bytes")
+        return manifest
+    except Exception as e:
+        logger.error(f"Erro no backup {backup_id}: {str(e)}", exc_info=True)
+        await db.backups.update_one(
+            {"_id": backup_id},
+            {"$set": {"status": "erro", "erro": str(e), "atualizado_em": datetime.utcnow()}},
+        )
+        raise
+
+def _load_chain(root: Path) -> List[Dict[str, Any]]:
+    """
+    Manifestos do backup e das suas bases, do completo até o pedido.
+    """
+    chain = []
+    current: Optional[Path] = Path(root)
+    while current is not None:
+        manifest = load_manifest(current)
+        manifest["_root"] = current
+        chain.append(manifest)
+        current = Path(manifest["base"]) if manifest.get("base") else None
+    return list(reversed(chain))
+
+async def _restore_chunk(target, name: str, path: Path, sha256: str) -> int:
+    docs = await asyncio.to_thread(_read_chunk, path, sha256)
+    if not docs:
+        return 0
+    collection = target.get_collection(name)
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != DUPLICATE_KEY for err in errors):
+            raise
+        # Documentos já existentes vêm de backups incrementais: substitui pela versão mais nova
+        await collection.bulk_write(
+            [ReplaceOne({"_id": docs[err["index"]]["_id"]}, docs[err["index"]], upsert=True) for err in errors],
+            ordered=False,
+        )
+    return len(docs)
+
+async def run_restore(restauracao: Dict[str, Any], concurrency: int = BACKUP_RESTORE_CONCURRENCY) -> int:
+    """
+    Restaura um backup (e a cadeia de backups em que ele se apoia).
+
+    Os blocos de cada backup são restaurados em paralelo com insert_many
+    não ordenado; os backups da cadeia são aplicados em ordem.
+    """
+    db = MongoDB.get_database()
+    restauracao_id = restauracao["_id"]
+    target = MongoDB.client[restauracao["local_destino"]] if restauracao.get("local_destino") else db
+    semaphore = asyncio.Semaphore(concurrency)
+    restaurados = {"blocos": 0, "documentos": 0}
+
+    async def restore(name: str, path: Path, sha256: str) -> None:
+        async with semaphore:
+            documentos = await _restore_chunk(target, name, path, sha256)
+            restaurados["documentos"] += documentos
+            restaurados["blocos"] += 1
+            await db.restauracoes.update_one(
+                {"_id": restauracao_id},
+                {"$set": {"metadata.progresso": dict(restaurados, total_blocos=total), "atualizado_em": datetime.utcnow()}},
+            )
+
+    now = datetime.utcnow()
+    await db.restauracoes.update_one(
+        {"_id": restauracao_id},
+        {"$set": {"status": "em_andamento", "iniciado_em": now, "atualizado_em": now}},
+    )
+    try:
+        chain = await asyncio.to_thread(_load_chain, Path(restauracao["local_origem"]))
+        total = sum(len(c["chunks"]) for m in chain for c in m["colecoes"].values())
+        for manifest in chain:
+            await asyncio.gather(*(
+                restore(name, manifest["_root"] / name / chunk["arquivo"], chunk["sha256"])
+                for name, colecao in manifest["colecoes"].items()
+                for chunk in colecao["chunks"]
+            ))
+        await db.restauracoes.update_one(
+            {"_id": restauracao_id},
+            {"$set": {"status": "concluido", "concluido_em": datetime.utcnow(), "atualizado_em": datetime.utcnow()}},
+        )
+        logger.info(f"Restauração {restauracao_id} concluída: {restaurados['documentos']} documentos")
+        return restaurados["documentos"]
+    except Exception as e:
+        logger.error(f"Erro na restauração {restauracao_id}: {str(e)}", exc_info=True)
+        await db.restauracoes.update_one(
+            {"_id": restauracao_id},
+            {"$set": {"status": "erro", "erro": str(e), "atualizado_em": datetime.utcnow()}},
+        )
+        raise
+
+async def create_backup(tipo: str, retencao: int = 7, usuario_id=None) -> Dict[str, Any]:
+    """
+    Registra um backup pendente em ``backups``.
+    """
+    backup = BackupInDB(tipo=tipo, local="", retencao=retencao, usuario_id=usuario_id, metadata={})
+    backup.local = str(Path(BACKUP_DIR) / str(backup.id))
+    doc = backup.model_dump(by_alias=True)
+    await MongoDB.get_database().backups.insert_one(doc)
+    return doc
+
+async def create_restore(backup: Dict[str, Any], local_destino: str = "", usuario_id=None) -> Dict[str, Any]:
+    """
+    Registra uma restauração pendente em ``restauracoes``.
+    """
+    doc = RestauracaoInDB(
+        backup_id=backup["_id"],
+        local_origem=backup["local"],
+        local_destino=local_destino,
+        usuario_id=usuario_id,
+        metadata={},
+    ).model_dump(by_alias=True)
+    await MongoDB.get_database().restauracoes.insert_one(doc)
+    return doc
+
+def start_in_background(coro) -> asyncio.Task:
+    """
+    Executa um backup/restauração fora do ciclo da requisição.
+    """
+    task = asyncio.create_task(coro)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+async def _main(args: argparse.Namespace) -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    await MongoDB.connect_to_database(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    try:
+        if args.command == "backup":
+            backup = await create_backup(args.tipo, args.retencao)
+            await run_backup(backup, args.colecoes)
+            print(f"Backup {backup['_id']} gravado em {backup['local']}")
+        else:
+            backup = await MongoDB.get_database().backups.find_one({"_id": bson.ObjectId(args.backup_id)})
+            if not backup:
+                raise SystemExit(f"Backup {args.backup_id} não encontrado")
+            restauracao = await create_restore(backup, args.destino)
+            total = await run_restore(restauracao)
+            print(f"{total} documentos restaurados")
+    finally:
+        await MongoDB.close_database_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backup e restauração das coleções do MongoDB")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backup_parser = sub.add_parser("backup")
+    backup_parser.add_argument("--tipo", choices=[COMPLETO, INCREMENTAL, DIFERENCIAL], default=INCREMENTAL)
+    backup_parser.add_argument("--retencao", type=int, default=7)
+    backup_parser.add_argument("--colecoes", nargs="*")
+    restore_parser = sub.add_parser("restore")
+    restore_parser.add_argument("backup_id")
+    restore_parser.add_argument("--destino", default="")
+    asyncio.run(_main(parser.parse_args()))
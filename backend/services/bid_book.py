@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+
+from config import MongoDB
+
+logger = logging.getLogger(__name__)
+
+BID_BOOK_MAX_AUCTIONS = int(os.getenv("BID_BOOK_MAX_AUCTIONS", "1000"))
+
+class AuctionBidBook:
+    """
+    Livro de lances aceitos de um leilão, em arrays paralelos compactos.
+
+    ``valores``/``usuarios``/``timestamps`` guardam o histórico ordenado
+    por valor. ``melhores`` guarda o maior lance de cada usuário, também
+    ordenado, para responder a posição de um usuário com busca binária.
+    Lances aceitos são estritamente crescentes, então a inserção quase
+    sempre é um append.
+    """
+
+    __slots__ = ("leilao_id", "valores", "usuarios", "timestamps", "melhores", "melhor_por_usuario")
+
+    def __init__(self, leilao_id: ObjectId):
+        self.leilao_id = leilao_id
+        self.valores = array("d")
+        self.usuarios: List[ObjectId] = []
+        self.timestamps = array("d")
+        self.melhores = array("d")
+        self.melhor_por_usuario: Dict[ObjectId, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.valores)
+
+    def add(self, valor: float, usuario_id: ObjectId, criado_em: datetime) -> bool:
+        """
+        Insere um lance aceito; ignora valores já presentes no livro.
+        """
+        pos = bisect_left(self.valores, valor)
+        if pos < len(self.valores) and self.valores[pos] == valor:
+            return False
+        self.valores.insert(pos, valor)
+        self.usuarios.insert(pos, usuario_id)
+        if criado_em.tzinfo is None:
+            criado_em = criado_em.replace(tzinfo=timezone.utc)
+        self.timestamps.insert(pos, criado_em.timestamp())
+
+        anterior = self.melhor_por_usuario.get(usuario_id)
+        if anterior is not None and anterior >= valor:
+            return True
+        if anterior is not None:
+            del self.melhores[bisect_left(self.melhores, anterior)]
+        self.melhores.insert(bisect_left(self.melhores, valor), valor)
+        self.melhor_por_usuario[usuario_id] = valor
+        return True
+
+    def extend(self, lances: Iterable[Tuple[float, ObjectId, datetime]]) -> None:
+        """
+        Carga em bloco: junta os lances aos já presentes e ordena uma única
+        vez, em vez de inserir lance a lance no meio dos arrays.
+        """
+        todos = {valor: (usuario, ts) for valor, usuario, ts in zip(self.valores, self.usuarios, self.timestamps)}
+        for valor, usuario_id, criado_em in lances:
+            if valor in todos:
+                continue
+            if criado_em.tzinfo is None:
+                criado_em = criado_em.replace(tzinfo=timezone.utc)
+            todos[valor] = (usuario_id, criado_em.timestamp())
+
+        valores = sorted(todos)
+        self.valores = array("d", valores)
+        self.usuarios = [todos[v][0] for v in valores]
+        self.timestamps = array("d", (todos[v][1] for v in valores))
+        # Em ordem crescente, o último valor de cada usuário é o maior
+        self.melhor_por_usuario = dict(zip(self.usuarios, valores))
+        self.melhores = array("d", sorted(self.melhor_por_usuario.values()))
+
+    def top_k(self, k: int) -> List[Dict[str, Any]]:
+        """
+        Retorna os k maiores lances, do maior para o menor.
+        """
+        fim = len(self.valores)
+        return [
+            {
+                "valor": self.valores[i],
+                "usuario_id": self.usuarios[i],
+                "criado_em": datetime.utcfromtimestamp(self.timestamps[i]),
+            }
+            for i in range(fim - 1, max(fim - k, 0) - 1, -1)
+        ]
+
+    def rank(self, usuario_id: ObjectId) -> Optional[int]:
+        """
+        Posição (1 = líder) do usuário entre os participantes, pelo maior lance.
+        """
+        melhor = self.melhor_por_usuario.get(usuario_id)
+        if melhor is None:
+            return None
+        return len(self.melhores) - bisect_right(self.melhores, melhor) + 1
+
+    @property
+    def participantes(self) -> int:
+        return len(self.melhores)
+
+class BidBookRegistry:
+    """
+    Livros de lances dos leilões ativos, hidratados do MongoDB no primeiro acesso.
+
+    A carga fria usa o índice (leilao_id, valor desc) de lances, percorrido
+    em ordem crescente, e monta os arrays de uma vez. Lances aceitos
+    durante a carga ficam pendentes e são aplicados ao final.
+
+    Lances aceitos em outros nós não passam por ``record`` neste processo:
+    a cada acesso o livro em memória é comparado a ``leiloes.total_lances``
+    e, se estiver atrás, busca só os lances acima do seu maior valor.
+    """
+
+    def __init__(self, max_auctions: int = BID_BOOK_MAX_AUCTIONS):
+        self.max_auctions = max_auctions
+        self._books: "OrderedDict[ObjectId, AuctionBidBook]" = OrderedDict()
+        self._loading: Dict[ObjectId, asyncio.Future] = {}
+        self._pending: Dict[ObjectId, List[tuple]] = {}
+
+    async def get(self, leilao_id: ObjectId) -> AuctionBidBook:
+        book = self._books.get(leilao_id)
+        if book is not None:
+            self._books.move_to_end(leilao_id)
+            await self._catch_up(book)
+            return book
+        loading = self._loading.get(leilao_id)
+        if loading is not None:
+            return await asyncio.shield(loading)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[leilao_id] = future
+        self._pending[leilao_id] = []
+        try:
+            book = await self._hydrate(leilao_id)
+            for lance in self._pending.pop(leilao_id, []):
+                book.add(*lance)
+            self._store(leilao_id, book)
+            future.set_result(book)
+            return book
+        except Exception as e:
+            logger.error(f"Erro ao carregar livro de lances do leilão {leilao_id}: {str(e)}")
+            future.set_exception(e)
+            # Evita "exception was never retrieved" quando ninguém aguardava
+            future.exception()
+            raise
+        finally:
+            self._loading.pop(leilao_id, None)
+            self._pending.pop(leilao_id, None)
+
+    async def _hydrate(self, leilao_id: ObjectId) -> AuctionBidBook:
+        db = MongoDB.get_database()
+        cursor = db.lances.find(
+            {"leilao_id": leilao_id, "status": "aceito"},
+            {"_id": 0, "valor": 1, "usuario_id": 1, "criado_em": 1},
+        ).sort("valor", 1)
+        book = AuctionBidBook(leilao_id)
+        book.extend([(doc["valor"], doc["usuario_id"], doc["criado_em"]) async for doc in cursor])
+        logger.info(f"Livro de lances do leilão {leilao_id} carregado com {len(book)} lances")
+        return book
+
+    async def _catch_up(self, book: AuctionBidBook) -> None:
+        """
+        Completa o livro com lances aceitos fora deste processo.
+        """
+        db = MongoDB.get_database()
+        leilao = await db.leiloes.find_one({"_id": book.leilao_id}, {"total_lances": 1})
+        if not leilao or leilao.get("total_lances", 0) <= len(book):
+            return
+        filtro: Dict[str, Any] = {"leilao_id": book.leilao_id, "status": "aceito"}
+        if len(book):
+            filtro["valor"] = {"$gt": book.valores[-1]}
+        cursor = db.lances.find(filtro, {"_id": 0, "valor": 1, "usuario_id": 1, "criado_em": 1}).sort("valor", 1)
+        # Lances aceitos são crescentes: cada add é um append
+        async for doc in cursor:
+            book.add(doc["valor"], doc["usuario_id"], doc["criado_em"])
+
+    def _store(self, leilao_id: ObjectId, book: AuctionBidBook) -> None:
+        self._books[leilao_id] = book
+        self._books.move_to_end(leilao_id)
+        while len(self._books) > self.max_auctions:
+            self._books.popitem(last=False)
+
+    def record(self, leilao_id: ObjectId, valor: float, usuario_id: ObjectId, criado_em: datetime) -> None:
+        """
+        Aplica um lance recém-aceito ao livro, se ele estiver em memória.
+        """
+        book = self._books.get(leilao_id)
+        if book is not None:
+            book.add(valor, usuario_id, criado_em)
+        elif leilao_id in self._pending:
+            self._pending[leilao_id].append((valor, usuario_id, criado_em))
+
+    def evict(self, leilao_id: ObjectId) -> None:
+        """
+        Remove o livro de um leilão encerrado.
+        """
+        self._books.pop(leilao_id, None)
+
+    def __contains__(self, leilao_id: ObjectId) -> bool:
+        return leilao_id in self._books
+
+bid_books = BidBookRegistry()
@@ -0,0 +1,342 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.models.lance import LanceCreate, LanceInDB
+from config import MongoDB
+from services.bid_book import bid_books
+from services.live_feed import live_feed
+from services.notifications import LANCE_SUPERADO, format_brl, notify_users
+
+logger = logging.getLogger(__name__)
+
+BID_SEQUENCER_ENABLED = os.getenv("BID_SEQUENCER_ENABLED", "true").lower() == "true"
+BID_QUEUE_SIZE = int(os.getenv("BID_QUEUE_SIZE", "1000"))
+BID_BATCH_SIZE = int(os.getenv("BID_BATCH_SIZE", "100"))
+BID_SEQUENCER_IDLE_TIMEOUT = float(os.getenv("BID_SEQUENCER_IDLE_TIMEOUT", "30"))
+
+ACEITO = "aceito"
+REJEITADO = "rejeitado"
+
+# Motivos de rejeição gravados em Lance.observacao
+LEILAO_NAO_ENCONTRADO = "leilao_nao_encontrado"
+LEILAO_FECHADO = "leilao_fechado"
+FORA_DO_PERIODO = "fora_do_periodo"
+VALOR_INSUFICIENTE = "valor_insuficiente"
+
+STATUS_FECHADOS = ["finalizado", "cancelado"]
+
+_tasks: Set[asyncio.Task] = set()
+
+LEILAO_STATE_PROJECTION = {
+    "valor_inicial": 1,
+    "valor_atual": 1,
+    "valor_minimo_incremento": 1,
+    "total_lances": 1,
+    "status": 1,
+    "ativo": 1,
+    "data_inicio": 1,
+    "data_fim": 1,
+    "titulo": 1,
+}
+
+def _acceptance_filter(lance: LanceCreate, now: datetime) -> Dict:
+    """
+    Filtro do findOneAndUpdate que só casa se o lance puder ser aceito.
+
+    O lance precisa cobrir o valor inicial e o valor atual mais o
+    incremento mínimo, dentro do período do leilão.
+    """
+    return {
+        "_id": lance.leilao_id,
+        "ativo": True,
+        "status": {"$nin": STATUS_FECHADOS},
+        "data_inicio": {"$lte": now},
+        "data_fim": {"$gt": now},
+        "$expr": {
+            "$and": [
+                {"$gte": [lance.valor, "$valor_inicial"]},
+                {"$lte": [{"$add": ["$valor_atual", "$valor_minimo_incremento"]}, lance.valor]},
+            ]
+        },
+    }
+
+def _rejection_reason(leilao: Optional[Dict], lance: LanceCreate, now: datetime) -> str:
+    if not leilao:
+        return LEILAO_NAO_ENCONTRADO
+    if not leilao.get("ativo", True) or leilao.get("status") in STATUS_FECHADOS:
+        return LEILAO_FECHADO
+    if not (leilao["data_inicio"] <= now < leilao["data_fim"]):
+        return FORA_DO_PERIODO
+    return VALOR_INSUFICIENTE
+
+def _local_rejection(state: Dict, lance: LanceCreate, now: datetime) -> Optional[str]:
+    """
+    Motivo para rejeitar sem ir ao banco a partir do estado em cache, ou
+    None. Só um leilão encerrado (status final) ou aberto com lance abaixo
+    do mínimo é decidido localmente; fora do período o cache pode estar
+    desatualizado, e o findOneAndUpdate dá o motivo correto.
+    """
+    if not state.get("ativo", True) or state.get("status") in STATUS_FECHADOS:
+        return LEILAO_FECHADO
+    if not (state["data_inicio"] <= now < state["data_fim"]):
+        return None
+    if lance.valor < minimum_next_bid(state):
+        return VALOR_INSUFICIENTE
+    return None
+
+def minimum_next_bid(leilao: Dict) -> float:
+    """
+    Menor valor aceito para o próximo lance de um leilão.
+    """
+    return max(
+        leilao.get("valor_inicial", 0.0),
+        leilao.get("valor_atual", 0.0) + leilao.get("valor_minimo_incremento", 0.0),
+    )
+
+def _new_lance(lance: LanceCreate, status: str, now: datetime, motivo: Optional[str] = None) -> LanceInDB:
+    return LanceInDB(
+        **lance.model_dump(),
+        _id=ObjectId(),
+        criado_em=now,
+        status=status,
+        observacao=motivo,
+    )
+
+async def try_accept(lance: LanceCreate, now: Optional[datetime] = None) -> Tuple[LanceInDB, Optional[Dict]]:
+    """
+    Tenta aceitar o lance com um único findOneAndUpdate condicional.
+
+    Retorna o lance (aceito ou rejeitado, ainda não gravado) e o estado do
+    leilão depois da atualização, ou o estado atual quando rejeitado. O
+    livro de lances e o feed só são atualizados depois da gravação.
+    """
+    now = now or datetime.utcnow()
+    db = MongoDB.get_database()
+    accepted = _new_lance(lance, ACEITO, now)
+
+    leilao = await db.leiloes.find_one_and_update(
+        _acceptance_filter(lance, now),
+        {
+            "$set": {
+                "valor_atual": lance.valor,
+                "ultimo_lance": accepted.id,
+                "atualizado_em": now,
+            },
+            "$inc": {"total_lances": 1},
+        },
+        projection=LEILAO_STATE_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+    if leilao:
+        return accepted, leilao
+
+    # Caminho de rejeição: uma leitura extra só para explicar o motivo
+    leilao = await db.leiloes.find_one({"_id": lance.leilao_id}, LEILAO_STATE_PROJECTION)
+    motivo = _rejection_reason(leilao, lance, now)
+    return _new_lance(lance, REJEITADO, now, motivo), leilao
+
+async def _notify_outbid(result: LanceInDB, leilao: Dict) -> None:
+    """
+    Avisa quem liderava o leilão antes deste lance.
+    """
+    try:
+        db = MongoDB.get_database()
+        anterior = await db.lances.find_one(
+            {"leilao_id": result.leilao_id, "status": ACEITO, "valor": {"$lt": result.valor}},
+            {"usuario_id": 1},
+            sort=[("valor", -1)],
+        )
+        if not anterior or anterior["usuario_id"] == result.usuario_id:
+            return
+        await notify_users(
+            LANCE_SUPERADO,
+            [anterior["usuario_id"]],
+            {"leilao": leilao.get("titulo") or str(result.leilao_id), "valor": format_brl(result.valor)},
+            tipo="lance",
+            leilao_id=result.leilao_id,
+            lance_id=result.id,
+        )
+    except Exception as e:
+        logger.error(f"Erro ao avisar lance superado no leilão {result.leilao_id}: {str(e)}", exc_info=True)
+
+async def _announce(result: LanceInDB, leilao: Dict) -> None:
+    """
+    Aplica o lance aceito ao livro em memória e o publica no feed ao vivo;
+    só depois de gravado em ``lances``.
+    """
+    bid_books.record(result.leilao_id, result.valor, result.usuario_id, result.criado_em)
+    await live_feed.publish(result.leilao_id, "lance", {
+        "lance_id": result.id,
+        "usuario_id": result.usuario_id,
+        "valor": result.valor,
+        "criado_em": result.criado_em,
+        "total_lances": leilao.get("total_lances"),
+        "proximo_minimo": minimum_next_bid(leilao),
+        "data_fim": leilao.get("data_fim"),
+    })
+    # Fora do caminho do lance: a fila de notificações pode estar cheia
+    task = asyncio.create_task(_notify_outbid(result, leilao))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+async def place_bid(lance: LanceCreate, now: Optional[datetime] = None) -> LanceInDB:
+    """
+    Processa um lance: aceita ou rejeita atomicamente e grava o registro.
+
+    O contador, o valor atual e o último lance do leilão mudam na mesma
+    operação condicional, sem leitura seguida de escrita.
+    """
+    result, leilao = await try_accept(lance, now)
+    db = MongoDB.get_database()
+    await db.lances.insert_one(result.model_dump(by_alias=True))
+    if result.status == ACEITO:
+        await _announce(result, leilao)
+        logger.info(f"Lance {result.id} aceito no leilão {lance.leilao_id}: {lance.valor}")
+    else:
+        logger.info(f"Lance rejeitado no leilão {lance.leilao_id} ({result.observacao}): {lance.valor}")
+    return result
+
+class BidSequencer:
+    """
+    Sequenciador em memória por leilão para absorver rajadas de lances.
+
+    Cada leilão tem uma fila e um único consumidor. O consumidor guarda o
+    último estado conhecido do leilão e rejeita localmente lances abaixo
+    do mínimo enquanto o leilão está no período (o valor atual só cresce,
+    então o estado em cache nunca aceita um lance indevido). Os
+    rejeitados são gravados em lote.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = BID_QUEUE_SIZE,
+        batch_size: int = BID_BATCH_SIZE,
+        idle_timeout: float = BID_SEQUENCER_IDLE_TIMEOUT,
+    ):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self._queues: Dict[ObjectId, asyncio.Queue] = {}
+        self._workers: Dict[ObjectId, asyncio.Task] = {}
+        self._state: Dict[ObjectId, Dict] = {}
+
+    async def submit(self, lance: LanceCreate) -> LanceInDB:
+        """
+        Enfileira o lance no sequenciador do leilão e aguarda o resultado.
+        """
+        leilao_id = lance.leilao_id
+        queue = self._queues.get(leilao_id)
+        if queue is None:
+            queue = self._queues[leilao_id] = asyncio.Queue(maxsize=self.queue_size)
+        worker = self._workers.get(leilao_id)
+        if worker is None or worker.done():
+            self._workers[leilao_id] = asyncio.create_task(self._run(leilao_id, queue))
+
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((lance, future))
+        return await future
+
+    def forget(self, leilao_id: ObjectId) -> None:
+        """
+        Descarta o estado em cache de um leilão (por exemplo, ao encerrar).
+        """
+        self._state.pop(leilao_id, None)
+
+    async def _run(self, leilao_id: ObjectId, queue: asyncio.Queue) -> None:
+        try:
+            while True:
+                try:
+                    first = await asyncio.wait_for(queue.get(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if queue.empty():
+                        break
+                    continue
+                batch = [first]
+                while len(batch) < self.batch_size and not queue.empty():
+                    batch.append(queue.get_nowait())
+                await self._process_batch(leilao_id, queue, batch)
+        finally:
+            if self._workers.get(leilao_id) is asyncio.current_task():
+                del self._workers[leilao_id]
+            if self._queues.get(leilao_id) is queue and queue.empty():
+                del self._queues[leilao_id]
+            self._state.pop(leilao_id, None)
+
+    async def _process_batch(self, leilao_id: ObjectId, queue: asyncio.Queue, batch: List) -> None:
+        try:
+            await self._decide_batch(leilao_id, batch)
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+    async def _decide_batch(self, leilao_id: ObjectId, batch: List) -> None:
+        rejected: List[Tuple[LanceInDB, asyncio.Future]] = []
+        db = MongoDB.get_database()
+        for lance, future in batch:
+            try:
+                state = self._state.get(leilao_id)
+                now = datetime.utcnow()
+                motivo = _local_rejection(state, lance, now) if state else None
+                if motivo:
+                    rejected.append((_new_lance(lance, REJEITADO, now, motivo), future))
+                    continue
+
+                result, leilao = await try_accept(lance, now)
+                if leilao:
+                    self._state[leilao_id] = leilao
+                if result.status == ACEITO:
+                    await db.lances.insert_one(result.model_dump(by_alias=True))
+                    await _announce(result, leilao)
+                    future.set_result(result)
+                else:
+                    rejected.append((result, future))
+            except Exception as e:
+                logger.error(f"Erro ao processar lance no leilão {leilao_id}: {str(e)}", exc_info=True)
+                if not future.done():
+                    future.set_exception(e)
+
+        if not rejected:
+            return
+        try:
+            await db.lances.insert_many(
+                [result.model_dump(by_alias=True) for result, _ in rejected],
+                ordered=False,
+            )
+        except Exception as e:
+            logger.error(f"Erro ao gravar lances rejeitados do leilão {leilao_id}: {str(e)}")
+        for result, future in rejected:
+            if not future.done():
+                future.set_result(result)
+
+    async def flush(self, timeout: float = 10.0) -> None:
+        """
+        Processa os lances já enfileirados; usado no desligamento gracioso.
+        """
+        queues = list(self._queues.values())
+        if queues:
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(queue.join() for queue in queues)), timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                logger.error("Tempo esgotado ao processar lances enfileirados")
+        workers = list(self._workers.values())
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+bid_sequencer = BidSequencer()
+
+async def submit_bid(lance: LanceCreate) -> LanceInDB:
+    """
+    Ponto de entrada dos lances: usa o sequenciador quando habilitado.
+    """
+    if BID_SEQUENCER_ENABLED:
+        return await bid_sequencer.submit(lance)
+    return await place_bid(lance)
@@ -0,0 +1,305 @@
+import argparse
+import asyncio
+import csv
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from app.models.importacao import ImportacaoInDB
+from config import MongoDB
+from services.property_search import normalize_term, search_fields
+from utils.http_client import get_http_client
+from utils.normalization import normalized_fields
+
+logger = logging.getLogger(__name__)
+
+CAIXA_LIST_URL = os.getenv(
+    "CAIXA_LIST_URL", "https://venda-imoveis.caixa.gov.br/listaweb/Lista_imoveis_{uf}.csv"
+)
+CAIXA_CSV_ENCODING = os.getenv("CAIXA_CSV_ENCODING", "latin-1")
+CAIXA_IMPORT_CHUNK = int(os.getenv("CAIXA_IMPORT_CHUNK", "1000"))
+
+UFS = [
+    "AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT", "PA",
+    "PB", "PE", "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO",
+]
+
+# Cabeçalho normalizado da planilha -> campo interno
+COLUMNS = {
+    "n do imovel": "numero",
+    "no do imovel": "numero",
+    "uf": "uf",
+    "cidade": "cidade",
+    "bairro": "bairro",
+    "endereco": "endereco",
+    "preco": "preco",
+    "valor de avaliacao": "avaliacao",
+    "desconto": "desconto",
+    "descricao": "descricao",
+    "modalidade de venda": "modalidade",
+    "link de acesso": "link",
+}
+
+_tasks: Set[asyncio.Task] = set()
+
+def _header_key(cell: str) -> str:
+    return re.sub(r"[^a-z ]", "", normalize_term(cell) or "").strip()
+
+def iter_rows(lines: Iterable[str]) -> Iterator[Dict[str, str]]:
+    """
+    Lê a planilha linha a linha. As primeiras linhas da Caixa são um
+    título e uma linha em branco; os dados começam depois do cabeçalho.
+    """
+    reader = csv.reader(lines, delimiter=";")
+    columns: Optional[List[Optional[str]]] = None
+    for cells in reader:
+        if columns is None:
+            candidate = [COLUMNS.get(_header_key(c)) for c in cells]
+            if "numero" in candidate:
+                columns = candidate
+            continue
+        if not any(c.strip() for c in cells):
+            continue
+        yield {col: cell.strip() for col, cell in zip(columns, cells) if col}
+
+def _decimal(value: str) -> Optional[float]:
+    value = (value or "").strip()
+    if not value:
+        return None
+    if "," in value:
+        value = value.replace(".", "").replace(",", ".")
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def _description_field(descricao: str, pattern: str) -> Optional[str]:
+    match = re.search(pattern, descricao, re.IGNORECASE)
+    return match.group(1) if match else None
+
+def row_hash(row: Dict[str, str]) -> str:
+    return hashlib.sha1("\x1f".join(f"{k}={row[k]}" for k in sorted(row)).encode()).hexdigest()
+
+def normalize_row(row: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Converte uma linha da planilha no documento de ``extraction_results``.
+
+    Preço e avaliação vêm como "123.456,78" e a descrição concentra tipo,
+    áreas, quartos e vagas ("Apartamento, 0.00 de área total, 49.26 de área
+    privativa, ..., 2 qto(s), 1 vaga(s) na garagem.").
+    """
+    numero = re.sub(r"\D", "", row.get("numero", ""))
+    if not numero:
+        return None
+    descricao = row.get("descricao", "")
+    cidade = row.get("cidade", "").strip().title() or None
+    uf = row.get("uf", "").strip().upper() or None
+    modalidade = re.sub(r"\s+", " ", row.get("modalidade", "")).strip() or None
+    tipo = descricao.split(",", 1)[0].strip() or None
+    endereco = ", ".join(p for p in (row.get("endereco", "").strip(), row.get("bairro", "").strip()) if p)
+
+    data = {
+        "url": row.get("link") or f"https://venda-imoveis.caixa.gov.br/sistema/detalhe-imovel.asp?hdnimovel={numero}",
+        "titulo": f"{tipo or 'Imóvel'} - {row.get('bairro', '').strip().title()}, {cidade}/{uf}",
+        "valor_minimo": row.get("preco") or None,
+        "evaluated_value": row.get("avaliacao") or None,
+        "description": descricao or None,
+        "property_type": tipo,
+        "auction_type": modalidade,
+        "address": f"{endereco} - {cidade} - {uf}" if endereco else None,
+        "cidade": cidade,
+        "estado": uf,
+        "quartos": _description_field(descricao, r"(\d+)\s*qto"),
+        "vagas": _description_field(descricao, r"(\d+)\s*vaga"),
+        "area_privada": _decimal(_description_field(descricao, r"([\d.,]+)\s*de [áa]rea privativa")),
+    }
+    data.update(normalized_fields(data))
+    desconto = _decimal(row.get("desconto"))
+    if desconto is not None:
+        data["desconto_percentual"] = desconto
+    data["busca"] = search_fields(data)
+    data["origem"] = "caixa"
+    data["caixa"] = {"numero": numero, "hash": row_hash(row)}
+    return data
+
+def _next_chunk(rows: Iterator[Dict[str, str]], size: int) -> List[Dict[str, str]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            break
+    return chunk
+
+async def _write_chunk(db, docs: Dict[str, Dict[str, Any]]) -> Tuple[int, int, int]:
+    """
+    Grava um bloco: compara os hashes de linha já gravados e só manda ao
+    banco o que é novo ou mudou, num bulk_write não ordenado.
+    """
+    cursor = db.extraction_results.find({"caixa.numero": {"$in": list(docs)}}, {"caixa": 1})
+    known = {d["caixa"]["numero"]: d["caixa"].get("hash") async for d in cursor}
+    now = datetime.utcnow()
+    ops = []
+    inseridos = atualizados = 0
+    for numero, doc in docs.items():
+        if numero in known and known[numero] == doc["caixa"]["hash"]:
+            continue
+        if numero in known:
+            atualizados += 1
+        else:
+            inseridos += 1
+        ops.append(UpdateOne({"caixa.numero": numero}, {"$set": {**doc, "timestamp": now, "atualizado_em": now}}, upsert=True))
+    if ops:
+        await db.extraction_results.bulk_write(ops, ordered=False)
+    return inseridos, atualizados, len(docs) - len(ops)
+
+def _empty_counts() -> Dict[str, int]:
+    return {"inseridos": 0, "atualizados": 0, "inalterados": 0, "invalidos": 0}
+
+async def import_lines(
+    lines: Iterable[str],
+    importacao_id=None,
+    contagens: Optional[Dict[str, int]] = None,
+    chunk_size: int = CAIXA_IMPORT_CHUNK,
+) -> Dict[str, int]:
+    """
+    Importa uma planilha em blocos; a leitura e a normalização de cada bloco
+    rodam numa thread, então só um bloco fica em memória por vez.
+    """
+    db = MongoDB.get_database()
+    rows = iter_rows(lines)
+    contagens = contagens if contagens is not None else _empty_counts()
+
+    def read_chunk() -> Tuple[Dict[str, Dict[str, Any]], int]:
+        docs, invalidos = {}, 0
+        for row in _next_chunk(rows, chunk_size):
+            doc = normalize_row(row)
+            if doc is None:
+                invalidos += 1
+            else:
+                docs[doc["caixa"]["numero"]] = doc
+        return docs, invalidos
+
+    while True:
+        docs, invalidos = await asyncio.to_thread(read_chunk)
+        contagens["invalidos"] += invalidos
+        if not docs and not invalidos:
+            break
+        if docs:
+            inseridos, atualizados, inalterados = await _write_chunk(db, docs)
+            contagens["inseridos"] += inseridos
+            contagens["atualizados"] += atualizados
+            contagens["inalterados"] += inalterados
+        if importacao_id is not None:
+            await db.importacoes.update_one(
+                {"_id": importacao_id}, {"$set": {**contagens, "atualizado_em": datetime.utcnow()}}
+            )
+    return contagens
+
+async def download_listing(uf: str, directory: Optional[str] = None) -> str:
+    """
+    Baixa a planilha de uma UF direto para um arquivo temporário.
+    """
+    fd, path = tempfile.mkstemp(prefix=f"caixa_{uf}_", suffix=".csv", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async with get_http_client().stream("GET", CAIXA_LIST_URL.format(uf=uf), follow_redirects=True) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    f.write(chunk)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+async def _import_source(fonte: str, importacao_id, contagens: Dict[str, int]) -> None:
+    downloaded = fonte.upper() in UFS and not os.path.exists(fonte)
+    path = await download_listing(fonte.upper()) if downloaded else fonte
+    try:
+        with open(path, encoding=CAIXA_CSV_ENCODING, newline="") as f:
+            await import_lines(f, importacao_id, contagens)
+        logger.info(f"Planilha {fonte} importada: {contagens}")
+    finally:
+        if downloaded:
+            os.unlink(path)
+
+async def run_import(importacao: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Importa as fontes (arquivos locais ou UFs) de uma importação registrada.
+    """
+    db = MongoDB.get_database()
+    importacao_id = importacao["_id"]
+    now = datetime.utcnow()
+    await db.importacoes.update_one(
+        {"_id": importacao_id}, {"$set": {"status": "em_andamento", "iniciado_em": now, "atualizado_em": now}}
+    )
+    contagens = _empty_counts()
+    try:
+        for fonte in importacao["fontes"]:
+            await _import_source(fonte, importacao_id, contagens)
+        await db.importacoes.update_one(
+            {"_id": importacao_id},
+            {"$set": {**contagens, "status": "concluido", "concluido_em": datetime.utcnow(),
+                      "atualizado_em": datetime.utcnow()}},
+        )
+        logger.info(f"Importação {importacao_id} concluída: {contagens}")
+        return contagens
+    except Exception as e:
+        logger.error(f"Erro na importação {importacao_id}: {str(e)}", exc_info=True)
+        await db.importacoes.update_one(
+            {"_id": importacao_id},
+            {"$set": {**contagens, "status": "erro", "erro": str(e), "atualizado_em": datetime.utcnow()}},
+        )
+        raise
+    finally:
+        for fonte in (importacao.get("metadata") or {}).get("temporarios", []):
+            if os.path.exists(fonte):
+                os.unlink(fonte)
+
+async def create_import(fontes: List[str], usuario_id=None, temporarios: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Registra uma importação pendente em ``importacoes``.
+    """
+    doc = ImportacaoInDB(
+        origem="caixa", fontes=fontes, usuario_id=usuario_id, metadata={"temporarios": temporarios or []}
+    ).model_dump(by_alias=True)
+    await MongoDB.get_database().importacoes.insert_one(doc)
+    return doc
+
+def start_in_background(coro) -> asyncio.Task:
+    """
+    Executa a importação fora do ciclo da requisição.
+    """
+    task = asyncio.create_task(coro)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+async def _main(args: argparse.Namespace) -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    await MongoDB.connect_to_database(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    try:
+        fontes = UFS if args.todos else (args.fontes or [])
+        if not fontes:
+            raise SystemExit("Informe arquivos CSV, UFs ou --todos")
+        importacao = await create_import(fontes)
+        contagens = await run_import(importacao)
+        print(
+            f"{contagens['inseridos']} inseridos, {contagens['atualizados']} atualizados, "
+            f"{contagens['inalterados']} inalterados, {contagens['invalidos']} inválidos"
+        )
+    finally:
+        await MongoDB.close_database_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa as planilhas de imóveis à venda da Caixa")
+    parser.add_argument("fontes", nargs="*", help="arquivos CSV ou UFs (baixadas do site da Caixa)")
+    parser.add_argument("--todos", action="store_true", help="baixa e importa as planilhas de todas as UFs")
+    asyncio.run(_main(parser.parse_args()))
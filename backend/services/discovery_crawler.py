@@ -0,0 +1,413 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+from bson import Binary
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from config import MongoDB
+from services.domain_reputation import DATA_DIR, load_domain_tables
+from services.shutdown import REQUEUED_STATUS, coordinator
+from utils.http_client import get_http_client
+from utils.pre_analysis_logger import save_pre_analysis
+from utils.urls import canonical_url
+
+logger = logging.getLogger(__name__)
+
+CRAWLER_ENABLED = os.getenv("CRAWLER_ENABLED", "false").lower() == "true"
+CRAWLER_USER_AGENT = os.getenv("CRAWLER_USER_AGENT", "LeilaoInsightsBot/1.0")
+# Intervalo entre varreduras completas dos catálogos
+CRAWLER_INTERVAL = float(os.getenv("CRAWLER_INTERVAL", "21600"))
+CRAWLER_MAX_PAGES = int(os.getenv("CRAWLER_MAX_PAGES", "50"))
+# Espera mínima entre requisições ao mesmo host, mesmo sem Crawl-delay
+CRAWLER_DEFAULT_DELAY = float(os.getenv("CRAWLER_DEFAULT_DELAY", "2"))
+CRAWLER_ROBOTS_TTL = float(os.getenv("CRAWLER_ROBOTS_TTL", "86400"))
+CRAWLER_DOMAINS_PARALLEL = int(os.getenv("CRAWLER_DOMAINS_PARALLEL", "4"))
+CRAWLER_ANALYSIS_CONCURRENCY = int(os.getenv("CRAWLER_ANALYSIS_CONCURRENCY", "4"))
+# 2^24 bits (2 MB): ~1 milhão de URLs com menos de 0,1% de falsos positivos
+CRAWLER_BLOOM_BITS = int(os.getenv("CRAWLER_BLOOM_BITS", str(1 << 24)))
+CRAWLER_BLOOM_HASHES = int(os.getenv("CRAWLER_BLOOM_HASHES", "10"))
+CRAWLER_LEASE_TTL = float(os.getenv("CRAWLER_LEASE_TTL", "3600"))
+
+BLOOM_ID = "bloom_lotes"
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre um bytearray, com hash duplo derivado de um
+    único blake2b por chave.
+    """
+
+    def __init__(self, size_bits: int = CRAWLER_BLOOM_BITS, hashes: int = CRAWLER_BLOOM_HASHES,
+                 bits: Optional[bytes] = None, count: int = 0):
+        self.size = size_bits
+        self.hashes = hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray((size_bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def to_document(self) -> Dict[str, Any]:
+        return {"bits": Binary(bytes(self.bits)), "tamanho": self.size, "hashes": self.hashes, "itens": self.count}
+
+    @classmethod
+    def from_document(cls, doc: Optional[Dict[str, Any]]) -> "BloomFilter":
+        if not doc or doc.get("tamanho") != CRAWLER_BLOOM_BITS or doc.get("hashes") != CRAWLER_BLOOM_HASHES:
+            # Sem estado ou com outra configuração: recomeça; o índice de
+            # URLs canônicas continua evitando duplicatas
+            return cls()
+        return cls(doc["tamanho"], doc["hashes"], bits=doc["bits"], count=doc.get("itens", 0))
+
+class _Links(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hrefs: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = next((v for k, v in attrs if k == "href" and v), None)
+            if href:
+                self.hrefs.append(href)
+
+def extract_links(html: str, base_url: str) -> List[str]:
+    """
+    Links absolutos (http/https, sem fragmento) de uma página.
+    """
+    parser = _Links()
+    parser.feed(html)
+    links = []
+    for href in parser.hrefs:
+        url = urldefrag(urljoin(base_url, href.strip()))[0]
+        if urlparse(url).scheme in ("http", "https"):
+            links.append(url)
+    return links
+
+def _site(host: str) -> str:
+    host = (host or "").lower().rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+def load_rules() -> Dict[str, Dict[str, Any]]:
+    """
+    Regras de extração por domínio (seeds, padrão de lote e de paginação)
+    para cada leiloeiro confiável; domínios sem regra própria usam a padrão.
+    """
+    with open(DATA_DIR / "crawler_regras.json", encoding="utf-8") as f:
+        config = json.load(f)
+    padrao, especificas = config["padrao"], config.get("dominios", {})
+    trusted, _ = load_domain_tables()
+    rules = {}
+    for dominio in sorted({_site(d) for d in trusted}):
+        regra = {**padrao, **especificas.get(dominio, {})}
+        rules[dominio] = {
+            "seeds": [s.format(dominio=dominio) for s in regra["seeds"]],
+            "lote": re.compile(regra["lote"], re.IGNORECASE),
+            "paginacao": re.compile(regra["paginacao"], re.IGNORECASE),
+        }
+    return rules
+
+def classify_links(links: Iterable[str], dominio: str, regra: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """
+    Separa os links do próprio leiloeiro em (lotes, páginas de catálogo).
+    """
+    lotes, paginas = [], []
+    for url in links:
+        parsed = urlparse(url)
+        if _site(parsed.hostname) != dominio:
+            continue
+        caminho = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        if regra["lote"].search(caminho):
+            lotes.append(url)
+        elif regra["paginacao"].search(caminho):
+            paginas.append(url)
+    return lotes, paginas
+
+class HostPolicy:
+    """
+    robots.txt em cache por host e espaçamento entre requisições ao mesmo
+    host (o maior entre o Crawl-delay e ``default_delay``).
+    """
+
+    def __init__(self, user_agent: str = CRAWLER_USER_AGENT, default_delay: float = CRAWLER_DEFAULT_DELAY,
+                 ttl: float = CRAWLER_ROBOTS_TTL):
+        self.user_agent = user_agent
+        self.default_delay = default_delay
+        self.ttl = ttl
+        self._robots: Dict[str, Tuple[RobotFileParser, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_at: Dict[str, float] = {}
+
+    async def robots(self, origin: str) -> RobotFileParser:
+        cached = self._robots.get(origin)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        parser = RobotFileParser()
+        try:
+            response = await get_http_client().get(
+                f"{origin}/robots.txt", headers={"User-Agent": self.user_agent}, follow_redirects=True
+            )
+            if response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif response.status_code >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(response.text.splitlines())
+        except Exception as e:
+            logger.warning(f"Erro ao buscar robots.txt de {origin}: {str(e)}")
+            parser.allow_all = True
+        self._robots[origin] = (parser, time.monotonic() + self.ttl)
+        return parser
+
+    async def allowed(self, url: str) -> bool:
+        parsed = urlparse(url)
+        parser = await self.robots(f"{parsed.scheme}://{parsed.netloc}")
+        return parser.can_fetch(self.user_agent, url)
+
+    async def delay(self, url: str) -> float:
+        parsed = urlparse(url)
+        parser = await self.robots(f"{parsed.scheme}://{parsed.netloc}")
+        return max(float(parser.crawl_delay(self.user_agent) or 0), self.default_delay)
+
+    async def wait_turn(self, url: str) -> None:
+        """
+        Aguarda a vez do host; chamadas concorrentes ao mesmo host são serializadas.
+        """
+        host = urlparse(url).netloc
+        delay = await self.delay(url)
+        async with self._locks.setdefault(host, asyncio.Lock()):
+            espera = self._next_at.get(host, 0.0) - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            self._next_at[host] = time.monotonic() + delay
+
+class DiscoveryCrawler:
+    """
+    Percorre os catálogos dos leiloeiros confiáveis e coloca na fila de
+    análise os lotes ainda não vistos.
+
+    Cada URL de lote é reduzida à forma canônica e passa primeiro pelo
+    filtro de Bloom persistido (descarta sem consulta o que já foi visto)
+    e depois pelo índice de URLs canônicas em ``lotes_descobertos``, que
+    é a referência definitiva; URLs já analisadas a pedido de usuários
+    (``fetch_cache``) também ficam de fora.
+    """
+
+    def __init__(self, policy: Optional[HostPolicy] = None, max_pages: int = CRAWLER_MAX_PAGES):
+        self.policy = policy or HostPolicy()
+        self.max_pages = max_pages
+        self.bloom: Optional[BloomFilter] = None
+        self._analysis_slots = asyncio.Semaphore(CRAWLER_ANALYSIS_CONCURRENCY)
+        self._task: Optional[asyncio.Task] = None
+
+    async def load_bloom(self) -> BloomFilter:
+        if self.bloom is None:
+            db = MongoDB.get_database()
+            self.bloom = BloomFilter.from_document(await db.crawler_estado.find_one({"_id": BLOOM_ID}))
+        return self.bloom
+
+    async def save_bloom(self) -> None:
+        if self.bloom is None:
+            return
+        db = MongoDB.get_database()
+        await db.crawler_estado.update_one(
+            {"_id": BLOOM_ID}, {"$set": {**self.bloom.to_document(), "atualizado_em": datetime.utcnow()}}, upsert=True
+        )
+
+    async def _analyze(self, url: str) -> None:
+        # Import tardio: a análise carrega as bibliotecas de scraping
+        from services.analysis_service import analyze_property
+
+        async with self._analysis_slots:
+            # A página do lote também é do leiloeiro: mesmo espaçamento e
+            # mesma identificação das páginas de catálogo
+            await self.policy.wait_turn(url)
+            await analyze_property(url, user_agent=self.policy.user_agent)
+
+    async def enqueue(self, url: str) -> None:
+        if not coordinator.accepting:
+            # Worker em desligamento: outro worker retoma pelo status
+            await save_pre_analysis(url=url, status=REQUEUED_STATUS)
+            return
+        await save_pre_analysis(url=url, status="pending")
+        coordinator.spawn(url, self._analyze)
+
+    async def register_lots(self, urls: Iterable[str], dominio: str) -> List[str]:
+        """
+        Registra os lotes encontrados e retorna os novos, já enfileirados.
+        """
+        bloom = await self.load_bloom()
+        candidatos: Dict[str, str] = {}
+        for url in urls:
+            canonical = canonical_url(url)
+            if canonical not in bloom and canonical not in candidatos:
+                candidatos[canonical] = url
+        if not candidatos:
+            return []
+
+        db = MongoDB.get_database()
+        analisadas = {
+            doc["_id"] async for doc in db.fetch_cache.find({"_id": {"$in": list(candidatos)}}, {"_id": 1})
+        }
+        now = datetime.utcnow()
+        docs = [
+            {"_id": canonical, "url": url, "dominio": dominio, "descoberto_em": now}
+            for canonical, url in candidatos.items()
+            if canonical not in analisadas
+        ]
+        inseridos: Set[str] = set()
+        if docs:
+            try:
+                await db.lotes_descobertos.insert_many(docs, ordered=False)
+                inseridos = {d["_id"] for d in docs}
+            except BulkWriteError as e:
+                # Duplicatas: já registradas por outra varredura ou outro nó
+                falhas = {err["index"] for err in e.details.get("writeErrors", [])}
+                inseridos = {d["_id"] for i, d in enumerate(docs) if i not in falhas}
+        for canonical in candidatos:
+            bloom.add(canonical)
+
+        novos = [candidatos[c] for c in candidatos if c in inseridos]
+        for url in novos:
+            await self.enqueue(url)
+        return novos
+
+    async def crawl_domain(self, dominio: str, regra: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Segue a paginação do catálogo a partir das seeds, até ``max_pages``.
+        """
+        client = get_http_client()
+        fila = deque(regra["seeds"])
+        vistas = {canonical_url(u) for u in fila}
+        contagens = {"paginas": 0, "lotes": 0, "novos": 0, "bloqueadas": 0}
+        while fila and contagens["paginas"] < self.max_pages:
+            url = fila.popleft()
+            if not await self.policy.allowed(url):
+                contagens["bloqueadas"] += 1
+                continue
+            await self.policy.wait_turn(url)
+            try:
+                response = await client.get(url, headers={"User-Agent": self.policy.user_agent}, follow_redirects=True)
+            except Exception as e:
+                logger.warning(f"Erro ao buscar catálogo {url}: {str(e)}")
+                continue
+            contagens["paginas"] += 1
+            if response.status_code != 200 or "html" not in response.headers.get("content-type", "html"):
+                continue
+
+            lotes, paginas = classify_links(extract_links(response.text, str(response.url)), dominio, regra)
+            # Lotes bloqueados pelo robots.txt também não vão para a análise
+            lotes = [lote for lote in lotes if await self.policy.allowed(lote)]
+            contagens["lotes"] += len(lotes)
+            contagens["novos"] += len(await self.register_lots(lotes, dominio))
+            for pagina in paginas:
+                canonical = canonical_url(pagina)
+                if canonical not in vistas:
+                    vistas.add(canonical)
+                    fila.append(pagina)
+        return contagens
+
+    async def _acquire_lease(self, dominio: str, now: datetime) -> bool:
+        db = MongoDB.get_database()
+        try:
+            await db.scheduler_leases.update_one(
+                {"_id": f"crawler:{dominio}", "expires_at": {"$lt": now}},
+                {"$set": {"expires_at": now + timedelta(seconds=CRAWLER_LEASE_TTL)}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def run_once(self, dominios: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Uma varredura dos catálogos; cada domínio é percorrido por um nó só.
+        """
+        rules = load_rules()
+        if dominios:
+            rules = {d: rules[d] for d in dominios if d in rules}
+        await self.load_bloom()
+        limite = asyncio.Semaphore(CRAWLER_DOMAINS_PARALLEL)
+        resultados: Dict[str, Dict[str, int]] = {}
+
+        async def _um(dominio: str) -> None:
+            async with limite:
+                if not await self._acquire_lease(dominio, datetime.utcnow()):
+                    return
+                try:
+                    resultados[dominio] = await self.crawl_domain(dominio, rules[dominio])
+                except Exception as e:
+                    logger.error(f"Erro ao percorrer catálogo de {dominio}: {str(e)}", exc_info=True)
+
+        try:
+            await asyncio.gather(*(_um(d) for d in rules))
+        finally:
+            await self.save_bloom()
+        novos = sum(r["novos"] for r in resultados.values())
+        logger.info(f"Varredura de catálogos concluída: {len(resultados)} domínios, {novos} lotes novos")
+        return resultados
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro na varredura de catálogos: {str(e)}", exc_info=True)
+            await asyncio.sleep(CRAWLER_INTERVAL)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            logger.info("Descoberta de lotes iniciada")
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.save_bloom()
+
+discovery_crawler = DiscoveryCrawler()
+
+async def _main(args: argparse.Namespace) -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    await MongoDB.connect_to_database(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    try:
+        crawler = DiscoveryCrawler(max_pages=args.max_paginas)
+        # Pela linha de comando só registra os lotes; a análise fica para os workers
+        crawler.enqueue = lambda url: save_pre_analysis(url=url, status=REQUEUED_STATUS)
+        resultados = await crawler.run_once(args.dominios or None)
+        for dominio, contagens in sorted(resultados.items()):
+            print(f"{dominio}: {contagens['paginas']} páginas, {contagens['lotes']} lotes, {contagens['novos']} novos")
+    finally:
+        await MongoDB.close_database_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Percorre os catálogos dos leiloeiros e registra lotes novos")
+    parser.add_argument("dominios", nargs="*", help="domínios a percorrer (padrão: todos os confiáveis)")
+    parser.add_argument("--max-paginas", type=int, default=CRAWLER_MAX_PAGES, help="páginas de catálogo por domínio")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,399 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from config import MongoDB
+from services.image_pipeline import ContentStore
+from utils.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_STORE_DIR = os.getenv("DOCUMENT_STORE_DIR", str(Path(__file__).resolve().parent.parent / "documentos"))
+DOCUMENT_MAX_BYTES = int(os.getenv("DOCUMENT_MAX_BYTES", str(100 * 1024 * 1024)))
+DOCUMENT_PER_HOST_LIMIT = int(os.getenv("DOCUMENT_PER_HOST_LIMIT", "2"))
+DOCUMENT_WORKERS = int(os.getenv("DOCUMENT_WORKERS", str(max((os.cpu_count() or 2) // 2, 1))))
+DOCUMENT_PAGES_PER_TASK = int(os.getenv("DOCUMENT_PAGES_PER_TASK", "20"))
+DOCUMENT_INDEX_CACHE_SIZE = int(os.getenv("DOCUMENT_INDEX_CACHE_SIZE", "64"))
+
+def normalize_text(text: str) -> str:
+    """
+    Minúsculas, sem acentos e com espaços colapsados, para busca nas páginas.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+def count_pages(path: str) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(path).pages)
+
+def extract_page_range(path: str, start: int, end: int) -> List[str]:
+    """
+    Extrai o texto das páginas [start, end). Executa no pool de processos.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    texts = []
+    for number in range(start, min(end, len(reader.pages))):
+        try:
+            texts.append(reader.pages[number].extract_text() or "")
+        except Exception:
+            texts.append("")
+    return texts
+
+class DocumentPageIndex:
+    """
+    Páginas normalizadas dos documentos mais consultados, em memória (LRU).
+
+    Buscas por lote ou por termos percorrem o texto já extraído; o PDF
+    nunca é relido.
+    """
+
+    def __init__(self, max_documents: int = DOCUMENT_INDEX_CACHE_SIZE):
+        self.max_documents = max_documents
+        self._pages: "OrderedDict[str, List[str]]" = OrderedDict()
+
+    async def pages(self, digest: str) -> List[str]:
+        cached = self._pages.get(digest)
+        if cached is not None:
+            self._pages.move_to_end(digest)
+            return cached
+        db = MongoDB.get_database()
+        cursor = db.documento_paginas.find({"hash": digest}, {"_id": 0, "pagina": 1, "texto": 1}).sort("pagina", 1)
+        pages = [normalize_text(p["texto"]) async for p in cursor]
+        self._pages[digest] = pages
+        while len(self._pages) > self.max_documents:
+            self._pages.popitem(last=False)
+        return pages
+
+    async def search(self, digest: str, query: str) -> List[int]:
+        """
+        Páginas (1-based) que contêm todos os termos da busca.
+        """
+        terms = normalize_text(query).split()
+        pages = await self.pages(digest)
+        return [i + 1 for i, text in enumerate(pages) if terms and all(t in text for t in terms)]
+
+    async def lot_pages(self, digest: str, lote: str) -> List[int]:
+        """
+        Páginas que citam o lote ("lote 12", "lote nº 012"...).
+        """
+        numero = str(lote).lstrip("0") or "0"
+        pattern = re.compile(rf"\blote\s*(?:n[ºo°.]?\s*)?0*{re.escape(numero)}\b")
+        pages = await self.pages(digest)
+        return [i + 1 for i, text in enumerate(pages) if pattern.search(text)]
+
+    def evict(self, digest: str) -> None:
+        self._pages.pop(digest, None)
+
+class DocumentPipeline:
+    """
+    Baixa, deduplica e indexa editais e matrículas.
+
+    Os downloads são condicionais (ETag/Last-Modified guardados por URL)
+    e retomam arquivos parciais com Range/If-Range. Cada PDF é
+    identificado pelo sha256: um edital que cobre vários lotes é extraído
+    uma vez, em blocos de páginas distribuídos num pool de processos, e o
+    texto de cada página fica em ``documento_paginas``.
+    """
+
+    def __init__(
+        self,
+        store: Optional[ContentStore] = None,
+        per_host_limit: int = DOCUMENT_PER_HOST_LIMIT,
+        max_bytes: int = DOCUMENT_MAX_BYTES,
+        workers: int = DOCUMENT_WORKERS,
+        pages_per_task: int = DOCUMENT_PAGES_PER_TASK,
+        executor=None,
+    ):
+        self.store = store or ContentStore(DOCUMENT_STORE_DIR, public_prefix="")
+        self.per_host_limit = per_host_limit
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.pages_per_task = pages_per_task
+        self.index = DocumentPageIndex()
+        self._executor = executor
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._processing: Dict[str, asyncio.Future] = {}
+        self._fetching: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        from urllib.parse import urlparse
+
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    def _partial_path(self, url: str) -> Path:
+        return self.store.root / "parciais" / f"{hashlib.sha1(url.encode()).hexdigest()}.part"
+
+    def _resume_validator(self, partial: Path) -> Optional[str]:
+        """
+        Validador (ETag forte ou Last-Modified) da resposta que gerou o
+        arquivo parcial, guardado ao lado dele. Sem validador não há como
+        garantir que o restante é da mesma versão: o parcial é descartado.
+        """
+        meta = partial.with_suffix(".json")
+        validador = None
+        if partial.exists() and meta.exists():
+            try:
+                dados = json.loads(meta.read_text())
+            except ValueError:
+                dados = {}
+            etag = dados.get("etag")
+            validador = etag if etag and not etag.startswith("W/") else dados.get("last_modified")
+        if validador is None:
+            partial.unlink(missing_ok=True)
+            meta.unlink(missing_ok=True)
+        return validador
+
+    async def _download(self, url: str, fonte: Optional[Dict[str, Any]]) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        """
+        Baixa o documento para um arquivo parcial. Retorna None se o servidor
+        respondeu 304 (conteúdo igual ao da última vez).
+
+        Um download interrompido é retomado com Range/If-Range usando o
+        validador da própria resposta interrompida; se o documento mudou
+        desde então, o servidor responde 200 e o parcial é reescrito.
+        """
+        partial = self._partial_path(url)
+        meta = partial.with_suffix(".json")
+        headers = {}
+        validador = self._resume_validator(partial)
+        offset = partial.stat().st_size if validador else 0
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validador
+        elif fonte and fonte.get("hash"):
+            if fonte.get("etag"):
+                headers["If-None-Match"] = fonte["etag"]
+            if fonte.get("last_modified"):
+                headers["If-Modified-Since"] = fonte["last_modified"]
+
+        async with self._host_limit(url):
+            async with get_http_client().stream("GET", url, headers=headers, follow_redirects=True) as response:
+                if response.status_code == 304:
+                    return None
+                response.raise_for_status()
+                append = response.status_code == 206 and offset > 0
+                validators = {
+                    "etag": response.headers.get("etag"),
+                    "last_modified": response.headers.get("last-modified"),
+                    "mime_type": response.headers.get("content-type", "").split(";")[0] or None,
+                }
+                partial.parent.mkdir(parents=True, exist_ok=True)
+                if not append:
+                    meta.write_text(json.dumps({"etag": validators["etag"], "last_modified": validators["last_modified"]}))
+                total = offset if append else 0
+                with open(partial, "ab" if append else "wb") as f:
+                    async for chunk in response.aiter_bytes():
+                        total += len(chunk)
+                        if total > self.max_bytes:
+                            # Não vale a pena retomar: descarta o parcial
+                            meta.unlink(missing_ok=True)
+                            raise ValueError(f"Documento maior que {self.max_bytes} bytes")
+                        f.write(chunk)
+        meta.unlink(missing_ok=True)
+        return partial, validators
+
+    async def _extract(self, digest: str, relative: str) -> int:
+        """
+        Extrai o texto das páginas em paralelo e grava uma vez por hash.
+        """
+        pending = self._processing.get(digest)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._processing[digest] = future
+        try:
+            path = str(self.store.root / relative)
+            loop = asyncio.get_running_loop()
+            total = await loop.run_in_executor(self.executor, count_pages, path)
+            ranges = [(s, min(s + self.pages_per_task, total)) for s in range(0, total, self.pages_per_task)]
+            parts = await asyncio.gather(*(
+                loop.run_in_executor(self.executor, extract_page_range, path, start, end) for start, end in ranges
+            ))
+            texts = [text for part in parts for text in part]
+
+            db = MongoDB.get_database()
+            if texts:
+                await db.documento_paginas.bulk_write(
+                    [
+                        UpdateOne({"hash": digest, "pagina": i + 1}, {"$set": {"texto": text}}, upsert=True)
+                        for i, text in enumerate(texts)
+                    ],
+                    ordered=False,
+                )
+            future.set_result(len(texts))
+            return len(texts)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._processing.pop(digest, None)
+
+    def _hash_file(self, path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _move_to_store(self, partial: Path, digest: str) -> str:
+        relative = self.store.relative_path(digest, ".pdf")
+        target = self.store.root / relative
+        if target.exists():
+            partial.unlink()
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(partial, target)
+        return relative
+
+    async def fetch(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Baixa (se mudou) e indexa o documento; retorna o registro em ``documentos``.
+
+        Chamadas simultâneas para a mesma URL (lotes que citam o mesmo
+        edital) compartilham um único download, já que o arquivo parcial
+        é por URL.
+        """
+        pending = self._fetching.get(url)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._fetching[url] = future
+        try:
+            documento = await self._fetch(url)
+            future.set_result(documento)
+            return documento
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._fetching.pop(url, None)
+
+    async def _fetch(self, url: str) -> Optional[Dict[str, Any]]:
+        db = MongoDB.get_database()
+        fonte = await db.documento_fontes.find_one({"_id": url})
+        try:
+            downloaded = await self._download(url, fonte)
+        except Exception as e:
+            logger.warning(f"Falha ao baixar documento {url}: {str(e)}")
+            return None
+
+        now = datetime.utcnow()
+        if downloaded is None:
+            logger.info(f"Documento {url} não mudou (304)")
+            await db.documento_fontes.update_one({"_id": url}, {"$set": {"verificado_em": now}})
+            return await db.documentos.find_one({"_id": fonte["hash"]})
+
+        partial, validators = downloaded
+        try:
+            digest = await asyncio.to_thread(self._hash_file, partial)
+            tamanho = partial.stat().st_size
+            relative = await asyncio.to_thread(self._move_to_store, partial, digest)
+        except Exception as e:
+            logger.warning(f"Falha ao guardar documento {url}: {str(e)}")
+            return None
+
+        documento = await db.documentos.find_one({"_id": digest})
+        if documento is None:
+            try:
+                paginas = await self._extract(digest, relative)
+            except Exception as e:
+                logger.error(f"Erro ao extrair texto de {url}: {str(e)}", exc_info=True)
+                return None
+            await db.documentos.update_one(
+                {"_id": digest},
+                {
+                    "$setOnInsert": {
+                        "arquivo": relative,
+                        "tamanho": tamanho,
+                        "paginas": paginas,
+                        "mime_type": validators.get("mime_type") or "application/pdf",
+                        "criado_em": now,
+                    },
+                    "$addToSet": {"fontes": url},
+                },
+                upsert=True,
+            )
+            documento = await db.documentos.find_one({"_id": digest})
+        else:
+            await db.documentos.update_one({"_id": digest}, {"$addToSet": {"fontes": url}})
+
+        await db.documento_fontes.update_one(
+            {"_id": url},
+            {"$set": {"hash": digest, "etag": validators.get("etag"), "last_modified": validators.get("last_modified"),
+                      "verificado_em": now}},
+            upsert=True,
+        )
+        return documento
+
+    async def fetch_many(self, urls: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        urls = [u for u in dict.fromkeys(urls) if u and u.startswith(("http://", "https://"))]
+        results = await asyncio.gather(*(self.fetch(u) for u in urls))
+        return {url: doc for url, doc in zip(urls, results) if doc}
+
+    async def ingest_extraction(self, page_url: str, urls: Iterable[str]) -> None:
+        """
+        Processa os documentos de uma extração e grava as referências no resultado.
+        """
+        try:
+            documentos = await self.fetch_many(urls)
+            if not documentos:
+                return
+            db = MongoDB.get_database()
+            await db.extraction_results.update_many(
+                {"url": page_url},
+                {"$set": {
+                    "documentos_indexados": [
+                        {"url": url, "hash": doc["_id"], "paginas": doc.get("paginas")} for url, doc in documentos.items()
+                    ],
+                    "atualizado_em": datetime.utcnow(),
+                }},
+            )
+        except Exception as e:
+            logger.error(f"Erro ao processar documentos de {page_url}: {str(e)}", exc_info=True)
+
+    def schedule(self, page_url: str, urls: Iterable[str]) -> None:
+        task = asyncio.create_task(self.ingest_extraction(page_url, list(urls)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def document_urls(documents: Optional[List[Dict[str, str]]]) -> List[str]:
+    """
+    URLs dos documentos enviados no callback de extração.
+    """
+    return [d.get("url") or d.get("href") for d in documents or [] if d.get("url") or d.get("href")]
+
+document_pipeline = DocumentPipeline()
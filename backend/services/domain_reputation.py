@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+CONFIAVEL = "confiável"
+FRAUDE = "fraude"
+SUSPEITO = "suspeito"
+DESCONHECIDO = "desconhecido"
+
+# Distância de edição máxima para considerar um domínio imitação
+LOOKALIKE_MAX_DISTANCE = int(os.getenv("LOOKALIKE_MAX_DISTANCE", "2"))
+
+# Sufixos removidos antes da comparação: trocar .com.br por .com não
+# deve esconder a semelhança
+PUBLIC_SUFFIXES = ("com.br", "net.br", "org.br", "gov.br", "leilao.br", "adv.br", "com", "net", "org", "br")
+
+# Caracteres de outros alfabetos e dígitos que imitam letras latinas
+HOMOGLYPHS = str.maketrans({
+    "а": "a", "е": "e", "о": "o", "р": "p", "с": "c", "х": "x", "у": "y", "і": "i", "ј": "j",
+    "ӏ": "l", "ԁ": "d", "һ": "h", "ѕ": "s", "ԛ": "q", "ԝ": "w", "ɡ": "g",
+    "α": "a", "ο": "o", "ρ": "p", "ν": "v", "τ": "t", "ι": "i", "κ": "k",
+    "0": "o", "1": "l", "3": "e", "5": "s", "7": "t", "@": "a", "_": "-",
+})
+# Sequências que imitam uma letra
+MULTIGLYPHS = (("rn", "m"), ("vv", "w"), ("cl", "d"))
+
+def normalize_host(host: str) -> str:
+    """
+    Normaliza um hostname para comparação com as tabelas de domínios.
+    """
+    return (host or "").strip().lower().rstrip(".")
+
+def _load_domains(filename: str) -> FrozenSet[str]:
+    path = DATA_DIR / filename
+    try:
+        with open(path, encoding="utf-8") as f:
+            domains = json.load(f).get("domains", [])
+        return frozenset(normalize_host(d) for d in domains)
+    except Exception as e:
+        logger.error(f"Erro ao carregar {path}: {str(e)}")
+        return frozenset()
+
+@lru_cache(maxsize=1)
+def load_domain_tables() -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """
+    Carrega (uma única vez) as tabelas de leiloeiros confiáveis e de fraudes.
+
+    Returns:
+        Tupla (domínios confiáveis, domínios de fraude)
+    """
+    trusted = _load_domains("leiloeiros.json")
+    fraud = _load_domains("fraudes.json")
+    logger.info(f"Tabelas de domínios carregadas: {len(trusted)} confiáveis, {len(fraud)} fraudes")
+    return trusted, fraud
+
+def classify_domain(host: str) -> str:
+    """
+    Classifica um domínio como confiável, fraude ou desconhecido.
+    """
+    trusted, fraud = load_domain_tables()
+    host = normalize_host(host)
+    if host in fraud:
+        return FRAUDE
+    if host in trusted:
+        return CONFIAVEL
+    return DESCONHECIDO
+
+def _decode_punycode(host: str) -> str:
+    labels = []
+    for label in host.split("."):
+        if label.startswith("xn--"):
+            try:
+                label = label.encode("ascii").decode("idna")
+            except UnicodeError:
+                pass
+        labels.append(label)
+    return ".".join(labels)
+
+def strip_suffix(host: str) -> str:
+    host = host[4:] if host.startswith("www.") else host
+    for suffix in PUBLIC_SUFFIXES:
+        if host.endswith("." + suffix):
+            return host[: -len(suffix) - 1]
+    return host
+
+def skeleton(host: str) -> str:
+    """
+    Forma canônica de um domínio para comparação visual: punycode
+    decodificado, sem acentos, homóglifos trocados pela letra latina e
+    sem www/sufixo público. "xn--sodresantor-w8i.com" vira "sodresantoro".
+    """
+    host = _decode_punycode(normalize_host(host))
+    host = unicodedata.normalize("NFKD", host)
+    host = "".join(c for c in host if not unicodedata.combining(c)).translate(HOMOGLYPHS)
+    for seq, letter in MULTIGLYPHS:
+        host = host.replace(seq, letter)
+    return strip_suffix(host)
+
+def levenshtein(a: str, b: str) -> int:
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+class BKTree:
+    """
+    Árvore BK sobre a distância de Levenshtein: cada consulta visita só os
+    ramos cuja distância ao nó está dentro da tolerância (desigualdade
+    triangular), em vez de comparar com todos os domínios.
+    """
+
+    def __init__(self, words=()):
+        self.root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        if self.root is None:
+            self.root = (word, {})
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            distance = levenshtein(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                self.size += 1
+                return
+            node = child
+
+    def nearest(self, word: str, max_distance: int) -> Optional[Tuple[str, int]]:
+        if self.root is None:
+            return None
+        best: Optional[Tuple[str, int]] = None
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = levenshtein(word, node_word)
+            if distance <= max_distance and (best is None or distance < best[1]):
+                best = (node_word, distance)
+                max_distance = distance
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return best
+
+class Lookalike(NamedTuple):
+    dominio: str
+    semelhante_a: str
+    distancia: int
+
+@lru_cache(maxsize=1)
+def load_lookalike_index() -> Tuple[BKTree, Dict[str, str]]:
+    """
+    Monta (uma única vez) a árvore BK com os esqueletos dos domínios
+    confiáveis e o mapa esqueleto -> domínio original.
+    """
+    trusted, _ = load_domain_tables()
+    originals: Dict[str, str] = {}
+    for domain in sorted(trusted, key=len):
+        originals.setdefault(skeleton(domain), domain[4:] if domain.startswith("www.") else domain)
+    tree = BKTree(originals)
+    logger.info(f"Índice de domínios parecidos montado: {tree.size} esqueletos")
+    return tree, originals
+
+def _tolerance(core: str) -> int:
+    # Nomes curtos ficam a uma letra de muitos outros; só exige igualdade
+    if len(core) < 5:
+        return 0
+    if len(core) < 8:
+        return min(1, LOOKALIKE_MAX_DISTANCE)
+    return LOOKALIKE_MAX_DISTANCE
+
+def _under_trusted(host: str, trusted: FrozenSet[str]) -> bool:
+    # O próprio domínio ou um subdomínio dele (m., imoveis.) é do leiloeiro
+    labels = host.split(".")
+    return any(".".join(labels[i:]) in trusted for i in range(len(labels)))
+
+@lru_cache(maxsize=4096)
+def find_lookalike(host: str) -> Optional[Lookalike]:
+    """
+    Domínio confiável mais parecido com ``host``, se ``host`` não for ele
+    mesmo confiável nem subdomínio de um confiável. Distância 0 significa mesmo esqueleto (homóglifo,
+    punycode ou troca de sufixo).
+    """
+    host = normalize_host(host)
+    trusted, _ = load_domain_tables()
+    if not host or _under_trusted(host, trusted):
+        return None
+    tree, originals = load_lookalike_index()
+    core = skeleton(host)
+    match = tree.nearest(core, _tolerance(core))
+    if match is None:
+        return None
+    return Lookalike(dominio=host, semelhante_a=originals[match[0]], distancia=match[1])
+
+def assess_domain(host: str) -> Dict[str, Optional[object]]:
+    """
+    Classificação do domínio com o leiloeiro imitado, para o resultado da análise.
+    """
+    classificacao = classify_domain(host)
+    suspeita = find_lookalike(host) if classificacao == DESCONHECIDO else None
+    return {
+        "classificacao": SUSPEITO if suspeita else classificacao,
+        "semelhante_a": suspeita.semelhante_a if suspeita else None,
+        "distancia": suspeita.distancia if suspeita else None,
+    }
@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from config import MongoDB
+from utils.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", str(Path(__file__).resolve().parent.parent / "media"))
+IMAGE_PUBLIC_PREFIX = os.getenv("IMAGE_PUBLIC_PREFIX", "/media")
+IMAGE_PER_HOST_LIMIT = int(os.getenv("IMAGE_PER_HOST_LIMIT", "4"))
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(15 * 1024 * 1024)))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(max((os.cpu_count() or 2) // 2, 1))))
+THUMBNAIL_SIZES = tuple(int(s) for s in os.getenv("THUMBNAIL_SIZES", "320,800").split(","))
+
+# Usuário de sistema gravado em Arquivo.criado_por nas imagens importadas
+SYSTEM_USER_ID = ObjectId(os.getenv("SYSTEM_USER_ID", "000000000000000000000000"))
+
+MIME_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+class ContentStore:
+    """
+    Armazenamento local endereçado por conteúdo (sha256).
+
+    Cada conteúdo é gravado uma única vez em ``ab/cd/<hash><ext>``; as
+    miniaturas ficam em ``thumbs/<tamanho>/ab/<hash>.jpg``.
+    """
+
+    def __init__(self, root: str = IMAGE_STORE_DIR, public_prefix: str = IMAGE_PUBLIC_PREFIX):
+        self.root = Path(root)
+        self.public_prefix = public_prefix.rstrip("/")
+
+    def relative_path(self, digest: str, ext: str) -> str:
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    def thumbnail_path(self, digest: str, size: int) -> str:
+        return f"thumbs/{size}/{digest[:2]}/{digest}.jpg"
+
+    def public_url(self, relative: str) -> str:
+        return f"{self.public_prefix}/{relative}"
+
+    def exists(self, relative: str) -> bool:
+        return (self.root / relative).exists()
+
+    def write(self, relative: str, data: bytes) -> None:
+        """
+        Grava de forma atômica (arquivo temporário + rename); roda em thread.
+        """
+        path = self.root / relative
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+def make_thumbnails(root: str, source: str, targets: List[Tuple[int, str]]) -> Dict[str, Any]:
+    """
+    Gera as miniaturas de uma imagem. Executa no pool de processos, por
+    isso recebe e devolve apenas tipos simples.
+    """
+    from PIL import Image
+
+    with Image.open(Path(root) / source) as image:
+        info = {"largura": image.width, "altura": image.height, "formato": image.format}
+        image = image.convert("RGB")
+        for size, relative in targets:
+            path = Path(root) / relative
+            if path.exists():
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            thumb = image.copy()
+            thumb.thumbnail((size, size))
+            tmp = path.with_suffix(".tmp")
+            thumb.save(tmp, "JPEG", quality=82, optimize=True)
+            os.replace(tmp, path)
+    return info
+
+def _sniff_mime(data: bytes, declared: Optional[str]) -> Optional[str]:
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    declared = (declared or "").split(";")[0].strip().lower()
+    return declared if declared in MIME_EXTENSIONS else None
+
+class ImagePipeline:
+    """
+    Baixa, deduplica e gera miniaturas das fotos dos imóveis.
+
+    Os downloads rodam em paralelo com limite por host. Cada imagem é
+    identificada pelo sha256 do conteúdo: a mesma foto usada em vários
+    lotes é gravada e redimensionada uma vez só, e um único registro
+    ``Arquivo`` acumula as URLs de origem em ``metadata.fontes``. URLs já
+    conhecidas não são baixadas de novo.
+    """
+
+    def __init__(
+        self,
+        store: Optional[ContentStore] = None,
+        per_host_limit: int = IMAGE_PER_HOST_LIMIT,
+        max_bytes: int = IMAGE_MAX_BYTES,
+        workers: int = IMAGE_WORKERS,
+        sizes: Iterable[int] = THUMBNAIL_SIZES,
+        executor=None,
+    ):
+        self.store = store or ContentStore()
+        self.per_host_limit = per_host_limit
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.sizes = tuple(sizes)
+        self._executor = executor
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._processing: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return semaphore
+
+    async def _download(self, url: str) -> Tuple[bytes, Optional[str]]:
+        async with self._host_limit(url):
+            async with get_http_client().stream("GET", url, follow_redirects=True) as response:
+                response.raise_for_status()
+                chunks, total = [], 0
+                async for chunk in response.aiter_bytes():
+                    total += len(chunk)
+                    if total > self.max_bytes:
+                        raise ValueError(f"Imagem maior que {self.max_bytes} bytes")
+                    chunks.append(chunk)
+                return b"".join(chunks), response.headers.get("content-type")
+
+    async def _store_content(self, digest: str, data: bytes, mime_type: str) -> Dict[str, Any]:
+        """
+        Grava o conteúdo e as miniaturas, uma vez por hash mesmo com downloads simultâneos.
+        """
+        pending = self._processing.get(digest)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._processing[digest] = future
+        try:
+            relative = self.store.relative_path(digest, MIME_EXTENSIONS[mime_type])
+            await asyncio.to_thread(self.store.write, relative, data)
+            thumbs = {str(size): self.store.thumbnail_path(digest, size) for size in self.sizes}
+            info = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                make_thumbnails,
+                str(self.store.root),
+                relative,
+                [(int(size), path) for size, path in thumbs.items()],
+            )
+            result = {
+                "relative": relative,
+                "thumbs": {size: self.store.public_url(path) for size, path in thumbs.items()},
+                **info,
+            }
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._processing.pop(digest, None)
+
+    async def _ingest_one(self, url: str, leilao_id: Optional[ObjectId]) -> Optional[Dict[str, Any]]:
+        try:
+            data, declared = await self._download(url)
+        except Exception as e:
+            logger.warning(f"Falha ao baixar imagem {url}: {str(e)}")
+            return None
+        mime_type = _sniff_mime(data, declared)
+        if mime_type is None:
+            logger.warning(f"Conteúdo de {url} não é uma imagem suportada")
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            return await self._register(url, digest, data, mime_type, leilao_id)
+        except Exception as e:
+            logger.error(f"Erro ao processar imagem {url}: {str(e)}", exc_info=True)
+            return None
+
+    async def _register(
+        self, url: str, digest: str, data: bytes, mime_type: str, leilao_id: Optional[ObjectId]
+    ) -> Dict[str, Any]:
+        db = MongoDB.get_database()
+        arquivo = await db.arquivos.find_one({"hash": digest})
+        if arquivo is None:
+            stored = await self._store_content(digest, data, mime_type)
+            metadata = {k: stored[k] for k in ("thumbs", "largura", "altura")}
+            now = datetime.utcnow()
+            try:
+                await db.arquivos.update_one(
+                    {"hash": digest},
+                    {
+                        "$setOnInsert": {
+                            "_id": ObjectId(),
+                            "nome": Path(urlparse(url).path).name or digest,
+                            "tipo": "imagem",
+                            "tamanho": len(data),
+                            "url": self.store.public_url(stored["relative"]),
+                            "mime_type": mime_type,
+                            "leilao_id": leilao_id,
+                            "ativo": True,
+                            "criado_em": now,
+                            "criado_por": SYSTEM_USER_ID,
+                            "metadata.thumbs": metadata["thumbs"],
+                            "metadata.largura": metadata["largura"],
+                            "metadata.altura": metadata["altura"],
+                        },
+                        "$set": {"atualizado_em": now},
+                        "$addToSet": {"metadata.fontes": url},
+                    },
+                    upsert=True,
+                )
+            except DuplicateKeyError:
+                # Outro worker registrou o mesmo conteúdo ao mesmo tempo
+                await db.arquivos.update_one({"hash": digest}, {"$addToSet": {"metadata.fontes": url}})
+            arquivo = await db.arquivos.find_one({"hash": digest})
+        else:
+            await db.arquivos.update_one({"_id": arquivo["_id"]}, {"$addToSet": {"metadata.fontes": url}})
+        return arquivo
+
+    async def ingest(self, urls: Iterable[str], leilao_id: Optional[ObjectId] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Importa as imagens e retorna, por URL de origem, o Arquivo correspondente.
+        """
+        urls = [u for u in dict.fromkeys(urls) if u and u.startswith(("http://", "https://"))]
+        if not urls:
+            return {}
+        db = MongoDB.get_database()
+        known: Dict[str, Dict[str, Any]] = {}
+        async for arquivo in db.arquivos.find({"metadata.fontes": {"$in": urls}}):
+            for fonte in arquivo.get("metadata", {}).get("fontes", []):
+                known[fonte] = arquivo
+
+        novas = [u for u in urls if u not in known]
+        results = await asyncio.gather(*(self._ingest_one(u, leilao_id) for u in novas))
+        known.update({url: arquivo for url, arquivo in zip(novas, results) if arquivo})
+        logger.info(f"{len(novas)} imagens baixadas, {len(urls) - len(novas)} já conhecidas")
+        return {url: known[url] for url in urls if url in known}
+
+    async def ingest_extraction(self, page_url: str, urls: Iterable[str]) -> None:
+        """
+        Importa as imagens de uma extração e grava as versões locais no resultado.
+        """
+        try:
+            arquivos = await self.ingest(urls)
+            if not arquivos:
+                return
+            imagens = [
+                {
+                    "origem": url,
+                    "url": a["url"],
+                    "hash": a["hash"],
+                    "thumbs": a.get("metadata", {}).get("thumbs", {}),
+                }
+                for url, a in arquivos.items()
+            ]
+            db = MongoDB.get_database()
+            await db.extraction_results.update_many({"url": page_url}, {"$set": {"imagens_locais": imagens, "atualizado_em": datetime.utcnow()}})
+        except Exception as e:
+            logger.error(f"Erro ao importar imagens de {page_url}: {str(e)}", exc_info=True)
+
+    def schedule(self, page_url: str, urls: Iterable[str]) -> None:
+        """
+        Agenda a importação em background, fora do ciclo da requisição.
+        """
+        task = asyncio.create_task(self.ingest_extraction(page_url, list(urls)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+image_pipeline = ImagePipeline()
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from utils.json_response import dumps
+
+logger = logging.getLogger(__name__)
+
+LIVE_FEED_MAX_FPS = float(os.getenv("LIVE_FEED_MAX_FPS", "4"))
+LIVE_FEED_QUEUE_SIZE = int(os.getenv("LIVE_FEED_QUEUE_SIZE", "256"))
+
+# Código de fechamento para consumidores lentos ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+Handler = Callable[[str, str], None]
+
+class InProcessBus:
+    """
+    Barramento de eventos dentro do próprio processo.
+
+    Implementações entre nós (Redis, NATS...) expõem a mesma interface:
+    ``publish`` envia a mensagem já serializada e ``subscribe`` registra
+    quem a entrega aos clientes locais.
+    """
+
+    def __init__(self):
+        self._handlers: List[Handler] = []
+
+    def subscribe(self, handler: Handler) -> None:
+        self._handlers.append(handler)
+
+    async def publish(self, channel: str, message: str) -> None:
+        for handler in self._handlers:
+            handler(channel, message)
+
+class Subscriber:
+    """
+    Conexão WebSocket inscrita em um ou mais leilões.
+
+    Os frames recebidos entre dois envios são agrupados em uma única
+    mensagem (um array JSON), limitando o cliente a ``max_fps`` mensagens
+    por segundo. A fila é limitada: se encher, o consumidor é considerado
+    lento e é desconectado.
+    """
+
+    def __init__(self, websocket, max_fps: float = LIVE_FEED_MAX_FPS, max_queue: int = LIVE_FEED_QUEUE_SIZE):
+        self.websocket = websocket
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.max_queue = max_queue
+        self.leiloes: Set[str] = set()
+        self.dropped = False
+        self.closed = False
+        self._queue: deque = deque()
+        self._ready = asyncio.Event()
+
+    def offer(self, frame: str) -> bool:
+        """
+        Enfileira um frame; retorna False se o consumidor ficou para trás.
+        """
+        if self.closed or self.dropped:
+            return False
+        if len(self._queue) >= self.max_queue:
+            self.dropped = True
+            self._queue.clear()
+            self._ready.set()
+            return False
+        self._queue.append(frame)
+        self._ready.set()
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def run(self) -> None:
+        """
+        Envia os frames enfileirados, no máximo ``max_fps`` mensagens por segundo.
+        """
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self.dropped:
+                logger.warning(f"Consumidor lento desconectado do feed ao vivo: {sorted(self.leiloes)}")
+                await self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+                return
+            if self.closed:
+                await self.websocket.close()
+                return
+            if not self._queue:
+                continue
+            frames = list(self._queue)
+            self._queue.clear()
+            # Os frames já vêm serializados: só concatena
+            await self.websocket.send_text("[" + ",".join(frames) + "]")
+            if self.interval:
+                await asyncio.sleep(self.interval)
+
+class LiveFeedHub:
+    """
+    Distribui os eventos dos leilões para as conexões inscritas.
+
+    Cada evento é serializado uma única vez na publicação; o mesmo texto
+    é repassado a todos os inscritos do leilão, em qualquer nó ligado ao
+    barramento.
+    """
+
+    def __init__(self, bus: Optional[InProcessBus] = None):
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self.set_bus(bus or InProcessBus())
+
+    def set_bus(self, bus) -> None:
+        """
+        Troca o barramento (por exemplo, por um compartilhado entre nós).
+        """
+        self.bus = bus
+        bus.subscribe(self.dispatch)
+
+    def subscribe(self, subscriber: Subscriber, leilao_ids: Iterable[str]) -> None:
+        for leilao_id in leilao_ids:
+            self._subscribers.setdefault(leilao_id, set()).add(subscriber)
+            subscriber.leiloes.add(leilao_id)
+
+    def unsubscribe(self, subscriber: Subscriber, leilao_ids: Optional[Iterable[str]] = None) -> None:
+        for leilao_id in list(leilao_ids if leilao_ids is not None else subscriber.leiloes):
+            subscribers = self._subscribers.get(leilao_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[leilao_id]
+            subscriber.leiloes.discard(leilao_id)
+
+    def watchers(self, leilao_id: str) -> int:
+        return len(self._subscribers.get(leilao_id, ()))
+
+    def dispatch(self, leilao_id: str, frame: str) -> None:
+        """
+        Entrega um frame recebido do barramento aos inscritos locais.
+        """
+        for subscriber in list(self._subscribers.get(leilao_id, ())):
+            if not subscriber.offer(frame):
+                self.unsubscribe(subscriber)
+
+    async def publish(self, leilao_id: Any, tipo: str, data: Dict[str, Any]) -> None:
+        """
+        Publica um evento do leilão. Falhas no feed nunca afetam quem publica.
+        """
+        try:
+            frame = dumps({
+                "leilao_id": leilao_id,
+                "tipo": tipo,
+                "data": data,
+                "ts": datetime.utcnow(),
+            }).decode()
+            await self.bus.publish(str(leilao_id), frame)
+        except Exception as e:
+            logger.error(f"Erro ao publicar evento {tipo} do leilão {leilao_id}: {str(e)}", exc_info=True)
+
+    async def close_all(self) -> None:
+        """
+        Fecha todas as conexões; usado no desligamento.
+        """
+        subscribers = {s for subs in self._subscribers.values() for s in subs}
+        for subscriber in subscribers:
+            subscriber.close()
+            self.unsubscribe(subscriber)
+
+live_feed = LiveFeedHub()
@@ -0,0 +1,276 @@
+import asyncio
+import importlib.util
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from config import MongoDB
+
+logger = logging.getLogger(__name__)
+
+# numpy é importado nas funções que o usam, não no import do app
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# Intervalo mínimo entre verificações de versão do catálogo no MongoDB
+ANALYTICS_VERSION_CHECK = float(os.getenv("ANALYTICS_VERSION_CHECK", "30"))
+ANALYTICS_OUTLIER_LIMIT = int(os.getenv("ANALYTICS_OUTLIER_LIMIT", "100"))
+
+PERCENTILES = (10, 25, 50, 75, 90)
+METRICS = ("preco_m2", "desconto", "preco")
+GROUPINGS = {
+    "cidade_tipo": ("estado", "cidade", "tipo"),
+    "cidade": ("estado", "cidade"),
+    "tipo": ("tipo",),
+    "estado": ("estado",),
+}
+
+PROJECTION = {
+    "url": 1,
+    "busca.estado": 1,
+    "busca.cidade": 1,
+    "busca.tipo": 1,
+    "busca.preco": 1,
+    "busca.avaliacao": 1,
+    "busca.desconto": 1,
+    "busca.area": 1,
+}
+
+class AnalyticsUnavailable(RuntimeError):
+    pass
+
+@dataclass
+class Snapshot:
+    """
+    Catálogo normalizado em colunas NumPy, imutável por versão.
+    """
+
+    version: Tuple[Any, ...]
+    urls: "np.ndarray"
+    labels: Dict[str, "np.ndarray"]
+    metrics: Dict[str, "np.ndarray"]
+    stats: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+def build_snapshot(version: Tuple[Any, ...], docs: List[Dict[str, Any]]) -> Snapshot:
+    """
+    Monta as colunas a partir da projeção do catálogo. Preços em reais,
+    preço/m² e desconto com NaN quando não há dado.
+    """
+    import numpy as np
+
+    buscas = [d.get("busca") or {} for d in docs]
+    preco = np.array([b.get("preco") if b.get("preco") is not None else np.nan for b in buscas], dtype=np.float64) / 100
+    area = np.array([b.get("area") or np.nan for b in buscas], dtype=np.float64)
+    desconto = np.array([b.get("desconto") if b.get("desconto") is not None else np.nan for b in buscas], dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        preco_m2 = np.where(area > 0, preco / area, np.nan)
+    labels = {
+        campo: np.array([b.get(campo) or "" for b in buscas], dtype=object)
+        for campo in ("estado", "cidade", "tipo")
+    }
+    return Snapshot(
+        version=version,
+        urls=np.array([d.get("url") for d in docs], dtype=object),
+        labels=labels,
+        metrics={"preco_m2": preco_m2, "desconto": desconto, "preco": preco},
+    )
+
+def group_codes(snapshot: Snapshot, campos: Tuple[str, ...]) -> Tuple["np.ndarray", List[Tuple[str, ...]]]:
+    """
+    Código inteiro do grupo de cada linha e a chave de cada código.
+    """
+    import numpy as np
+
+    keys = np.array(["\x1f".join(row) for row in zip(*(snapshot.labels[c] for c in campos))], dtype=object)
+    uniques, codes = np.unique(keys.astype(str), return_inverse=True)
+    return codes, [tuple(u.split("\x1f")) for u in uniques]
+
+def grouped_percentiles(values: "np.ndarray", codes: "np.ndarray", n_groups: int, percentiles=PERCENTILES) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Percentis por grupo sem laço em Python: ordena por (grupo, valor) e
+    interpola nas posições de cada percentil dentro do segmento do grupo.
+    Retorna (percentis [grupos x len(percentiles)], contagem por grupo).
+    """
+    import numpy as np
+
+    valid = ~np.isnan(values)
+    values, codes = values[valid], codes[valid]
+    order = np.lexsort((values, codes))
+    ordered = values[order]
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    q = np.asarray(percentiles, dtype=np.float64) / 100
+    pos = starts[:, None] + q[None, :] * np.maximum(counts - 1, 0)[:, None]
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    result = np.full(pos.shape, np.nan)
+    has = counts > 0
+    if ordered.size:
+        lo_c, hi_c = np.clip(lo, 0, ordered.size - 1), np.clip(hi, 0, ordered.size - 1)
+        interp = ordered[lo_c] + (ordered[hi_c] - ordered[lo_c]) * (pos - lo)
+        result[has] = interp[has]
+    return result, counts
+
+def grouped_means(values: "np.ndarray", codes: "np.ndarray", n_groups: int) -> "np.ndarray":
+    import numpy as np
+
+    valid = ~np.isnan(values)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
+    counts = np.bincount(codes[valid], minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def outlier_mask(values: "np.ndarray", codes: "np.ndarray", p25: "np.ndarray", p75: "np.ndarray") -> "np.ndarray":
+    """
+    Linhas fora das cercas de Tukey (1,5 x IQR) do próprio grupo.
+    """
+    import numpy as np
+
+    iqr = p75 - p25
+    low, high = (p25 - 1.5 * iqr)[codes], (p75 + 1.5 * iqr)[codes]
+    with np.errstate(invalid="ignore"):
+        return (values < low) | (values > high)
+
+def _number(value: float) -> Optional[float]:
+    import numpy as np
+
+    return None if np.isnan(value) else round(float(value), 2)
+
+def compute_stats(snapshot: Snapshot, agrupar: str) -> List[Dict[str, Any]]:
+    """
+    Estatísticas por grupo para todas as métricas do snapshot.
+    """
+    import numpy as np
+
+    campos = GROUPINGS[agrupar]
+    if not len(snapshot):
+        return []
+    codes, keys = group_codes(snapshot, campos)
+    n_groups = len(keys)
+    grupos = [{**dict(zip(campos, key)), "total": 0, "metricas": {}, "outliers": 0} for key in keys]
+    counts_total = np.bincount(codes, minlength=n_groups)
+    outliers_total = np.zeros(n_groups, dtype=np.int64)
+
+    p25_idx, p75_idx = PERCENTILES.index(25), PERCENTILES.index(75)
+    for metric in METRICS:
+        values = snapshot.metrics[metric]
+        pct, counts = grouped_percentiles(values, codes, n_groups)
+        means = grouped_means(values, codes, n_groups)
+        if metric == "preco_m2":
+            mask = outlier_mask(values, codes, pct[:, p25_idx], pct[:, p75_idx])
+            outliers_total = np.bincount(codes[mask], minlength=n_groups)
+        for g in range(n_groups):
+            grupos[g]["metricas"][metric] = {
+                "amostras": int(counts[g]),
+                "media": _number(means[g]),
+                **{f"p{p}": _number(pct[g, i]) for i, p in enumerate(PERCENTILES)},
+            }
+    for g in range(n_groups):
+        grupos[g]["total"] = int(counts_total[g])
+        grupos[g]["outliers"] = int(outliers_total[g])
+    return grupos
+
+def bargains(snapshot: Snapshot, agrupar: str = "cidade_tipo", limit: int = ANALYTICS_OUTLIER_LIMIT) -> List[Dict[str, Any]]:
+    """
+    Imóveis com preço/m² abaixo da cerca inferior do grupo, mais baratos primeiro
+    em relação à mediana.
+    """
+    import numpy as np
+
+    if not len(snapshot):
+        return []
+    codes, keys = group_codes(snapshot, GROUPINGS[agrupar])
+    values = snapshot.metrics["preco_m2"]
+    pct, _ = grouped_percentiles(values, codes, len(keys))
+    p25, p50, p75 = pct[:, PERCENTILES.index(25)], pct[:, PERCENTILES.index(50)], pct[:, PERCENTILES.index(75)]
+    low = (p25 - 1.5 * (p75 - p25))[codes]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = values / p50[codes]
+        rows = np.flatnonzero(values < low)
+    rows = rows[np.argsort(ratio[rows])][:limit]
+    return [
+        {
+            "url": snapshot.urls[i],
+            "preco_m2": _number(values[i]),
+            "mediana_grupo": _number(p50[codes[i]]),
+            **{campo: snapshot.labels[campo][i] for campo in GROUPINGS[agrupar]},
+        }
+        for i in rows
+    ]
+
+class MarketAnalytics:
+    """
+    Serve estatísticas de mercado a partir de um snapshot colunar em memória.
+
+    A versão do catálogo (quantidade de itens ativos e último timestamp)
+    é verificada no máximo a cada ``version_check`` segundos; enquanto
+    não muda, as respostas saem do cache calculado para aquela versão.
+    """
+
+    def __init__(self, version_check: float = ANALYTICS_VERSION_CHECK):
+        self.version_check = version_check
+        self._snapshot: Optional[Snapshot] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _current_version(self) -> Tuple[Any, ...]:
+        db = MongoDB.get_database()
+        ativos = await db.extraction_results.count_documents({"busca.ativo": True})
+        ultimo = await db.extraction_results.find_one({}, {"timestamp": 1}, sort=[("timestamp", -1)])
+        return ativos, (ultimo or {}).get("timestamp")
+
+    async def _load(self, version: Tuple[Any, ...]) -> Snapshot:
+        db = MongoDB.get_database()
+        cursor = db.extraction_results.find({"busca.ativo": True}, PROJECTION)
+        docs = [doc async for doc in cursor]
+        started = time.perf_counter()
+        snapshot = build_snapshot(version, docs)
+        logger.info(
+            f"Snapshot de mercado carregado: {len(snapshot)} imóveis em "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms (versão {version})"
+        )
+        return snapshot
+
+    async def snapshot(self) -> Snapshot:
+        if not HAS_NUMPY:
+            raise AnalyticsUnavailable("numpy não instalado")
+        if self._snapshot is not None and time.monotonic() - self._checked_at < self.version_check:
+            return self._snapshot
+        async with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.version_check:
+                return self._snapshot
+            version = await self._current_version()
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = await self._load(version)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    async def stats(self, agrupar: str = "cidade_tipo") -> Tuple[Tuple[Any, ...], List[Dict[str, Any]]]:
+        if agrupar not in GROUPINGS:
+            raise ValueError(f"Agrupamento inválido: {agrupar}")
+        snapshot = await self.snapshot()
+        if agrupar not in snapshot.stats:
+            snapshot.stats[agrupar] = compute_stats(snapshot, agrupar)
+        return snapshot.version, snapshot.stats[agrupar]
+
+    async def bargains(self, agrupar: str = "cidade_tipo") -> Tuple[Tuple[Any, ...], List[Dict[str, Any]]]:
+        if agrupar not in GROUPINGS:
+            raise ValueError(f"Agrupamento inválido: {agrupar}")
+        snapshot = await self.snapshot()
+        key = f"oportunidades:{agrupar}"
+        if key not in snapshot.stats:
+            snapshot.stats[key] = bargains(snapshot, agrupar)
+        return snapshot.version, snapshot.stats[key]
+
+    def invalidate(self) -> None:
+        self._checked_at = 0.0
+
+market_analytics = MarketAnalytics()
@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Set
+
+from pymongo import UpdateOne
+
+from config import MongoDB
+from services.property_search import search_fields
+from utils.normalization import NORMALIZATION_VERSION, normalized_fields
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "1000"))
+
+SOURCE_FIELDS = ("valor_minimo", "evaluated_value", "data_leilao")
+
+# Campos que search_fields lê além dos preços e datas
+SEARCH_FIELDS = (
+    "url", "address", "property_type", "auction_type", "cidade", "estado",
+    "quartos", "vagas", "area_privada", "aceita_financiamento", "aceita_fgts",
+)
+
+async def _latest_ids(db, urls: List[str]) -> Set[Any]:
+    """
+    _id do resultado mais recente de cada URL; só esses ficam ativos na busca.
+    """
+    rows = await db.extraction_results.aggregate([
+        {"$match": {"url": {"$in": urls}}},
+        {"$sort": {"timestamp": -1}},
+        {"$group": {"_id": "$url", "ultimo": {"$first": "$_id"}}},
+    ]).to_list(length=None)
+    return {row["ultimo"] for row in rows}
+
+async def backfill_extraction_results(batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Normaliza ``extraction_results`` em lotes por _id: preços em centavos,
+    desconto, data do leilão e o subdocumento ``busca``.
+    """
+    db = MongoDB.get_database()
+    projection = {field: 1 for field in SOURCE_FIELDS + SEARCH_FIELDS}
+    query: Dict[str, Any] = {"normalizacao": {"$ne": NORMALIZATION_VERSION}}
+    total = 0
+    while True:
+        docs = await db.extraction_results.find(query, projection).sort("_id", 1).limit(batch_size).to_list(
+            length=batch_size
+        )
+        if not docs:
+            return total
+        latest = await _latest_ids(db, list({d["url"] for d in docs if d.get("url")}))
+        now = datetime.utcnow()
+        ops = []
+        for doc in docs:
+            campos = normalized_fields(doc)
+            busca = search_fields({**doc, **campos})
+            busca["ativo"] = doc["_id"] in latest
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {**campos, "busca": busca, "atualizado_em": now}}))
+        await db.extraction_results.bulk_write(ops, ordered=False)
+        total += len(ops)
+        query["_id"] = {"$gt": docs[-1]["_id"]}
+        logger.info(f"Backfill de extraction_results: {total} documentos normalizados")
+
+async def backfill_pre_analysis_logs(batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Normaliza o resultado salvo em ``pre_analysis_logs``.
+    """
+    db = MongoDB.get_database()
+    projection = {f"result.{field}": 1 for field in SOURCE_FIELDS}
+    query: Dict[str, Any] = {"result": {"$type": "object"}, "result.normalizacao": {"$ne": NORMALIZATION_VERSION}}
+    total = 0
+    while True:
+        docs = await db.pre_analysis_logs.find(query, projection).sort("_id", 1).limit(batch_size).to_list(
+            length=batch_size
+        )
+        if not docs:
+            return total
+        now = datetime.utcnow()
+        ops = [
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {
+                    **{f"result.{k}": v for k, v in normalized_fields(doc["result"]).items()},
+                    "updated_at": now,
+                }},
+            )
+            for doc in docs
+        ]
+        await db.pre_analysis_logs.bulk_write(ops, ordered=False)
+        total += len(ops)
+        query["_id"] = {"$gt": docs[-1]["_id"]}
+        logger.info(f"Backfill de pre_analysis_logs: {total} documentos normalizados")
+
+async def run_backfill(batch_size: int = BACKFILL_BATCH_SIZE) -> Dict[str, int]:
+    return {
+        "extraction_results": await backfill_extraction_results(batch_size),
+        "pre_analysis_logs": await backfill_pre_analysis_logs(batch_size),
+    }
+
+async def _main(args: argparse.Namespace) -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    await MongoDB.connect_to_database(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    try:
+        totais = await run_backfill(args.lote)
+        for colecao, total in totais.items():
+            print(f"{colecao}: {total} documentos normalizados")
+    finally:
+        await MongoDB.close_database_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normaliza preços e datas dos documentos já gravados")
+    parser.add_argument("--lote", type=int, default=BACKFILL_BATCH_SIZE)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,330 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.models.email import EmailInDB
+from app.models.notificacao import NotificacaoCreate, NotificacaoInDB
+from app.models.push import PushCreate, PushInDB
+from app.models.sms import SMSInDB
+from config import MongoDB
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "10000"))
+NOTIFICATION_BATCH_WAIT = float(os.getenv("NOTIFICATION_BATCH_WAIT", "0.2"))
+NOTIFICATION_MAX_MESSAGES = int(os.getenv("NOTIFICATION_MAX_MESSAGES", "500"))
+NOTIFICATION_DEDUPE_WINDOW = float(os.getenv("NOTIFICATION_DEDUPE_WINDOW", "300"))
+NOTIFICATION_DEFAULT_LOCALE = os.getenv("NOTIFICATION_DEFAULT_LOCALE", "pt-BR")
+
+ENVIADO = "enviado"
+ERRO = "erro"
+
+LANCE_SUPERADO = "lance_superado"
+LEILAO_ENCERRADO = "leilao_encerrado"
+
+# (template, locale) -> campos com o texto do template
+TEMPLATES: Dict[Tuple[str, str], Dict[str, str]] = {
+    ("lance_superado", "pt-BR"): {
+        "titulo": "Seu lance foi superado",
+        "assunto": "Seu lance no leilão $leilao foi superado",
+        "mensagem": "Um novo lance de R$ $valor foi dado no leilão $leilao.",
+    },
+    ("leilao_encerrado", "pt-BR"): {
+        "titulo": "Leilão encerrado",
+        "assunto": "O leilão $leilao foi encerrado",
+        "mensagem": "O leilão $leilao foi encerrado com lance final de R$ $valor.",
+    },
+}
+
+@lru_cache(maxsize=256)
+def compile_template(template: str, locale: str) -> Dict[str, Template]:
+    """
+    Compila os campos do template uma única vez por template+locale.
+    """
+    fields = TEMPLATES.get((template, locale)) or TEMPLATES.get((template, NOTIFICATION_DEFAULT_LOCALE))
+    if fields is None:
+        raise KeyError(f"Template de notificação desconhecido: {template}")
+    return {name: Template(text) for name, text in fields.items()}
+
+def format_brl(valor: float) -> str:
+    return f"{valor:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+def render_template(template: str, locale: str, dados: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    return {
+        name: compiled.safe_substitute(dados or {})
+        for name, compiled in compile_template(template, locale).items()
+    }
+
+class TokenBucket:
+    """
+    Limite de taxa por provedor: ``rate`` tokens por segundo, até ``capacity``.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1) -> None:
+        tokens = min(tokens, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+class StubProvider:
+    """
+    Provedor local que só registra os envios; usado em desenvolvimento e testes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls: List[Tuple[List[str], Dict[str, str]]] = []
+
+    async def send(self, recipients: List[str], content: Dict[str, str]) -> List[str]:
+        """
+        Envia o mesmo conteúdo para vários destinatários e retorna os que falharam.
+        """
+        self.calls.append((list(recipients), content))
+        logger.debug(f"[{self.name}] envio simulado para {len(recipients)} destinatários")
+        return []
+
+@dataclass
+class Channel:
+    collection: str
+    model: type
+    content_fields: Tuple[str, ...]
+    batch_size: int
+    rate: float
+    provider: Any = None
+    bucket: Optional[TokenBucket] = None
+
+    def __post_init__(self):
+        self.bucket = self.bucket or TokenBucket(self.rate, max(self.rate, self.batch_size))
+
+@dataclass
+class _Pending:
+    doc: Dict[str, Any]
+    recipients: List[str]
+    content: Dict[str, str]
+    content_key: str
+
+def _default_channels() -> Dict[str, Channel]:
+    return {
+        "email": Channel("emails", EmailInDB, ("assunto", "mensagem"), batch_size=50,
+                         rate=float(os.getenv("EMAIL_RATE_LIMIT", "50")), provider=StubProvider("email")),
+        "sms": Channel("sms", SMSInDB, ("mensagem",), batch_size=100,
+                       rate=float(os.getenv("SMS_RATE_LIMIT", "20")), provider=StubProvider("sms")),
+        "push": Channel("push", PushInDB, ("titulo", "mensagem"), batch_size=500,
+                        rate=float(os.getenv("PUSH_RATE_LIMIT", "1000")), provider=StubProvider("push")),
+    }
+
+class NotificationDispatcher:
+    """
+    Despachante de notificações com uma fila e um consumidor por canal.
+
+    O consumidor junta as mensagens que chegam numa janela curta, agrupa
+    as de mesmo conteúdo e chama o provedor com lotes de destinatários,
+    respeitando o token bucket do canal. O status de todas as mensagens
+    do lote é gravado com um único bulk_write (upsert). Notificações
+    in-app (``Notificacao``) não passam por provedor: são gravadas com
+    insert_many. Destinatários que já receberam o mesmo conteúdo dentro
+    da janela de deduplicação são descartados na entrada.
+    """
+
+    def __init__(
+        self,
+        channels: Optional[Dict[str, Channel]] = None,
+        queue_size: int = NOTIFICATION_QUEUE_SIZE,
+        batch_wait: float = NOTIFICATION_BATCH_WAIT,
+        max_messages: int = NOTIFICATION_MAX_MESSAGES,
+        dedupe_window: float = NOTIFICATION_DEDUPE_WINDOW,
+    ):
+        self.channels = channels if channels is not None else _default_channels()
+        self.queue_size = queue_size
+        self.batch_wait = batch_wait
+        self.max_messages = max_messages
+        self.dedupe_window = dedupe_window
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._recent: Dict[Tuple[str, str, str], float] = {}
+
+    def _queue(self, channel: str) -> asyncio.Queue:
+        queue = self._queues.get(channel)
+        if queue is None:
+            queue = self._queues[channel] = asyncio.Queue(maxsize=self.queue_size)
+        worker = self._workers.get(channel)
+        if worker is None or worker.done():
+            self._workers[channel] = asyncio.create_task(self._run(channel, queue))
+        return queue
+
+    def _dedupe(self, channel: str, recipients: List[str], content_key: str) -> List[str]:
+        now = time.monotonic()
+        if len(self._recent) > 100_000:
+            self._recent = {k: t for k, t in self._recent.items() if now - t < self.dedupe_window}
+        fresh = []
+        for recipient in dict.fromkeys(recipients):
+            key = (channel, recipient, content_key)
+            seen = self._recent.get(key)
+            if seen is not None and now - seen < self.dedupe_window:
+                continue
+            self._recent[key] = now
+            fresh.append(recipient)
+        return fresh
+
+    async def enqueue(self, channel: str, message, locale: str = NOTIFICATION_DEFAULT_LOCALE) -> bool:
+        """
+        Enfileira um Email, SMS, Push ou Notificacao. Retorna False se todos
+        os destinatários já receberam o mesmo conteúdo dentro da janela.
+        """
+        if channel == "notificacao":
+            doc = NotificacaoInDB(**message.model_dump()).model_dump(by_alias=True)
+            recipients = [str(doc["usuario_id"])]
+            content = {"titulo": doc["titulo"], "mensagem": doc["mensagem"]}
+        else:
+            config = self.channels[channel]
+            doc = config.model(**message.model_dump()).model_dump(by_alias=True)
+            recipients = [str(r) for r in doc["destinatarios"]]
+            content = {name: doc.get(name) or "" for name in config.content_fields}
+            if doc.get("template"):
+                rendered = render_template(doc["template"], locale, doc.get("dados"))
+                content = {name: rendered.get(name, content[name]) for name in config.content_fields}
+
+        content_key = hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()
+        recipients = self._dedupe(channel, recipients, content_key)
+        if not recipients:
+            return False
+        await self._queue(channel).put(_Pending(doc, recipients, content, content_key))
+        return True
+
+    async def _run(self, channel: str, queue: asyncio.Queue) -> None:
+        while True:
+            batch = [await queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.batch_wait
+            while len(batch) < self.max_messages:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                if channel == "notificacao":
+                    await self._store_in_app(batch)
+                else:
+                    await self._deliver(channel, batch)
+            except Exception as e:
+                logger.error(f"Erro ao despachar lote de {channel}: {str(e)}", exc_info=True)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _store_in_app(self, batch: List[_Pending]) -> None:
+        db = MongoDB.get_database()
+        await db.notificacoes.insert_many([p.doc for p in batch], ordered=False)
+
+    async def _deliver(self, channel: str, batch: List[_Pending]) -> None:
+        config = self.channels[channel]
+        groups: Dict[str, List[_Pending]] = {}
+        for pending in batch:
+            groups.setdefault(pending.content_key, []).append(pending)
+
+        failed: Dict[str, str] = {}
+        for messages in groups.values():
+            recipients = list(dict.fromkeys(r for p in messages for r in p.recipients))
+            content = messages[0].content
+            for start in range(0, len(recipients), config.batch_size):
+                chunk = recipients[start:start + config.batch_size]
+                await config.bucket.acquire(len(chunk))
+                try:
+                    for recipient in await config.provider.send(chunk, content):
+                        failed[recipient] = "falha no provedor"
+                except Exception as e:
+                    logger.error(f"Erro no provedor de {channel}: {str(e)}")
+                    for recipient in chunk:
+                        failed[recipient] = str(e) or type(e).__name__
+
+        await self._write_status(config, batch, failed)
+
+    async def _write_status(self, config: Channel, batch: List[_Pending], failed: Dict[str, str]) -> None:
+        now = datetime.utcnow()
+        ops = []
+        for pending in batch:
+            erros = sorted({failed[r] for r in pending.recipients if r in failed})
+            status = {
+                "status": ERRO if erros else ENVIADO,
+                "erro": "; ".join(erros) or None,
+                "atualizado_em": now,
+                "enviado_em": None if erros else now,
+            }
+            insert = {k: v for k, v in pending.doc.items() if k not in status}
+            ops.append(UpdateOne({"_id": pending.doc["_id"]}, {"$set": status, "$setOnInsert": insert}, upsert=True))
+        db = MongoDB.get_database()
+        await db[config.collection].bulk_write(ops, ordered=False)
+        logger.info(f"{len(ops)} mensagens processadas em {config.collection} ({len(failed)} destinatários com erro)")
+
+    async def flush(self, timeout: float = 10.0) -> None:
+        """
+        Despacha as mensagens já enfileiradas; usado no desligamento gracioso.
+        """
+        queues = list(self._queues.values())
+        if queues:
+            try:
+                await asyncio.wait_for(asyncio.gather(*(q.join() for q in queues)), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.error("Tempo esgotado ao despachar notificações enfileiradas")
+        workers = list(self._workers.values())
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+
+notification_dispatcher = NotificationDispatcher()
+
+async def notify_users(
+    template: str,
+    usuarios: List[Any],
+    dados: Dict[str, Any],
+    tipo: str,
+    leilao_id: Optional[Any] = None,
+    lance_id: Optional[Any] = None,
+) -> None:
+    """
+    Avisa os usuários por push (um envio para todos) e por notificação
+    in-app, com o mesmo template.
+    """
+    usuarios = list(dict.fromkeys(usuarios))
+    if not usuarios:
+        return
+    await notification_dispatcher.enqueue(
+        "push", PushCreate(titulo="", mensagem="", destinatarios=usuarios, template=template, dados=dados)
+    )
+    texto = render_template(template, NOTIFICATION_DEFAULT_LOCALE, dados)
+    for usuario_id in usuarios:
+        await notification_dispatcher.enqueue("notificacao", NotificacaoCreate(
+            titulo=texto["titulo"],
+            mensagem=texto["mensagem"],
+            tipo=tipo,
+            usuario_id=usuario_id,
+            leilao_id=leilao_id,
+            lance_id=lance_id,
+        ))
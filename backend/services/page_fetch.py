@@ -0,0 +1,139 @@
+import hashlib
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from config import MongoDB
+from utils.http_client import get_http_client
+from utils.urls import canonical_url
+
+logger = logging.getLogger(__name__)
+
+PAGE_FETCH_TIMEOUT = float(os.getenv("PAGE_FETCH_TIMEOUT", "10"))
+
+# Headers para simular um navegador
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1'
+}
+
+def body_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+def conditional_headers(etag: Optional[str], last_modified: Optional[str]) -> Dict[str, str]:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+@dataclass
+class FetchedPage:
+    """
+    Resultado de uma busca condicional. ``extracao`` vem preenchida
+    quando a página não mudou desde a última extração guardada; nesse
+    caso ``text``/``content`` podem estar vazios (resposta 304).
+    """
+
+    url: str
+    canonical: str
+    status_code: int
+    text: str = ""
+    content: bytes = b""
+    hash: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    extracao: Optional[Dict[str, Any]] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def unchanged(self) -> bool:
+        return self.extracao is not None
+
+async def fetch_page(url: str, user_agent: Optional[str] = None) -> FetchedPage:
+    """
+    Baixa a página com If-None-Match/If-Modified-Since a partir dos
+    validadores guardados para a URL canônica. Em 304, ou se o corpo
+    tiver o mesmo hash, devolve a extração guardada em vez do conteúdo
+    para ser analisado de novo.
+
+    ``user_agent`` substitui o do navegador (usado pelo crawler, que se
+    identifica e respeita o robots.txt).
+    """
+    canonical = canonical_url(url)
+    db = MongoDB.get_database()
+    cached = await db.fetch_cache.find_one({"_id": canonical})
+    # Sem extração guardada não há o que reaproveitar num 304
+    if not cached or cached.get("extracao") is None:
+        cached = None
+
+    headers = dict(HEADERS)
+    if user_agent:
+        headers["User-Agent"] = user_agent
+    if cached:
+        headers.update(conditional_headers(cached.get("etag"), cached.get("last_modified")))
+    response = await get_http_client().get(url, headers=headers, follow_redirects=True, timeout=PAGE_FETCH_TIMEOUT)
+
+    if response.status_code == 304 and cached:
+        await db.fetch_cache.update_one({"_id": canonical}, {"$set": {"verificado_em": datetime.utcnow()}})
+        logger.info(f"Página não modificada (304): {url}")
+        return FetchedPage(
+            url=url, canonical=canonical, status_code=304, hash=cached.get("hash"),
+            etag=cached.get("etag"), last_modified=cached.get("last_modified"), extracao=cached["extracao"],
+        )
+    response.raise_for_status()
+
+    page = FetchedPage(
+        url=url,
+        canonical=canonical,
+        status_code=response.status_code,
+        text=response.text,
+        content=response.content,
+        hash=body_hash(response.content),
+        etag=response.headers.get("etag"),
+        last_modified=response.headers.get("last-modified"),
+        headers=dict(response.headers),
+    )
+    if cached and cached.get("hash") == page.hash:
+        # Servidor sem validadores (ou que os ignora), mas conteúdo idêntico
+        page.extracao = cached["extracao"]
+        await db.fetch_cache.update_one(
+            {"_id": canonical},
+            {"$set": {"etag": page.etag, "last_modified": page.last_modified, "verificado_em": datetime.utcnow()}},
+        )
+        logger.info(f"Conteúdo inalterado (mesmo hash): {url}")
+    return page
+
+async def store_extraction(page: FetchedPage, extracao: Dict[str, Any]) -> None:
+    """
+    Guarda os validadores, o hash e a extração da página para as
+    próximas buscas da mesma URL canônica.
+    """
+    now = datetime.utcnow()
+    db = MongoDB.get_database()
+    await db.fetch_cache.update_one(
+        {"_id": page.canonical},
+        {
+            "$set": {
+                "url": page.url,
+                "etag": page.etag,
+                "last_modified": page.last_modified,
+                "hash": page.hash,
+                "extracao": extracao,
+                "atualizado_em": now,
+                "verificado_em": now,
+            }
+        },
+        upsert=True,
+    )
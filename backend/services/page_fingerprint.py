@@ -0,0 +1,321 @@
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from config import MongoDB
+from services.domain_reputation import CONFIAVEL, classify_domain, normalize_host
+
+logger = logging.getLogger(__name__)
+
+# numpy é importado nas funções que o usam, não no import do app
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# Bits diferentes (de 64) para considerar duas páginas quase iguais
+FINGERPRINT_MAX_DISTANCE = int(os.getenv("FINGERPRINT_MAX_DISTANCE", "3"))
+# Inserções acumuladas antes de intercalá-las nas tabelas de bandas
+FINGERPRINT_MERGE_THRESHOLD = int(os.getenv("FINGERPRINT_MERGE_THRESHOLD", "4096"))
+
+# 64 bits em 4 bandas de 16: duas assinaturas a até 3 bits de distância
+# coincidem em pelo menos uma banda inteira
+BANDS = 4
+BAND_BITS = 64 // BANDS
+SHINGLE_SIZE = 3
+# Peso das marcas de estrutura em relação aos trechos de texto
+STRUCTURE_WEIGHT = 0.5
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+DIGITS_RE = re.compile(r"\d+")
+
+class _PageFeatures(HTMLParser):
+    """
+    Texto visível e sequência de tags (com classes) de uma página.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.words: List[str] = []
+        self.tags: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+            return
+        classes = next((v for k, v in attrs if k == "class" and v), "")
+        self.tags.append(f"{tag}.{'.'.join(sorted(classes.split()))}" if classes else tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            # Números mudam entre lotes do mesmo leiloeiro; só a forma importa
+            self.words.extend(DIGITS_RE.sub("0", w) for w in WORD_RE.findall(data.lower()))
+
+def page_features(html: str) -> Tuple[List[str], List[str]]:
+    """
+    Trechos de ``SHINGLE_SIZE`` palavras do texto visível e trechos de
+    tags consecutivas da estrutura.
+    """
+    parser = _PageFeatures()
+    parser.feed(html)
+    parser.close()
+    words, tags = parser.words, parser.tags
+    text = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 0))]
+    structure = [">".join(tags[i:i + SHINGLE_SIZE]) for i in range(max(len(tags) - SHINGLE_SIZE + 1, 0))]
+    return text, structure
+
+def _hashes(features: List[str]) -> "np.ndarray":
+    import numpy as np
+
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little") for f in set(features)],
+        dtype=np.uint64,
+    )
+
+def simhash(html: str) -> Optional[int]:
+    """
+    SimHash de 64 bits do texto e da estrutura da página; None se não
+    houver conteúdo suficiente para comparar.
+    """
+    import numpy as np
+
+    text, structure = page_features(html)
+    hashes = np.concatenate((_hashes(text), _hashes(structure)))
+    if not hashes.size:
+        return None
+    weights = np.concatenate((np.ones(len(set(text))), np.full(len(set(structure)), STRUCTURE_WEIGHT)))
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = (np.where(bits, 1.0, -1.0) * weights[:, None]).sum(axis=0)
+    packed = np.packbits(votes > 0, bitorder="little")
+    return int(packed.view(np.uint64)[0])
+
+def hamming(a: "np.ndarray", b: int) -> "np.ndarray":
+    import numpy as np
+
+    x = np.bitwise_xor(a, np.uint64(b))
+    return np.unpackbits(x.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+def _bands(fingerprints: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    shifts = np.arange(BANDS, dtype=np.uint64) * np.uint64(BAND_BITS)
+    return ((fingerprints[:, None] >> shifts) & np.uint64((1 << BAND_BITS) - 1)).astype(np.uint16)
+
+class FingerprintIndex:
+    """
+    Índice LSH por bandas sobre SimHash em arrays compactos: as
+    assinaturas (uint64), o domínio de cada uma (int32) e, por banda, os
+    valores ordenados (uint16) com a linha correspondente (int32).
+
+    Uma consulta faz uma busca binária por banda e só calcula a distância
+    de Hamming dos candidatos. Inserções ficam num buffer pequeno,
+    percorrido linearmente, até serem incorporadas às tabelas ordenadas.
+    """
+
+    def __init__(self, merge_threshold: int = FINGERPRINT_MERGE_THRESHOLD):
+        import numpy as np
+
+        self.merge_threshold = max(merge_threshold, 1)
+        self.fingerprints = np.empty(0, dtype=np.uint64)
+        self.domain_ids = np.empty(0, dtype=np.int32)
+        self.band_values = np.empty((BANDS, 0), dtype=np.uint16)
+        self.band_rows = np.empty((BANDS, 0), dtype=np.int32)
+        self.urls: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.domains: List[str] = []
+        self._domain_ids: Dict[str, int] = {}
+        self._pending_fp = np.empty(self.merge_threshold, dtype=np.uint64)
+        self._pending_dom = np.empty(self.merge_threshold, dtype=np.int32)
+        self._pending = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _domain_id(self, domain: str) -> int:
+        if domain not in self._domain_ids:
+            self._domain_ids[domain] = len(self.domains)
+            self.domains.append(domain)
+        return self._domain_ids[domain]
+
+    def _register(self, url: str) -> None:
+        if url in self.rows:
+            # Página alterada: a linha antiga fica órfã e é ignorada
+            self.urls[self.rows[url]] = None
+        self.rows[url] = len(self.urls)
+        self.urls.append(url)
+
+    def add(self, url: str, domain: str, fingerprint: int) -> None:
+        """
+        Inclui ou substitui a assinatura de uma URL.
+        """
+        self._register(url)
+        self._pending_fp[self._pending] = fingerprint
+        self._pending_dom[self._pending] = self._domain_id(domain)
+        self._pending += 1
+        if self._pending == self.merge_threshold:
+            self.merge()
+
+    def extend(self, urls: List[str], domains: List[str], fingerprints: "np.ndarray") -> None:
+        """
+        Carga em lote: incorpora as assinaturas direto nas tabelas ordenadas.
+        """
+        import numpy as np
+
+        self.merge()
+        for url in urls:
+            self._register(url)
+        self._merge_arrays(
+            np.asarray(fingerprints, dtype=np.uint64),
+            np.array([self._domain_id(d) for d in domains], dtype=np.int32),
+        )
+
+    def merge(self) -> None:
+        if self._pending:
+            self._merge_arrays(self._pending_fp[:self._pending].copy(), self._pending_dom[:self._pending].copy())
+            self._pending = 0
+
+    def _merge_arrays(self, new_fp: "np.ndarray", new_dom: "np.ndarray") -> None:
+        import numpy as np
+
+        start = len(self.fingerprints)
+        self.fingerprints = np.concatenate((self.fingerprints, new_fp))
+        self.domain_ids = np.concatenate((self.domain_ids, new_dom))
+        new_rows = np.arange(start, start + len(new_fp), dtype=np.int32)
+        new_bands = _bands(new_fp).T
+        values, rows = [], []
+        for b in range(BANDS):
+            # Intercala os novos valores já ordenados sem reordenar o índice todo
+            order = np.argsort(new_bands[b], kind="stable")
+            at = np.searchsorted(self.band_values[b], new_bands[b][order], side="right")
+            values.append(np.insert(self.band_values[b], at, new_bands[b][order]))
+            rows.append(np.insert(self.band_rows[b], at, new_rows[order]))
+        self.band_values = np.stack(values)
+        self.band_rows = np.stack(rows)
+
+    def query(self, fingerprint: int, max_distance: int = FINGERPRINT_MAX_DISTANCE) -> List[Tuple[str, str, int]]:
+        """
+        (url, domínio, distância) das páginas a até ``max_distance`` bits,
+        mais próximas primeiro.
+        """
+        import numpy as np
+
+        bands = _bands(np.array([fingerprint], dtype=np.uint64))[0]
+        found = []
+        for b in range(BANDS):
+            lo = np.searchsorted(self.band_values[b], bands[b], side="left")
+            hi = np.searchsorted(self.band_values[b], bands[b], side="right")
+            found.append(self.band_rows[b, lo:hi])
+        rows = np.unique(np.concatenate(found))
+        fps = np.concatenate((self.fingerprints[rows], self._pending_fp[:self._pending]))
+        doms = np.concatenate((self.domain_ids[rows], self._pending_dom[:self._pending]))
+        rows = np.concatenate((rows, len(self.fingerprints) + np.arange(self._pending)))
+        if not len(rows):
+            return []
+        dist = hamming(fps, fingerprint)
+        keep = np.flatnonzero(dist <= max_distance)
+        return [
+            (self.urls[rows[i]], self.domains[doms[i]], int(dist[i]))
+            for i in keep[np.argsort(dist[keep], kind="stable")]
+            if self.urls[rows[i]] is not None
+        ]
+
+def _signed(fingerprint: int) -> int:
+    # MongoDB só guarda inteiros de 64 bits com sinal
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+class CloneDetector:
+    """
+    Guarda a assinatura de cada página analisada e sinaliza páginas de
+    domínios não confiáveis quase idênticas a páginas de leiloeiros
+    confiáveis.
+    """
+
+    def __init__(self):
+        self.index: Optional[FingerprintIndex] = None
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self) -> None:
+        """
+        Carrega as assinaturas persistidas, uma vez por worker.
+        """
+        if not HAS_NUMPY:
+            logger.warning("numpy não instalado; detecção de páginas clonadas desativada")
+            return
+        import numpy as np
+
+        async with self._load_lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            index = FingerprintIndex()
+            db = MongoDB.get_database()
+            urls, domains, fingerprints = [], [], []
+            async for doc in db.page_fingerprints.find({}, {"simhash": 1, "dominio": 1}):
+                urls.append(doc["_id"])
+                domains.append(doc["dominio"])
+                fingerprints.append(doc["simhash"])
+            index.extend(urls, domains, np.array(fingerprints, dtype=np.int64).view(np.uint64))
+            self.index = index
+            self.loaded = True
+            logger.info(
+                f"Índice de assinaturas de páginas carregado: {len(index)} páginas "
+                f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+            )
+
+    def schedule_load(self) -> None:
+        if self.loaded or not HAS_NUMPY:
+            return
+        task = asyncio.create_task(self.load())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def check(self, url: str, html: str) -> Optional[Dict[str, Any]]:
+        """
+        Registra a assinatura da página e, se o domínio não for confiável,
+        devolve a página confiável mais parecida (ou None).
+        """
+        if not HAS_NUMPY:
+            return None
+        await self.load()
+        fingerprint = await asyncio.to_thread(simhash, html)
+        if fingerprint is None:
+            return None
+        domain = normalize_host(urlparse(url).hostname or "")
+        confiavel = classify_domain(domain) == CONFIAVEL
+
+        clone = None
+        if not confiavel:
+            for match_url, match_domain, distance in self.index.query(fingerprint):
+                if match_domain != domain and classify_domain(match_domain) == CONFIAVEL:
+                    clone = {"semelhante_a": match_url, "dominio": match_domain, "distancia": distance}
+                    break
+
+        self.index.add(url, domain, fingerprint)
+        db = MongoDB.get_database()
+        await db.page_fingerprints.update_one(
+            {"_id": url},
+            {"$set": {"simhash": _signed(fingerprint), "dominio": domain, "confiavel": confiavel,
+                      "timestamp": datetime.utcnow()}},
+            upsert=True,
+        )
+        if clone:
+            logger.warning(f"Página de {domain} parecida com {clone['semelhante_a']} ({clone['distancia']} bits)")
+        return clone
+
+clone_detector = CloneDetector()
@@ -0,0 +1,239 @@
+import asyncio
+import base64
+import logging
+import re
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+from bson.errors import BSONError
+
+from config import MongoDB
+from utils.normalization import discount_percent, parse_br_datetime, parse_brl_cents
+
+logger = logging.getLogger(__name__)
+
+# Ordenações aceitas: nome público -> (campo, direção)
+SORTS = {
+    "preco": ("busca.preco", 1),
+    "-preco": ("busca.preco", -1),
+    "-desconto": ("busca.desconto", -1),
+    "data_fim": ("busca.data_fim", 1),
+}
+
+FACET_FIELDS = ("estado", "cidade", "tipo", "modalidade")
+
+RESULT_PROJECTION = {"url": 1, "titulo": 1, "imagem": 1, "imagens_locais": 1, "busca": 1}
+
+MAX_LIMIT = 100
+
+def normalize_term(value: Optional[str]) -> Optional[str]:
+    """
+    Minúsculas e sem acentos, para que "São Paulo" e "sao paulo" coincidam.
+    """
+    if not value:
+        return None
+    value = unicodedata.normalize("NFKD", str(value))
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", value).strip().lower() or None
+
+def _to_int(value: Any) -> Optional[int]:
+    match = re.search(r"\d+", str(value)) if value is not None else None
+    return int(match.group()) if match else None
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"\d+(?:\.\d{3})*(?:,\d+)?", str(value))
+    return float(match.group().replace(".", "").replace(",", ".")) if match else None
+
+def _to_bool(value: Any) -> Optional[bool]:
+    if value is None or isinstance(value, bool):
+        return value
+    return normalize_term(value) in ("sim", "s", "true", "1")
+
+def _city_state(address: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Extrai cidade e UF do fim de um endereço ("..., Curitiba - PR").
+    """
+    match = re.search(r"([^,\-/]+?)\s*[-/]\s*([A-Z]{2})\s*(?:,?\s*\d{5}-?\d{3})?\s*$", address or "")
+    if not match:
+        return None, None
+    return match.group(1).strip(), match.group(2)
+
+def search_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Monta o subdocumento ``busca`` com os campos normalizados usados
+    pelos filtros e ordenações (preços em centavos, datas reais).
+    """
+    cidade, estado = _city_state(data.get("address"))
+    preco = data.get("valor_minimo_centavos", parse_brl_cents(data.get("valor_minimo")))
+    avaliacao = data.get("valor_avaliacao_centavos", parse_brl_cents(data.get("evaluated_value")))
+    desconto = data.get("desconto_percentual", discount_percent(preco, avaliacao))
+    return {
+        "ativo": True,
+        "estado": (data.get("estado") or estado or "").upper() or None,
+        "cidade": normalize_term(data.get("cidade") or cidade),
+        "tipo": normalize_term(data.get("property_type")),
+        "modalidade": normalize_term(data.get("auction_type")),
+        "preco": preco,
+        "avaliacao": avaliacao,
+        "desconto": desconto,
+        "quartos": _to_int(data.get("quartos")),
+        "vagas": _to_int(data.get("vagas")),
+        "area": _to_float(data.get("area_privada")),
+        "aceita_financiamento": _to_bool(data.get("aceita_financiamento")),
+        "aceita_fgts": _to_bool(data.get("aceita_fgts")),
+        "data_fim": data.get("data_leilao_em", parse_br_datetime(data.get("data_leilao"))),
+    }
+
+async def retire_previous(url: str, result_id: Any) -> None:
+    """
+    Tira da busca os resultados anteriores da URL; só o mais recente fica ativo.
+    """
+    db = MongoDB.get_database()
+    await db.extraction_results.update_many(
+        {"url": url, "_id": {"$ne": result_id}, "busca.ativo": True}, {"$set": {"busca.ativo": False, "atualizado_em": datetime.utcnow()}}
+    )
+
+def build_filter(
+    cidade: Optional[str] = None,
+    estado: Optional[str] = None,
+    tipo: Optional[str] = None,
+    modalidade: Optional[str] = None,
+    preco_min: Optional[float] = None,
+    preco_max: Optional[float] = None,
+    quartos: Optional[int] = None,
+    vagas: Optional[int] = None,
+    desconto_min: Optional[float] = None,
+    area_min: Optional[float] = None,
+    aceita_financiamento: Optional[bool] = None,
+    aceita_fgts: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Converte os filtros da tela de imóveis numa consulta sobre ``busca``.
+    Igualdades primeiro e faixas depois, na ordem dos índices compostos.
+    """
+    query: Dict[str, Any] = {"busca.ativo": True}
+    if estado:
+        query["busca.estado"] = estado.upper()
+    if cidade:
+        query["busca.cidade"] = normalize_term(cidade)
+    if tipo:
+        query["busca.tipo"] = normalize_term(tipo)
+    if modalidade:
+        query["busca.modalidade"] = normalize_term(modalidade)
+    if aceita_financiamento is not None:
+        query["busca.aceita_financiamento"] = aceita_financiamento
+    if aceita_fgts is not None:
+        query["busca.aceita_fgts"] = aceita_fgts
+
+    preco = {}
+    if preco_min:
+        preco["$gte"] = parse_brl_cents(preco_min)
+    if preco_max:
+        preco["$lte"] = parse_brl_cents(preco_max)
+    if preco:
+        query["busca.preco"] = preco
+    for campo, minimo in (("quartos", quartos), ("vagas", vagas), ("desconto", desconto_min), ("area", area_min)):
+        if minimo:
+            query[f"busca.{campo}"] = {"$gte": minimo}
+    return query
+
+def encode_cursor(value: Any, doc_id: Any) -> str:
+    return base64.urlsafe_b64encode(json_util.dumps([value, doc_id]).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """
+    Decodifica o cursor de ``encode_cursor``; ValueError se ele não tiver
+    esse formato, para a rota responder 422.
+    """
+    try:
+        decoded = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, BSONError):
+        decoded = None
+    if not isinstance(decoded, list) or len(decoded) != 2:
+        raise ValueError(f"Cursor inválido: {cursor}")
+    value, doc_id = decoded
+    return value, doc_id
+
+def _keyset(field: str, direction: int, cursor: str) -> Dict[str, Any]:
+    """
+    Condição "depois do último item da página anterior" para (campo, _id).
+    """
+    value, doc_id = decode_cursor(cursor)
+    op = "$gt" if direction == 1 else "$lt"
+    return {"$or": [{field: {op: value}}, {field: value, "_id": {op: doc_id}}]}
+
+def _sortable(query: Dict[str, Any], field: str) -> Dict[str, Any]:
+    """
+    Restringe a consulta a documentos com o campo de ordenação preenchido
+    (o cursor não sabe posicionar nulos). Vale para resultados e facetas,
+    para o total bater com o que a paginação entrega.
+    """
+    condition = query.get(field)
+    if condition is None:
+        return {**query, field: {"$ne": None}}
+    if isinstance(condition, dict):
+        return {**query, field: {**condition, "$ne": None}}
+    return query
+
+async def _results(query: Dict[str, Any], sort: str, limit: int, cursor: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+    field, direction = SORTS[sort]
+    conditions = [query]
+    if cursor:
+        conditions.append(_keyset(field, direction, cursor))
+    db = MongoDB.get_database()
+    docs = await db.extraction_results.find({"$and": conditions}, RESULT_PROJECTION).sort(
+        [(field, direction), ("_id", direction)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last["busca"][field.split(".", 1)[1]], last["_id"])
+    return docs, next_cursor
+
+async def _facets(query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Contagens por estado, cidade, tipo e modalidade, mais o total, numa
+    única passada de agregação sobre os documentos filtrados.
+    """
+    facet = {campo: [{"$sortByCount": f"$busca.{campo}"}, {"$limit": 50}] for campo in FACET_FIELDS}
+    facet["total"] = [{"$count": "total"}]
+    db = MongoDB.get_database()
+    rows = await db.extraction_results.aggregate([{"$match": query}, {"$facet": facet}]).to_list(length=1)
+    row = rows[0] if rows else {}
+    facetas = {
+        campo: [{"valor": item["_id"], "total": item["count"]} for item in row.get(campo, []) if item["_id"] is not None]
+        for campo in FACET_FIELDS
+    }
+    total = row.get("total") or [{"total": 0}]
+    return {"facetas": facetas, "total": total[0]["total"]}
+
+async def search_properties(
+    filtros: Dict[str, Any],
+    ordenar: str = "preco",
+    limite: int = 20,
+    cursor: Optional[str] = None,
+    facetas: bool = True,
+) -> Dict[str, Any]:
+    """
+    Busca paginada por cursor (keyset) sobre os índices compostos; as
+    facetas rodam em paralelo e só são pedidas quando necessário.
+    """
+    if ordenar not in SORTS:
+        raise ValueError(f"Ordenação inválida: {ordenar}")
+    query = _sortable(build_filter(**filtros), SORTS[ordenar][0])
+    limite = max(1, min(limite, MAX_LIMIT))
+    if facetas:
+        (resultados, proximo), extra = await asyncio.gather(
+            _results(query, ordenar, limite, cursor), _facets(query)
+        )
+    else:
+        (resultados, proximo), extra = await _results(query, ordenar, limite, cursor), {}
+    return {"resultados": resultados, "proximo_cursor": proximo, **extra}
@@ -0,0 +1,348 @@
+import asyncio
+import heapq
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from config import MongoDB
+from services.page_fetch import HEADERS, body_hash, conditional_headers
+from utils.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+RECRAWL_ENABLED = os.getenv("RECRAWL_ENABLED", "true").lower() == "true"
+RECRAWL_MIN_INTERVAL = float(os.getenv("RECRAWL_MIN_INTERVAL", "900"))
+RECRAWL_MAX_INTERVAL = float(os.getenv("RECRAWL_MAX_INTERVAL", "172800"))
+# Requisições por minuto permitidas para cada domínio de leiloeiro
+RECRAWL_DOMAIN_BUDGET = float(os.getenv("RECRAWL_DOMAIN_BUDGET", "30"))
+RECRAWL_CONCURRENCY = int(os.getenv("RECRAWL_CONCURRENCY", "8"))
+RECRAWL_HORIZON = float(os.getenv("RECRAWL_HORIZON", "300"))
+RECRAWL_BATCH = int(os.getenv("RECRAWL_BATCH", "5000"))
+# Prazo da reserva de uma URL por um nó; expirada, outro nó pode buscá-la
+RECRAWL_CLAIM_TTL = float(os.getenv("RECRAWL_CLAIM_TTL", "300"))
+# Por quanto tempo depois do leilão a página continua monitorada
+RECRAWL_GRACE = float(os.getenv("RECRAWL_GRACE", "86400"))
+
+# Campos da extração comparados a cada visita
+MONITORED_FIELDS = (
+    "titulo",
+    "valor_minimo",
+    "imagem",
+    "data_leilao",
+    "valor_minimo_centavos",
+    "valor_avaliacao_centavos",
+    "desconto_percentual",
+    "data_leilao_em",
+)
+# Visitas mínimas previstas entre agora e a data do leilão
+VISITS_BEFORE_AUCTION = 4
+
+def _to_mongo_precision(when: datetime) -> datetime:
+    # O MongoDB guarda milissegundos; o prazo é comparado por igualdade na reserva
+    return when.replace(microsecond=when.microsecond // 1000 * 1000)
+
+def next_interval(
+    sem_mudanca: int,
+    data_leilao_em: Optional[datetime],
+    now: datetime,
+    min_interval: float = RECRAWL_MIN_INTERVAL,
+    max_interval: float = RECRAWL_MAX_INTERVAL,
+) -> float:
+    """
+    Intervalo até a próxima visita: dobra a cada visita sem mudança e,
+    com leilão futuro, nunca passa de uma fração do tempo restante, o que
+    aperta o monitoramento conforme a data se aproxima.
+    """
+    interval = min_interval * 2 ** min(sem_mudanca, 16)
+    if data_leilao_em is not None:
+        restante = (data_leilao_em - now).total_seconds()
+        if restante > 0:
+            interval = min(interval, restante / VISITS_BEFORE_AUCTION)
+    return max(min_interval, min(interval, max_interval))
+
+def changed_fields(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Campos monitorados com valor diferente, no formato {campo: {de, para}}.
+    """
+    return {
+        campo: {"de": old.get(campo), "para": new.get(campo)}
+        for campo in MONITORED_FIELDS
+        if old.get(campo) != new.get(campo)
+    }
+
+class DomainBudget:
+    """
+    Balde de fichas por domínio: ``per_minute`` requisições por minuto,
+    com rajada de até um minuto de fichas.
+    """
+
+    def __init__(self, per_minute: float = RECRAWL_DOMAIN_BUDGET):
+        self.rate = per_minute / 60
+        self.capacity = max(per_minute, 1.0)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def take(self, domain: str, now: Optional[float] = None) -> float:
+        """
+        Consome uma ficha; retorna 0 ou os segundos até haver ficha.
+        """
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.get(domain, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            self._buckets[domain] = (tokens - 1, now)
+            return 0.0
+        self._buckets[domain] = (tokens, now)
+        return (1 - tokens) / self.rate
+
+class RecrawlScheduler:
+    """
+    Revisita as páginas já analisadas para acompanhar preço, data e
+    status dos lotes.
+
+    Como no agendador de leilões, só as visitas do próximo horizonte
+    ficam num heap em memória; o restante espera no MongoDB, indexado por
+    ``proxima_em``. Cada visita é reservada por um update condicional,
+    então vários nós podem rodar o agendador. O orçamento por domínio é
+    por nó: visitas sem ficha voltam ao heap para quando houver.
+    """
+
+    def __init__(
+        self,
+        horizon: float = RECRAWL_HORIZON,
+        concurrency: int = RECRAWL_CONCURRENCY,
+        budget: Optional[DomainBudget] = None,
+    ):
+        self.horizon = horizon
+        self.budget = budget or DomainBudget()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # (vez, seq, url, domínio, prazo): a vez só difere do prazo quando
+        # a visita foi adiada pelo orçamento do domínio
+        self._heap: List[Tuple[datetime, int, str, str, datetime]] = []
+        self._scheduled: Set[Tuple[str, datetime]] = set()
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._next_reload: Optional[datetime] = None
+
+    def schedule(self, url: str, dominio: str, when: datetime, vez: Optional[datetime] = None) -> None:
+        if (url, when) in self._scheduled:
+            return
+        self._scheduled.add((url, when))
+        self._seq += 1
+        heapq.heappush(self._heap, (vez or when, self._seq, url, dominio, when))
+        self._wakeup.set()
+
+    async def track(
+        self,
+        url: str,
+        campos: Dict[str, Any],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        hash_conteudo: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ) -> None:
+        """
+        Passa a monitorar uma URL analisada (ou reinicia o monitoramento
+        com o resultado novo).
+        """
+        now = now or datetime.utcnow()
+        dominio = urlparse(url).hostname or ""
+        data_leilao_em = campos.get("data_leilao_em")
+        proxima_em = _to_mongo_precision(now + timedelta(seconds=next_interval(0, data_leilao_em, now)))
+        db = MongoDB.get_database()
+        await db.monitoramento.update_one(
+            {"_id": url},
+            {
+                "$set": {
+                    "dominio": dominio,
+                    "ativo": True,
+                    "campos": {campo: campos.get(campo) for campo in MONITORED_FIELDS},
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "hash": hash_conteudo,
+                    "sem_mudanca": 0,
+                    "falhas": 0,
+                    "data_leilao_em": data_leilao_em,
+                    "ultima_verificacao": now,
+                    "proxima_em": proxima_em,
+                },
+                "$setOnInsert": {"criado_em": now},
+            },
+            upsert=True,
+        )
+        if proxima_em <= now + timedelta(seconds=self.horizon):
+            self.schedule(url, dominio, proxima_em)
+
+    async def load_horizon(self, now: Optional[datetime] = None) -> int:
+        """
+        Carrega do MongoDB as visitas com prazo até agora + horizonte.
+        """
+        now = now or datetime.utcnow()
+        db = MongoDB.get_database()
+        cursor = db.monitoramento.find(
+            {"ativo": True, "proxima_em": {"$lte": now + timedelta(seconds=self.horizon)}},
+            {"dominio": 1, "proxima_em": 1},
+        ).sort("proxima_em", 1).limit(RECRAWL_BATCH)
+        total = 0
+        async for doc in cursor:
+            self.schedule(doc["_id"], doc.get("dominio", ""), doc["proxima_em"])
+            total += 1
+        self._next_reload = now + timedelta(seconds=self.horizon / 2)
+        return total
+
+    async def _claim(self, url: str, when: datetime, now: datetime) -> Optional[Dict[str, Any]]:
+        db = MongoDB.get_database()
+        return await db.monitoramento.find_one_and_update(
+            {"_id": url, "ativo": True, "proxima_em": when},
+            {"$set": {"proxima_em": now + timedelta(seconds=RECRAWL_CLAIM_TTL)}},
+        )
+
+    async def _fetch(self, doc: Dict[str, Any]):
+        headers = {
+            "User-Agent": HEADERS["User-Agent"],
+            "Accept-Language": HEADERS["Accept-Language"],
+            **conditional_headers(doc.get("etag"), doc.get("last_modified")),
+        }
+        return await get_http_client().get(doc["_id"], headers=headers, follow_redirects=True)
+
+    async def refresh(self, doc: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Revisita uma URL monitorada e grava só os campos que mudaram.
+        Retorna as alterações encontradas.
+        """
+        # Import tardio: analysis_service registra as URLs neste módulo
+        from services.analysis_service import extract_basic_data
+
+        now = now or datetime.utcnow()
+        url = doc["_id"]
+        db = MongoDB.get_database()
+        campos = doc.get("campos") or {}
+        update: Dict[str, Any] = {"ultima_verificacao": now, "falhas": 0}
+        alteracoes: Dict[str, Dict[str, Any]] = {}
+        ativo = True
+
+        response = await self._fetch(doc)
+        if response.status_code in (404, 410):
+            ativo = False
+            update["motivo"] = "removido"
+        elif response.status_code != 304:
+            response.raise_for_status()
+            digest = body_hash(response.content)
+            if digest != doc.get("hash"):
+                extraido = await extract_basic_data(response.text, url)
+                alteracoes = changed_fields(campos, extraido)
+                update["hash"] = digest
+            for header, campo in (("etag", "etag"), ("last-modified", "last_modified")):
+                if response.headers.get(header):
+                    update[campo] = response.headers[header]
+
+        for campo, mudanca in alteracoes.items():
+            update[f"campos.{campo}"] = mudanca["para"]
+        data_leilao_em = alteracoes["data_leilao_em"]["para"] if "data_leilao_em" in alteracoes else doc.get("data_leilao_em")
+        update["data_leilao_em"] = data_leilao_em
+        # Conteúdo dinâmico (contadores, tokens) muda o hash sem mudar os
+        # campos; só alteração nos campos reinicia o recuo
+        sem_mudanca = 0 if alteracoes else doc.get("sem_mudanca", 0) + 1
+        update["sem_mudanca"] = sem_mudanca
+        if data_leilao_em is not None and now > data_leilao_em + timedelta(seconds=RECRAWL_GRACE):
+            ativo = False
+            update["motivo"] = "leilao_encerrado"
+        update["ativo"] = ativo
+        update["proxima_em"] = _to_mongo_precision(now + timedelta(seconds=next_interval(sem_mudanca, data_leilao_em, now)))
+
+        await db.monitoramento.update_one({"_id": url}, {"$set": update})
+        if alteracoes:
+            await db.monitoramento_alteracoes.insert_one({"url": url, "em": now, "alteracoes": alteracoes})
+            await db.pre_analysis_logs.update_one(
+                {"url": url},
+                {"$set": {**{f"result.{c}": m["para"] for c, m in alteracoes.items()}, "updated_at": now}},
+            )
+            logger.info(f"Alterações em {url}: {', '.join(alteracoes)}")
+        if ativo and update["proxima_em"] <= now + timedelta(seconds=self.horizon):
+            self.schedule(url, doc.get("dominio", ""), update["proxima_em"])
+        return alteracoes
+
+    async def _record_failure(self, doc: Dict[str, Any], error: Exception, now: datetime) -> None:
+        falhas = doc.get("falhas", 0) + 1
+        proxima_em = _to_mongo_precision(now + timedelta(seconds=next_interval(falhas, doc.get("data_leilao_em"), now)))
+        db = MongoDB.get_database()
+        await db.monitoramento.update_one(
+            {"_id": doc["_id"]},
+            {"$set": {"falhas": falhas, "erro": str(error), "ultima_verificacao": now, "proxima_em": proxima_em}},
+        )
+
+    async def _visit(self, url: str, when: datetime) -> None:
+        async with self._semaphore:
+            now = datetime.utcnow()
+            doc = await self._claim(url, when, now)
+            if doc is None:
+                # Outro nó já reservou, ou a URL foi reagendada
+                return
+            try:
+                await self.refresh(doc, now)
+            except Exception as e:
+                logger.warning(f"Erro ao revisitar {url}: {str(e)}")
+                await self._record_failure(doc, e, now)
+
+    def run_due(self, now: Optional[datetime] = None) -> int:
+        """
+        Dispara as visitas vencidas que cabem no orçamento de cada domínio.
+        """
+        now = now or datetime.utcnow()
+        started = 0
+        adiadas = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, url, dominio, when = heapq.heappop(self._heap)
+            self._scheduled.discard((url, when))
+            espera = self.budget.take(dominio)
+            if espera:
+                adiadas.append((url, dominio, when, espera))
+                continue
+            task = asyncio.create_task(self._visit(url, when))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            started += 1
+        for url, dominio, when, espera in adiadas:
+            # O prazo original continua sendo a chave da reserva no MongoDB
+            self.schedule(url, dominio, when, vez=now + timedelta(seconds=espera))
+        return started
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                now = datetime.utcnow()
+                if self._next_reload is None or now >= self._next_reload:
+                    await self.load_horizon(now)
+                self.run_due(now)
+                self._wakeup.clear()
+                deadlines = [self._next_reload] + ([self._heap[0][0]] if self._heap else [])
+                delay = max((min(deadlines) - datetime.utcnow()).total_seconds(), 0.0)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro no agendador de revisitas: {str(e)}", exc_info=True)
+                self._next_reload = datetime.utcnow() + timedelta(seconds=self.horizon / 2)
+                await asyncio.sleep(1)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            logger.info("Agendador de revisitas iniciado")
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+recrawl_scheduler = RecrawlScheduler()
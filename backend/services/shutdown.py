@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List
+
+from config import MongoDB
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20"))
+RESUME_REQUEUED_LIMIT = int(os.getenv("RESUME_REQUEUED_LIMIT", "50"))
+
+REQUEUED_STATUS = "requeued"
+
+class ShutdownCoordinator:
+    """
+    Coordena o encerramento do worker sem perder análises em andamento.
+
+    Ao drenar: para de aceitar trabalho novo, espera as análises em voo
+    até o prazo, descarrega as escritas em buffer e devolve para a fila
+    (status "requeued") o que não terminou, para outro worker retomar.
+    """
+
+    def __init__(self, drain_timeout: float = SHUTDOWN_DRAIN_TIMEOUT):
+        self.drain_timeout = drain_timeout
+        self.accepting = True
+        self._jobs: Dict[asyncio.Task, str] = {}
+        self._flush_callbacks: List[Callable[[], Awaitable[None]]] = []
+
+    @property
+    def in_flight(self) -> List[str]:
+        return list(self._jobs.values())
+
+    def register_flush(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """
+        Registra uma rotina que descarrega escritas em buffer no shutdown.
+        """
+        self._flush_callbacks.append(callback)
+
+    async def run(self, url: str, job: Callable[[str], Awaitable[None]]) -> None:
+        """
+        Executa uma análise registrando-a como em andamento.
+        """
+        task = asyncio.current_task()
+        self._jobs[task] = url
+        try:
+            await job(url)
+        finally:
+            self._jobs.pop(task, None)
+
+    def spawn(self, url: str, job: Callable[[str], Awaitable[None]]) -> asyncio.Task:
+        """
+        Agenda uma análise fora do ciclo de uma requisição.
+        """
+        return asyncio.create_task(self.run(url, job))
+
+    async def flush(self) -> None:
+        for callback in self._flush_callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"Erro ao descarregar escritas pendentes: {str(e)}", exc_info=True)
+
+    async def drain(self) -> List[str]:
+        """
+        Drena o worker e retorna as URLs devolvidas para a fila.
+        """
+        self.accepting = False
+        pending = list(self._jobs)
+        if pending:
+            logger.info(f"Aguardando {len(pending)} análises em andamento...")
+            _, pending = await asyncio.wait(pending, timeout=self.drain_timeout)
+
+        await self.flush()
+
+        unfinished = [self._jobs[task] for task in pending if task in self._jobs]
+        for task in pending:
+            task.cancel()
+        if unfinished:
+            await requeue_analyses(unfinished)
+        return unfinished
+
+async def requeue_analyses(urls: List[str]) -> None:
+    """
+    Marca análises inacabadas como "requeued" para outro worker retomar.
+    """
+    try:
+        db = MongoDB.get_database()
+        await db.pre_analysis_logs.update_many(
+            {"url": {"$in": urls}, "status": "pending"},
+            {"$set": {"status": REQUEUED_STATUS, "updated_at": datetime.utcnow()}},
+        )
+        logger.warning(f"{len(urls)} análises devolvidas para a fila: {urls}")
+    except Exception as e:
+        logger.error(f"Erro ao devolver análises para a fila: {str(e)}", exc_info=True)
+
+async def resume_requeued_analyses(
+    job: Callable[[str], Awaitable[None]],
+    limit: int = RESUME_REQUEUED_LIMIT,
+) -> List[str]:
+    """
+    Reivindica análises devolvidas por outros workers e as executa.
+
+    Cada documento é reivindicado com find_one_and_update, então dois
+    workers nunca retomam a mesma análise.
+    """
+    resumed: List[str] = []
+    db = MongoDB.get_database()
+    for _ in range(limit):
+        if not coordinator.accepting:
+            break
+        claimed = await db.pre_analysis_logs.find_one_and_update(
+            {"status": REQUEUED_STATUS},
+            {"$set": {"status": "pending", "updated_at": datetime.utcnow()}},
+        )
+        if not claimed:
+            break
+        coordinator.spawn(claimed["url"], job)
+        resumed.append(claimed["url"])
+    if resumed:
+        logger.info(f"{len(resumed)} análises retomadas da fila")
+    return resumed
+
+coordinator = ShutdownCoordinator()
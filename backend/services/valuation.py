@@ -0,0 +1,344 @@
+import asyncio
+import importlib.util
+import logging
+import math
+import os
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from config import MongoDB
+
+logger = logging.getLogger(__name__)
+
+# numpy é importado nas funções que o usam, não no import do app
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+VALUATION_K = int(os.getenv("VALUATION_K", "8"))
+# Tamanho da célula da grade em log(área): 0,25 ~ faixas de 28% de área
+VALUATION_GRID_CELL = float(os.getenv("VALUATION_GRID_CELL", "0.25"))
+# Peso da diferença de tipo (casa x apartamento) na distância
+VALUATION_TYPE_PENALTY = float(os.getenv("VALUATION_TYPE_PENALTY", "1.0"))
+
+# Pesos por dimensão: log(área), quartos, vagas
+FEATURE_WEIGHTS = (4.0, 0.25, 0.1)
+# Diferença assumida quando o comparável não informa quartos/vagas
+MISSING_PENALTY = 1.0
+# Linhas inativas toleradas antes de compactar a matriz de uma cidade
+COMPACT_MIN_ROWS = 1024
+
+PROJECTION = {
+    "url": 1,
+    "busca.estado": 1,
+    "busca.cidade": 1,
+    "busca.tipo": 1,
+    "busca.preco": 1,
+    "busca.area": 1,
+    "busca.quartos": 1,
+    "busca.vagas": 1,
+}
+
+Record = Tuple[str, float, float, float, float, str]
+
+def _record(url: str, busca: Dict[str, Any]) -> Optional[Record]:
+    """
+    (url, preço em reais, área, quartos, vagas, tipo); None sem preço ou área.
+    """
+    preco, area = busca.get("preco"), busca.get("area")
+    if not preco or not area or area <= 0:
+        return None
+    quartos, vagas = busca.get("quartos"), busca.get("vagas")
+    return (
+        url,
+        preco / 100,
+        float(area),
+        float(quartos) if quartos is not None else math.nan,
+        float(vagas) if vagas is not None else math.nan,
+        busca.get("tipo") or "",
+    )
+
+def _city_key(busca: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    if not busca.get("estado") or not busca.get("cidade"):
+        return None
+    return busca["estado"], busca["cidade"]
+
+class CityIndex:
+    """
+    Matriz de atributos dos imóveis de uma cidade e uma grade sobre
+    (log da área, quartos) para limitar os candidatos de cada consulta.
+
+    Depois da carga, novos imóveis são acrescentados no fim dos arrays
+    (com capacidade dobrada quando enchem) e na célula da grade; a linha
+    antiga de um imóvel atualizado ou removido é marcada como inativa e
+    sai da sua célula, para não contar como candidata. A matriz é compactada quando as linhas inativas passam da metade.
+    """
+
+    def __init__(self):
+        self.records: Dict[str, Record] = {}
+        self.rows: Dict[str, int] = {}
+        self.size = 0
+        self.dead = 0
+        self.features = None
+        self.precos = None
+        self.areas = None
+        self.tipos = None
+        self.urls = None
+        self.alive = None
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+    @property
+    def built(self) -> bool:
+        return self.features is not None
+
+    def upsert(self, record: Record) -> None:
+        self.records[record[0]] = record
+        if not self.built:
+            return
+        self._discard(record[0])
+        self._append(record)
+
+    def remove(self, url: str) -> None:
+        if self.records.pop(url, None) is not None and self.built:
+            self._discard(url)
+            if self.dead > COMPACT_MIN_ROWS and self.dead * 2 > self.size:
+                self.rebuild()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _discard(self, url: str) -> None:
+        row = self.rows.pop(url, None)
+        if row is not None:
+            self.alive[row] = False
+            self.dead += 1
+            cell = self._cell(row)
+            rows = self.cells[cell]
+            rows.remove(row)
+            if not rows:
+                del self.cells[cell]
+
+    def _cell(self, row: int) -> Tuple[int, int]:
+        quartos = self.features[row, 1]
+        return (int(math.floor(self.features[row, 0] / VALUATION_GRID_CELL)),
+                int(quartos) if not math.isnan(quartos) else -1)
+
+    def _append(self, record: Record) -> None:
+        if self.size == len(self.precos):
+            self._grow(max(2 * self.size, 16))
+        row = self.size
+        self.urls[row] = record[0]
+        self.precos[row] = record[1]
+        self.areas[row] = record[2]
+        self.features[row] = (math.log(record[2]), record[3], record[4])
+        self.tipos[row] = record[5]
+        self.alive[row] = True
+        self.rows[record[0]] = row
+        self.size += 1
+        self.cells.setdefault(self._cell(row), []).append(row)
+
+    def _grow(self, capacity: int) -> None:
+        import numpy as np
+
+        def grown(array, shape, dtype):
+            novo = np.empty(shape, dtype=dtype)
+            novo[:self.size] = array[:self.size]
+            return novo
+
+        self.urls = grown(self.urls, capacity, object)
+        self.precos = grown(self.precos, capacity, np.float64)
+        self.areas = grown(self.areas, capacity, np.float64)
+        self.features = grown(self.features, (capacity, 3), np.float64)
+        self.tipos = grown(self.tipos, capacity, object)
+        self.alive = grown(self.alive, capacity, bool)
+
+    def rebuild(self) -> None:
+        import numpy as np
+
+        rows = list(self.records.values())
+        self.urls = np.array([r[0] for r in rows], dtype=object)
+        self.precos = np.array([r[1] for r in rows], dtype=np.float64)
+        self.areas = np.array([r[2] for r in rows], dtype=np.float64)
+        self.features = np.column_stack((
+            np.log(self.areas),
+            np.array([r[3] for r in rows], dtype=np.float64),
+            np.array([r[4] for r in rows], dtype=np.float64),
+        )) if rows else np.empty((0, 3))
+        self.tipos = np.array([r[5] for r in rows], dtype=object)
+        self.alive = np.ones(len(rows), dtype=bool)
+        self.rows = {r[0]: i for i, r in enumerate(rows)}
+        self.size = len(rows)
+        self.dead = 0
+
+        cell_x = np.floor(self.features[:, 0] / VALUATION_GRID_CELL).astype(np.int64)
+        cell_y = np.nan_to_num(self.features[:, 1], nan=-1).astype(np.int64)
+        order = np.lexsort((cell_y, cell_x))
+        keys = np.column_stack((cell_x[order], cell_y[order]))
+        self.cells = {}
+        if len(order):
+            breaks = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+            for chunk in np.split(order, breaks):
+                self.cells[(int(cell_x[chunk[0]]), int(cell_y[chunk[0]]))] = chunk.tolist()
+
+    def _candidates(self, cell: Tuple[int, int], k: int) -> "np.ndarray":
+        """
+        Anéis de células ao redor da célula da consulta até juntar k
+        candidatos, mais um anel para não perder vizinhos na borda.
+        """
+        import numpy as np
+
+        rings = sorted(
+            ((max(abs(cx - cell[0]), abs(cy - cell[1])), rows) for (cx, cy), rows in self.cells.items()),
+            key=lambda item: item[0],
+        )
+        found: List[List[int]] = []
+        total, stop = 0, None
+        for ring, rows in rings:
+            if stop is not None and ring > stop:
+                break
+            found.append(rows)
+            total += len(rows)
+            if stop is None and total >= k:
+                stop = ring + 1
+        return np.fromiter((row for rows in found for row in rows), dtype=np.int64)
+
+    def query(self, area: float, quartos: Optional[float], vagas: Optional[float], tipo: str, k: int,
+              exclude: Optional[str] = None) -> List[Tuple[int, float]]:
+        import numpy as np
+
+        if not self.built:
+            self.rebuild()
+        q = np.array([
+            math.log(area),
+            quartos if quartos is not None else math.nan,
+            vagas if vagas is not None else math.nan,
+        ])
+        cell = (int(math.floor(q[0] / VALUATION_GRID_CELL)), int(quartos) if quartos is not None else -1)
+        rows = self._candidates(cell, k + 1)
+        rows = rows[self.alive[rows]]
+        if exclude is not None:
+            rows = rows[self.urls[rows] != exclude]
+        if not len(rows):
+            return []
+
+        diff = np.abs(self.features[rows] - q)
+        diff = np.where(np.isnan(diff), MISSING_PENALTY, diff)
+        dist = np.sqrt((diff ** 2) @ np.asarray(FEATURE_WEIGHTS))
+        dist = dist + VALUATION_TYPE_PENALTY * (self.tipos[rows] != tipo)
+        nearest = np.argsort(dist)[:k]
+        return [(int(rows[i]), float(dist[i])) for i in nearest]
+
+class ValuationEngine:
+    """
+    Estimativa de valor por comparáveis (k vizinhos mais próximos na
+    mesma cidade): média do preço/m² dos vizinhos ponderada pelo inverso
+    da distância, aplicada à área do imóvel.
+    """
+
+    def __init__(self, k: int = VALUATION_K):
+        self.k = k
+        self.cities: Dict[Tuple[str, str], CityIndex] = defaultdict(CityIndex)
+        self._url_city: Dict[str, Tuple[str, str]] = {}
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def add(self, url: str, busca: Dict[str, Any]) -> None:
+        """
+        Inclui ou atualiza um imóvel no índice da cidade, sem reconstruí-lo.
+        """
+        previous = self._url_city.pop(url, None)
+        if previous is not None:
+            self.cities[previous].remove(url)
+        city = _city_key(busca)
+        record = _record(url, busca)
+        if city is None or record is None or not busca.get("ativo", True):
+            return
+        self.cities[city].upsert(record)
+        self._url_city[url] = city
+
+    async def load(self) -> None:
+        """
+        Carrega os imóveis ativos com preço e área, uma vez por worker.
+        """
+        if not HAS_NUMPY:
+            logger.warning("numpy não instalado; avaliação por comparáveis desativada")
+            return
+        async with self._load_lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            db = MongoDB.get_database()
+            cursor = db.extraction_results.find(
+                {"busca.ativo": True, "busca.preco": {"$gt": 0}, "busca.area": {"$gt": 0}}, PROJECTION
+            )
+            async for doc in cursor:
+                self.add(doc.get("url"), doc.get("busca") or {})
+            for index in self.cities.values():
+                index.rebuild()
+            self.loaded = True
+            logger.info(
+                f"Índice de comparáveis carregado: {len(self._url_city)} imóveis em {len(self.cities)} cidades "
+                f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+            )
+
+    def schedule_load(self) -> None:
+        if self.loaded or not HAS_NUMPY:
+            return
+        task = asyncio.create_task(self.load())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def estimate(self, busca: Dict[str, Any], url: Optional[str] = None, k: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Estimativa para um imóvel a partir do subdocumento ``busca``; None
+        se faltar cidade/área ou se não houver comparáveis.
+        """
+        if not HAS_NUMPY or not self.loaded:
+            return None
+        import numpy as np
+
+        city = _city_key(busca)
+        area = busca.get("area")
+        if city is None or not area or area <= 0 or city not in self.cities:
+            return None
+        index = self.cities[city]
+        k = k or self.k
+        vizinhos = index.query(area, busca.get("quartos"), busca.get("vagas"), busca.get("tipo") or "", k, exclude=url)
+        if not vizinhos:
+            return None
+
+        rows = np.array([r for r, _ in vizinhos])
+        pesos = 1 / (np.array([d for _, d in vizinhos]) + 0.05)
+        preco_m2 = float(np.average(index.precos[rows] / index.areas[rows], weights=pesos))
+        estimativa = preco_m2 * area
+        preco = busca.get("preco")
+        return {
+            "estimativa": round(estimativa, 2),
+            "preco_m2_referencia": round(preco_m2, 2),
+            "razao_preco_estimativa": round(preco / 100 / estimativa, 3) if preco else None,
+            "comparaveis": [
+                {
+                    "url": index.urls[r],
+                    "preco": float(index.precos[r]),
+                    "area": float(index.areas[r]),
+                    "distancia": round(d, 3),
+                }
+                for r, d in vizinhos
+            ],
+        }
+
+    async def estimate_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Estimativa para o resultado de extração mais recente da URL.
+        """
+        await self.load()
+        db = MongoDB.get_database()
+        doc = await db.extraction_results.find_one({"url": url}, {"busca": 1}, sort=[("timestamp", -1)])
+        if not doc or not doc.get("busca"):
+            return None
+        return self.estimate(doc["busca"], url=url)
+
+valuation_engine = ValuationEngine()
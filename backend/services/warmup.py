@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from config import MongoDB
+from services.analysis_cache import analysis_cache
+from services.domain_reputation import load_domain_tables, load_lookalike_index
+from services.shutdown import coordinator
+from utils.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_MIN_CONNECTIONS = int(os.getenv("WARMUP_MIN_CONNECTIONS", "5"))
+WARMUP_PREFETCH_ANALYSES = int(os.getenv("WARMUP_PREFETCH_ANALYSES", "0"))
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "30"))
+
+class WarmupState:
+    """
+    Estado do aquecimento do worker, consultado pelo /health/ready.
+    """
+    done = False
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    steps: Dict[str, str] = {}
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.done = False
+        cls.started_at = None
+        cls.finished_at = None
+        cls.steps = {}
+
+    @classmethod
+    def as_dict(cls) -> Dict[str, Any]:
+        return {
+            "done": cls.done,
+            "started_at": cls.started_at,
+            "finished_at": cls.finished_at,
+            "steps": dict(cls.steps),
+        }
+
+async def warm_mongo_pool(connections: int = WARMUP_MIN_CONNECTIONS) -> None:
+    """
+    Abre as conexões mínimas do pool com pings concorrentes.
+    """
+    await asyncio.gather(
+        *(MongoDB.client.admin.command("ping") for _ in range(max(connections, 1)))
+    )
+    MongoDB.connected = True
+
+async def warm_http_client() -> None:
+    """
+    Cria o cliente HTTP compartilhado usado pelo validate-url.
+    """
+    get_http_client()
+
+async def preload_domain_tables() -> None:
+    """
+    Carrega as tabelas de leiloeiros confiáveis e de fraudes e monta o
+    índice de domínios parecidos.
+    """
+    load_domain_tables()
+    load_lookalike_index()
+
+async def preload_extractors() -> None:
+    """
+    Importa as bibliotecas de scraping e aquece o parser HTML.
+    """
+    from bs4 import BeautifulSoup
+
+    from services.analysis_service import extract_data_leilao, extract_value_minimo
+
+    BeautifulSoup("<html><body><h1>warmup</h1></body></html>", "html.parser")
+    extract_value_minimo("R$ 1.000,00")
+    extract_data_leilao("01/01/2024")
+
+async def prefetch_analyses(limit: int = WARMUP_PREFETCH_ANALYSES) -> None:
+    """
+    Pré-carrega no cache os resultados de extração mais recentes.
+    """
+    if limit <= 0:
+        return
+    db = MongoDB.get_database()
+    cursor = db.extraction_results.find({}, {"_id": 0}).sort("timestamp", -1).limit(limit)
+    for result in await cursor.to_list(length=limit):
+        if result.get("url") and analysis_cache.get(result["url"]) is None:
+            analysis_cache.put(result["url"], result)
+
+WARMUP_STEPS = (
+    ("mongo_pool", warm_mongo_pool),
+    ("http_client", warm_http_client),
+    ("domain_tables", preload_domain_tables),
+    ("extractors", preload_extractors),
+    ("prefetch_analyses", prefetch_analyses),
+)
+
+async def run_warmup(timeout: float = WARMUP_TIMEOUT) -> None:
+    """
+    Executa as etapas de aquecimento e marca o worker como pronto.
+
+    Erros em etapas opcionais são registrados sem impedir a prontidão;
+    o pool do MongoDB é exigido pelo /health/ready via MongoDB.connected.
+    """
+    WarmupState.reset()
+    WarmupState.started_at = datetime.utcnow()
+    if not WARMUP_ENABLED:
+        logger.info("Aquecimento desabilitado")
+    else:
+        logger.info("Iniciando aquecimento do worker...")
+        for name, step in WARMUP_STEPS:
+            try:
+                await asyncio.wait_for(step(), timeout=timeout)
+                WarmupState.steps[name] = "ok"
+            except Exception as e:
+                logger.error(f"Erro no aquecimento ({name}): {str(e)}")
+                WarmupState.steps[name] = f"erro: {str(e) or type(e).__name__}"
+    WarmupState.finished_at = datetime.utcnow()
+    WarmupState.done = True
+    logger.info(f"Aquecimento concluído: {WarmupState.steps}")
+
+def is_ready() -> bool:
+    """
+    O worker está pronto quando o aquecimento terminou, o MongoDB respondeu
+    e ele não está drenando para desligar.
+    """
+    return WarmupState.done and MongoDB.connected and coordinator.accepting
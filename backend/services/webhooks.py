@@ -0,0 +1,282 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from pymongo import UpdateOne
+
+from app.models.webhook import WebhookInDB
+from config import MongoDB
+from utils.json_response import dumps
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_CONCURRENCY_PER_HOST = int(os.getenv("WEBHOOK_CONCURRENCY_PER_HOST", "4"))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+WEBHOOK_BACKOFF_BASE = float(os.getenv("WEBHOOK_BACKOFF_BASE", "0.5"))
+WEBHOOK_BACKOFF_MAX = float(os.getenv("WEBHOOK_BACKOFF_MAX", "30"))
+WEBHOOK_BATCH_WAIT = float(os.getenv("WEBHOOK_BATCH_WAIT", "1"))
+WEBHOOK_STATUS_FLUSH_INTERVAL = float(os.getenv("WEBHOOK_STATUS_FLUSH_INTERVAL", "1"))
+WEBHOOK_SUBSCRIPTIONS_TTL = float(os.getenv("WEBHOOK_SUBSCRIPTIONS_TTL", "60"))
+
+ENVIADO = "enviado"
+ERRO = "erro"
+
+EXTRACAO_CONCLUIDA = "extracao_concluida"
+
+# Lotes só juntam webhooks que viram o mesmo POST: url, método, evento e headers
+BatchKey = Tuple[str, str, str, Tuple[Tuple[str, str], ...]]
+
+def backoff_delay(attempt: int, base: float = WEBHOOK_BACKOFF_BASE, cap: float = WEBHOOK_BACKOFF_MAX) -> float:
+    """
+    Espera antes da tentativa ``attempt`` (1 = primeira repetição), com
+    backoff exponencial e jitter completo.
+    """
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+def _should_retry(status_code: Optional[int]) -> bool:
+    return status_code is None or status_code == 429 or status_code >= 500
+
+class _Destination:
+    """
+    Estado de um host de destino: cliente HTTP próprio e limite de concorrência.
+    """
+
+    def __init__(self, host: str, concurrency: int, timeout: float, transport=None):
+        self.host = host
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.transport = transport
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.batches: Dict[BatchKey, List[Dict]] = {}
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None or self._client.is_closed:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+class WebhookEngine:
+    """
+    Entrega de webhooks para integrações parceiras.
+
+    Cada host de destino tem seu próprio cliente HTTP e um semáforo que
+    limita as entregas simultâneas, então um receptor lento só atrasa as
+    suas próprias entregas. Falhas de rede, 429 e 5xx são repetidas com
+    backoff exponencial e jitter. Assinaturas com ``lote`` recebem os
+    eventos acumulados em um único POST. O status das entregas é gravado
+    em ``webhooks`` com bulk_write periódico.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = WEBHOOK_CONCURRENCY_PER_HOST,
+        timeout: float = WEBHOOK_TIMEOUT,
+        max_attempts: int = WEBHOOK_MAX_ATTEMPTS,
+        batch_wait: float = WEBHOOK_BATCH_WAIT,
+        status_flush_interval: float = WEBHOOK_STATUS_FLUSH_INTERVAL,
+        subscriptions_ttl: float = WEBHOOK_SUBSCRIPTIONS_TTL,
+        transport=None,
+    ):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.batch_wait = batch_wait
+        self.status_flush_interval = status_flush_interval
+        self.subscriptions_ttl = subscriptions_ttl
+        self.transport = transport
+        self._destinations: Dict[str, _Destination] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._status_ops: List[UpdateOne] = []
+        self._status_task: Optional[asyncio.Task] = None
+        self._subscriptions: Dict[str, Tuple[float, List[Dict]]] = {}
+
+    def _destination(self, url: str) -> _Destination:
+        host = urlparse(url).netloc.lower()
+        destination = self._destinations.get(host)
+        if destination is None:
+            destination = self._destinations[host] = _Destination(
+                host, self.concurrency, self.timeout, self.transport
+            )
+        return destination
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def subscriptions(self, evento: str) -> List[Dict]:
+        """
+        Assinaturas ativas do evento, em cache por alguns segundos.
+        """
+        cached = self._subscriptions.get(evento)
+        if cached and time.monotonic() - cached[0] < self.subscriptions_ttl:
+            return cached[1]
+        db = MongoDB.get_database()
+        subs = await db.webhook_assinaturas.find({"evento": evento, "ativo": True}).to_list(length=None)
+        self._subscriptions[evento] = (time.monotonic(), subs)
+        return subs
+
+    async def dispatch(self, evento: str, payload: Dict[str, Any]) -> int:
+        """
+        Agenda a entrega do evento para todas as assinaturas. Não espera as entregas.
+        """
+        subs = await self.subscriptions(evento)
+        for sub in subs:
+            webhook = WebhookInDB(
+                url=sub["url"],
+                evento=evento,
+                headers=sub.get("headers"),
+                payload=payload,
+                usuario_id=sub.get("usuario_id"),
+            )
+            self.submit(webhook.model_dump(by_alias=True), lote=sub.get("lote", False))
+        return len(subs)
+
+    @staticmethod
+    def _batch_key(webhook: Dict) -> BatchKey:
+        headers = tuple(sorted((webhook.get("headers") or {}).items()))
+        return webhook["url"], webhook["metodo"], webhook["evento"], headers
+
+    def submit(self, webhook: Dict, lote: bool = False) -> None:
+        destination = self._destination(webhook["url"])
+        if not lote:
+            self._spawn(self._deliver(destination, webhook["url"], [webhook], lote=False))
+            return
+        key = self._batch_key(webhook)
+        pending = destination.batches.setdefault(key, [])
+        pending.append(webhook)
+        if len(pending) == 1:
+            self._spawn(self._deliver_batch_later(destination, key))
+
+    async def _deliver_batch_later(self, destination: _Destination, key: BatchKey) -> None:
+        await asyncio.sleep(self.batch_wait)
+        webhooks = destination.batches.pop(key, [])
+        if webhooks:
+            await self._deliver(destination, key[0], webhooks, lote=True)
+
+    def _body(self, webhooks: List[Dict], lote: bool) -> bytes:
+        if lote:
+            return dumps({"eventos": [
+                {"id": w["_id"], "evento": w["evento"], "payload": w["payload"]} for w in webhooks
+            ]})
+        return dumps(webhooks[0]["payload"])
+
+    async def _deliver(self, destination: _Destination, url: str, webhooks: List[Dict], lote: bool) -> None:
+        first = webhooks[0]
+        headers = {
+            "Content-Type": "application/json",
+            "X-Webhook-Evento": first["evento"],
+            **(first.get("headers") or {}),
+        }
+        if not lote:
+            headers["X-Webhook-Id"] = str(first["_id"])
+        body = self._body(webhooks, lote)
+
+        status_code, resposta, erro = None, None, None
+        for attempt in range(1, self.max_attempts + 1):
+            async with destination.semaphore:
+                try:
+                    response = await destination.client.request(first["metodo"], url, content=body, headers=headers)
+                    status_code, erro = response.status_code, None
+                    resposta = self._parse_response(response)
+                except Exception as e:
+                    status_code, resposta, erro = None, None, str(e) or type(e).__name__
+            if status_code is not None and status_code < 300:
+                break
+            if status_code is not None and not _should_retry(status_code):
+                erro = f"HTTP {status_code}"
+                break
+            if attempt < self.max_attempts:
+                # Dorme fora do semáforo para não ocupar a vaga do destino
+                await asyncio.sleep(backoff_delay(attempt))
+            elif status_code is not None:
+                erro = f"HTTP {status_code}"
+
+        self._record(webhooks, status_code, resposta, erro, attempt)
+
+    @staticmethod
+    def _parse_response(response) -> Optional[Dict[str, Any]]:
+        try:
+            data = response.json()
+        except Exception:
+            data = None
+        if isinstance(data, dict):
+            return data
+        return {"corpo": response.text[:2000]} if response.text else None
+
+    def _record(self, webhooks: List[Dict], status_code, resposta, erro, tentativas: int) -> None:
+        now = datetime.utcnow()
+        status = {
+            "status": ENVIADO if erro is None else ERRO,
+            "status_code": status_code,
+            "resposta": resposta,
+            "erro": erro,
+            "atualizado_em": now,
+            "enviado_em": now if erro is None else None,
+            "metadata.tentativas": tentativas,
+        }
+        for webhook in webhooks:
+            insert = {k: v for k, v in webhook.items() if k not in status and k != "metadata"}
+            self._status_ops.append(UpdateOne({"_id": webhook["_id"]}, {"$set": status, "$setOnInsert": insert}, upsert=True))
+        if erro:
+            logger.warning(f"Webhook {webhooks[0]['evento']} para {webhooks[0]['url']} falhou após {tentativas} tentativas: {erro}")
+        if self._status_task is None or self._status_task.done():
+            self._status_task = asyncio.create_task(self._flush_status_later())
+
+    async def _flush_status_later(self) -> None:
+        await asyncio.sleep(self.status_flush_interval)
+        await self.flush_status()
+
+    async def flush_status(self) -> None:
+        """
+        Grava em lote os status acumulados das entregas.
+        """
+        ops, self._status_ops = self._status_ops, []
+        if not ops:
+            return
+        try:
+            db = MongoDB.get_database()
+            await db.webhooks.bulk_write(ops, ordered=False)
+        except Exception as e:
+            logger.error(f"Erro ao gravar status de {len(ops)} webhooks: {str(e)}", exc_info=True)
+
+    async def flush(self, timeout: float = 10.0) -> None:
+        """
+        Entrega os lotes pendentes, aguarda as entregas em andamento e grava
+        os status; usado no desligamento gracioso.
+        """
+        for destination in self._destinations.values():
+            for key in list(destination.batches):
+                webhooks = destination.batches.pop(key)
+                self._spawn(self._deliver(destination, key[0], webhooks, lote=True))
+        tasks = list(self._tasks)
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        if self._status_task and not self._status_task.done():
+            self._status_task.cancel()
+        await self.flush_status()
+        for destination in self._destinations.values():
+            await destination.close()
+
+webhook_engine = WebhookEngine()
@@ -0,0 +1,111 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock
+
+from config import MongoDB
+from services.activity_counter import ActivityAggregator, activity_counter
+
+AGORA = datetime(2024, 4, 1, 12, 34, 56)
+LEILAO_ID = ObjectId()
+OUTRO_ID = ObjectId()
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.contadores_leilao.bulk_write = AsyncMock()
+    db.atividades_horarias.bulk_write = AsyncMock()
+    db.atividades.insert_many = AsyncMock()
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+@pytest.mark.asyncio
+async def test_flush_agrupa_incrementos_por_leilao(mock_db):
+    aggregator = ActivityAggregator(sample_rate=0)
+    for _ in range(100):
+        aggregator.record(LEILAO_ID, "visualizacao", now=AGORA)
+    aggregator.record(LEILAO_ID, "favorito", now=AGORA)
+    aggregator.record(OUTRO_ID, "visualizacao", now=AGORA)
+
+    await aggregator.flush()
+
+    ops = mock_db.contadores_leilao.bulk_write.call_args.args[0]
+    assert len(ops) == 2
+    update = next(op for op in ops if op._filter["_id"].startswith(str(LEILAO_ID)))._doc
+    assert update["$inc"] == {"total_visualizacoes": 100, "total_favoritos": 1}
+
+    hourly = mock_db.atividades_horarias.bulk_write.call_args.args[0]
+    assert len(hourly) == 3
+    assert hourly[0]._doc["$setOnInsert"]["hora"] == datetime(2024, 4, 1, 12)
+    mock_db.atividades.insert_many.assert_not_awaited()
+    assert aggregator.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_falha_na_gravacao_devolve_incrementos(mock_db):
+    mock_db.contadores_leilao.bulk_write.side_effect = Exception("timeout")
+    aggregator = ActivityAggregator()
+    aggregator.record(LEILAO_ID, "visualizacao", now=AGORA)
+    aggregator.record(LEILAO_ID, "visualizacao", now=AGORA)
+
+    await aggregator.flush()
+
+    assert aggregator.pending == 2
+    mock_db.atividades_horarias.bulk_write.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_amostragem_grava_atividades_individuais(mock_db):
+    aggregator = ActivityAggregator(sample_rate=1.0)
+    aggregator.record(LEILAO_ID, "compartilhamento", usuario_id=ObjectId(), now=AGORA)
+
+    await aggregator.flush()
+
+    amostras = mock_db.atividades.insert_many.call_args.args[0]
+    assert amostras[0]["item_id"] == LEILAO_ID
+    assert amostras[0]["metadata"] == {"amostra": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_totais_somam_shards_e_pendentes(mock_db):
+    mock_db.contadores_leilao.find.return_value = _Cursor([
+        {"total_visualizacoes": 10, "total_favoritos": 1},
+        {"total_visualizacoes": 5},
+    ])
+    aggregator = ActivityAggregator()
+    aggregator.record(LEILAO_ID, "visualizacao", now=AGORA)
+
+    totals = await aggregator.totals(LEILAO_ID)
+
+    assert totals == {"total_visualizacoes": 16, "total_favoritos": 1, "total_compartilhamentos": 0}
+
+
+def test_endpoint_registra_sem_gravar(client):
+    activity_counter._counts.clear()
+    response = client.post(f"/api/leiloes/{LEILAO_ID}/atividades", json={"tipo": "visualizacao"})
+    assert response.status_code == 202
+    assert activity_counter.pending == 1
+
+    response = client.post(f"/api/leiloes/{LEILAO_ID}/atividades", json={"tipo": "lance"})
+    assert response.status_code == 422
+    activity_counter._counts.clear()
+    activity_counter._hourly.clear()
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from config import MongoDB
+from services import auction_scheduler as scheduler_module
+from services.auction_scheduler import (
+    ABRIR, ENCERRAR, AuctionScheduler, notify_closed_auction, release_closed_auction,
+)
+from services.bid_book import bid_books, AuctionBidBook
+from services.bid_engine import bid_sequencer
+
+AGORA = datetime(2024, 4, 1, 12, 0)
+LEILAO_ID = ObjectId()
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.scheduler_leases.update_one = AsyncMock()
+    db.leiloes.update_one = AsyncMock(return_value=MagicMock(modified_count=1))
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+@pytest.mark.asyncio
+async def test_load_horizon_agenda_aberturas_e_encerramentos(mock_db):
+    outro = ObjectId()
+    mock_db.leiloes.find.side_effect = [
+        _Cursor([{"_id": LEILAO_ID, "data_inicio": AGORA + timedelta(seconds=10)}]),
+        _Cursor([{"_id": outro, "data_fim": AGORA + timedelta(seconds=5)}]),
+    ]
+    scheduler = AuctionScheduler(horizon=60)
+
+    assert await scheduler.load_horizon(AGORA) == 2
+
+    filtro = mock_db.leiloes.find.call_args_list[0].args[0]
+    assert filtro["status"] == {"$in": ["pendente"]}
+    assert filtro["data_inicio"] == {"$lte": AGORA + timedelta(seconds=60)}
+    # O heap devolve primeiro o prazo mais próximo
+    assert scheduler._heap[0][2:] == (outro, ENCERRAR)
+
+
+@pytest.mark.asyncio
+async def test_run_due_dispara_apenas_eventos_vencidos(mock_db):
+    scheduler = AuctionScheduler()
+    futuro = ObjectId()
+    scheduler.schedule(LEILAO_ID, AGORA - timedelta(milliseconds=200), ABRIR)
+    scheduler.schedule(LEILAO_ID, AGORA - timedelta(milliseconds=200), ABRIR)
+    scheduler.schedule(futuro, AGORA + timedelta(seconds=30), ABRIR)
+
+    fired = await scheduler.run_due(AGORA)
+
+    assert fired == [(LEILAO_ID, ABRIR)]
+    mock_db.leiloes.update_one.assert_awaited_once()
+    filtro, update = mock_db.leiloes.update_one.call_args.args
+    assert filtro["status"] == {"$in": ["pendente"]}
+    assert update["$set"]["status"] == "em_andamento"
+    assert len(scheduler._heap) == 1
+    assert scheduler._seconds_until_next(AGORA) == 30
+
+
+@pytest.mark.asyncio
+async def test_evento_com_lease_de_outro_no_nao_dispara(mock_db):
+    mock_db.scheduler_leases.update_one.side_effect = DuplicateKeyError("lease")
+    scheduler = AuctionScheduler()
+
+    assert not await scheduler.fire(LEILAO_ID, ENCERRAR, AGORA, AGORA)
+    mock_db.leiloes.update_one.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_encerramento_notifica_listeners(mock_db):
+    scheduler = AuctionScheduler()
+    listener = AsyncMock()
+    scheduler.add_listener(listener)
+
+    assert await scheduler.fire(LEILAO_ID, ENCERRAR, AGORA, AGORA)
+    listener.assert_awaited_once_with(LEILAO_ID, ENCERRAR, "finalizado")
+
+    # Transição já aplicada por outro nó: nada a notificar
+    mock_db.leiloes.update_one.return_value = MagicMock(modified_count=0)
+    assert not await scheduler.fire(LEILAO_ID, ENCERRAR, AGORA, AGORA)
+    assert listener.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_encerramento_libera_livro_e_sequenciador():
+    bid_books._store(LEILAO_ID, AuctionBidBook(LEILAO_ID))
+    bid_sequencer._state[LEILAO_ID] = {"valor_atual": 100.0}
+
+    await release_closed_auction(LEILAO_ID, ENCERRAR, "finalizado")
+
+    assert LEILAO_ID not in bid_books
+    assert LEILAO_ID not in bid_sequencer._state
+
+
+@pytest.mark.asyncio
+async def test_participantes_sao_avisados_do_encerramento(mock_db):
+    ana, beto = ObjectId(), ObjectId()
+    mock_db.leiloes.find_one = AsyncMock(return_value={"titulo": "Casa Batel", "valor_atual": 250000.0})
+    mock_db.lances.distinct = AsyncMock(return_value=[ana, beto])
+
+    with patch.object(scheduler_module, "notify_users", AsyncMock()) as notify:
+        await notify_closed_auction(LEILAO_ID, ABRIR, "em_andamento")
+        notify.assert_not_called()
+        await notify_closed_auction(LEILAO_ID, ENCERRAR, "finalizado")
+
+    assert mock_db.lances.distinct.await_args.args == ("usuario_id", {"leilao_id": LEILAO_ID, "status": "aceito"})
+    assert notify.await_args.args == (
+        "leilao_encerrado", [ana, beto], {"leilao": "Casa Batel", "valor": "250.000,00"},
+    )
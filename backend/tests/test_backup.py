@@ -0,0 +1,165 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from config import MongoDB
+from services import backup as backup_service
+from services.backup import COMPLETO, INCREMENTAL, load_manifest, run_backup, run_restore
+
+DOCS = [{"_id": ObjectId(), "url": f"https://leilao.example/{i}", "timestamp": datetime(2024, 1, i + 1)} for i in range(3)]
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.backups.update_one = AsyncMock()
+    db.backups.find_one = AsyncMock(return_value=None)
+    db.restauracoes.update_one = AsyncMock()
+    source = MagicMock()
+    source.find.return_value = _Cursor(DOCS)
+    source.insert_many = AsyncMock()
+    source.bulk_write = AsyncMock()
+    db.get_collection.return_value = source
+    MongoDB.db = db
+    with patch.object(backup_service, "BACKUP_CHUNK_DOCS", 2):
+        yield db
+    MongoDB.db = None
+
+
+def _backup(tmp_path, tipo=COMPLETO):
+    return {"_id": ObjectId(), "tipo": tipo, "local": str(tmp_path / "b1")}
+
+
+def _last_set(collection):
+    return collection.update_one.call_args.args[1]["$set"]
+
+
+@pytest.mark.asyncio
+async def test_backup_completo_em_blocos_com_checksum(mock_db, tmp_path):
+    backup = _backup(tmp_path)
+
+    manifest = await run_backup(backup, ["url_logs"])
+
+    colecao = manifest["colecoes"]["url_logs"]
+    assert [c["documentos"] for c in colecao["chunks"]] == [2, 1]
+    assert colecao["watermark"] == DOCS[-1]["_id"]
+    assert (tmp_path / "b1" / "url_logs" / "000001.bson.gz").exists()
+    assert load_manifest(tmp_path / "b1")["colecoes"]["url_logs"]["watermark"] == DOCS[-1]["_id"]
+
+    assert mock_db.get_collection.return_value.find.call_args.args[0] == {}
+    final = _last_set(mock_db.backups)
+    assert final["status"] == "concluido"
+    assert final["tamanho"] == sum(c["bytes"] for c in colecao["chunks"])
+
+
+@pytest.mark.asyncio
+async def test_backup_incremental_parte_da_marca_dagua(mock_db, tmp_path):
+    watermark = ObjectId()
+    mock_db.backups.find_one.return_value = {
+        "_id": ObjectId(),
+        "local": str(tmp_path / "base"),
+        "metadata": {"colecoes": {"url_logs": {"watermark": watermark}}},
+    }
+
+    manifest = await run_backup(_backup(tmp_path, INCREMENTAL), ["url_logs"])
+
+    assert mock_db.backups.find_one.call_args.args[0] == {"status": "concluido"}
+    assert mock_db.get_collection.return_value.find.call_args.args[0] == {"_id": {"$gt": watermark}}
+    assert manifest["base"] == str(tmp_path / "base")
+
+
+@pytest.mark.asyncio
+async def test_backup_incremental_inclui_documentos_atualizados_no_lugar(mock_db, tmp_path):
+    docs = [{**d, "atualizado_em": d["timestamp"]} for d in DOCS]
+
+    def find(query, **kwargs):
+        since = query.get("atualizado_em", {}).get("$gt")
+        return _Cursor([d for d in docs if since is None or d["atualizado_em"] > since])
+
+    mock_db.get_collection.return_value.find.side_effect = find
+    completo = await run_backup(_backup(tmp_path), ["extraction_results"])
+    assert completo["colecoes"]["extraction_results"]["watermark"] == docs[-1]["atualizado_em"]
+
+    # retire_previous tira o primeiro resultado da busca sem mudar o _id
+    docs[0] = {**docs[0], "busca": {"ativo": False}, "atualizado_em": datetime(2024, 2, 1)}
+    mock_db.backups.find_one.return_value = {"_id": ObjectId(), "local": str(tmp_path / "b1"), "metadata": completo}
+    backup = {"_id": ObjectId(), "tipo": INCREMENTAL, "local": str(tmp_path / "b2")}
+
+    manifest = await run_backup(backup, ["extraction_results"])
+
+    colecao = manifest["colecoes"]["extraction_results"]
+    assert colecao["documentos"] == 1
+    assert colecao["watermark"] == datetime(2024, 2, 1)
+    assert mock_db.get_collection.return_value.find.call_args.args[0] == {"atualizado_em": {"$gt": docs[-1]["atualizado_em"]}}
+
+
+@pytest.mark.asyncio
+async def test_base_com_marca_dagua_de_outro_campo_copia_tudo(mock_db, tmp_path):
+    mock_db.backups.find_one.return_value = {
+        "_id": ObjectId(),
+        "local": str(tmp_path / "base"),
+        "metadata": {"colecoes": {"extraction_results": {"campo": "_id", "watermark": ObjectId()}}},
+    }
+
+    await run_backup(_backup(tmp_path, INCREMENTAL), ["extraction_results"])
+
+    assert mock_db.get_collection.return_value.find.call_args.args[0] == {}
+
+
+@pytest.mark.asyncio
+async def test_restauracao_paralela_dos_blocos(mock_db, tmp_path):
+    backup = _backup(tmp_path)
+    await run_backup(backup, ["extraction_results"])
+
+    total = await run_restore({"_id": ObjectId(), "local_origem": backup["local"], "local_destino": ""})
+
+    assert total == 3
+    target = mock_db.get_collection.return_value
+    restored = [doc["_id"] for call in target.insert_many.call_args_list for doc in call.args[0]]
+    assert sorted(restored) == sorted(d["_id"] for d in DOCS)
+    assert all(call.kwargs["ordered"] is False for call in target.insert_many.call_args_list)
+    assert _last_set(mock_db.restauracoes)["status"] == "concluido"
+
+
+@pytest.mark.asyncio
+async def test_restauracao_substitui_documentos_existentes(mock_db, tmp_path):
+    backup = _backup(tmp_path)
+    await run_backup(backup, ["extraction_results"])
+    target = mock_db.get_collection.return_value
+    target.insert_many.side_effect = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}]})
+
+    await run_restore({"_id": ObjectId(), "local_origem": backup["local"]})
+
+    assert target.bulk_write.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_checksum_invalido_falha_a_restauracao(mock_db, tmp_path):
+    backup = _backup(tmp_path)
+    await run_backup(backup, ["extraction_results"])
+    chunk = tmp_path / "b1" / "extraction_results" / "000000.bson.gz"
+    data = bytearray(chunk.read_bytes())
+    data[-1] ^= 0xFF
+    chunk.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError):
+        await run_restore({"_id": ObjectId(), "local_origem": backup["local"]})
+    assert _last_set(mock_db.restauracoes)["status"] == "erro"
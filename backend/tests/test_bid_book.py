@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock
+
+from config import MongoDB
+from services.bid_book import AuctionBidBook, BidBookRegistry
+
+INICIO = datetime(2024, 4, 1, 12, 0)
+LEILAO_ID = ObjectId()
+ANA, BETO, CAIO = ObjectId(), ObjectId(), ObjectId()
+
+
+def _book(*lances):
+    book = AuctionBidBook(LEILAO_ID)
+    for i, (valor, usuario) in enumerate(lances):
+        book.add(valor, usuario, INICIO + timedelta(seconds=i))
+    return book
+
+
+def test_top_k_do_maior_para_o_menor():
+    book = _book((1000, ANA), (1100, BETO), (1200, ANA), (1300, CAIO))
+
+    top = book.top_k(3)
+
+    assert [l["valor"] for l in top] == [1300, 1200, 1100]
+    assert top[0]["usuario_id"] == CAIO
+    assert top[0]["criado_em"] == INICIO + timedelta(seconds=3)
+    assert len(book.top_k(10)) == 4
+
+
+def test_rank_por_maior_lance_do_usuario():
+    book = _book((1000, ANA), (1100, BETO), (1200, ANA), (1300, CAIO))
+
+    assert book.rank(CAIO) == 1
+    assert book.rank(ANA) == 2
+    assert book.rank(BETO) == 3
+    assert book.rank(ObjectId()) is None
+    assert book.participantes == 3
+
+
+def test_valor_repetido_e_ignorado():
+    book = _book((1000, ANA))
+    assert not book.add(1000, BETO, INICIO)
+    assert len(book) == 1
+
+
+def test_carga_em_bloco_equivale_a_insercoes():
+    lances = [(1000, ANA), (1100, BETO), (1200, ANA), (1300, CAIO), (1250, BETO)]
+    esperado = _book(*lances)
+
+    datados = [(v, u, INICIO + timedelta(seconds=i)) for i, (v, u) in enumerate(lances)]
+    book = AuctionBidBook(LEILAO_ID)
+    book.extend(datados[2::-1])
+    # Valor repetido (1200) é ignorado, como em add
+    book.extend(datados[2:])
+
+    assert book.top_k(10) == esperado.top_k(10)
+    assert [book.rank(u) for u in (ANA, BETO, CAIO)] == [esperado.rank(u) for u in (ANA, BETO, CAIO)]
+    assert book.participantes == 3
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.sort_args = None
+
+    def sort(self, *args):
+        self.sort_args = args
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    cursor = _Cursor([
+        {"valor": 1200.0, "usuario_id": ANA, "criado_em": INICIO},
+        {"valor": 1100.0, "usuario_id": BETO, "criado_em": INICIO},
+    ])
+    db.lances.find.return_value = cursor
+    db.leiloes.find_one = AsyncMock(return_value={"_id": LEILAO_ID, "total_lances": 2})
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+@pytest.mark.asyncio
+async def test_registry_hidrata_uma_vez_e_aplica_novos_lances(mock_db):
+    registry = BidBookRegistry()
+
+    book = await registry.get(LEILAO_ID)
+    registry.record(LEILAO_ID, 1300.0, BETO, INICIO)
+    assert await registry.get(LEILAO_ID) is book
+
+    filtro = mock_db.lances.find.call_args.args[0]
+    assert filtro == {"leilao_id": LEILAO_ID, "status": "aceito"}
+    assert mock_db.lances.find.return_value.sort_args == ("valor", 1)
+    assert mock_db.lances.find.call_count == 1
+    assert book.rank(BETO) == 1
+
+
+@pytest.mark.asyncio
+async def test_registry_inclui_lance_aceito_em_outro_no(mock_db):
+    registry = BidBookRegistry()
+    book = await registry.get(LEILAO_ID)
+
+    # Outro nó aceitou um lance: o contador do leilão avançou sem record local
+    mock_db.leiloes.find_one.return_value = {"_id": LEILAO_ID, "total_lances": 3}
+    mock_db.lances.find.return_value = _Cursor([{"valor": 1300.0, "usuario_id": CAIO, "criado_em": INICIO}])
+
+    assert await registry.get(LEILAO_ID) is book
+    assert book.top_k(1)[0]["usuario_id"] == CAIO
+    assert book.rank(CAIO) == 1
+    filtro = mock_db.lances.find.call_args.args[0]
+    assert filtro["valor"] == {"$gt": 1200.0}
+
+    # Em dia com o contador: nenhuma consulta a lances
+    await registry.get(LEILAO_ID)
+    assert mock_db.lances.find.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_registry_evict_e_limite(mock_db):
+    registry = BidBookRegistry(max_auctions=1)
+    await registry.get(LEILAO_ID)
+    registry.evict(LEILAO_ID)
+    assert LEILAO_ID not in registry
+
+    # Lances de leilões fora da memória são ignorados
+    registry.record(LEILAO_ID, 5000.0, ANA, INICIO)
+    assert LEILAO_ID not in registry
+
+
+def test_endpoint_ranking(client, mock_db):
+    response = client.get(f"/api/leiloes/{LEILAO_ID}/ranking?k=1")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["participantes"] == 2
+    assert data["lances"][0]["valor"] == 1200.0
+    assert data["lances"][0]["usuario_id"] == str(ANA)
+
+    response = client.get(f"/api/leiloes/{LEILAO_ID}/ranking/{BETO}")
+    assert response.json()["posicao"] == 2
+
+    response = client.get(f"/api/leiloes/{LEILAO_ID}/ranking/{ObjectId()}")
+    assert response.status_code == 404
@@ -0,0 +1,205 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.lance import LanceCreate
+from config import MongoDB
+from services import bid_engine
+from services.bid_engine import (
+    ACEITO,
+    FORA_DO_PERIODO,
+    LEILAO_FECHADO,
+    REJEITADO,
+    VALOR_INSUFICIENTE,
+    BidSequencer,
+    place_bid,
+)
+
+AGORA = datetime(2024, 4, 1, 12, 0)
+LEILAO_ID = ObjectId()
+
+
+def _leilao(**kwargs):
+    leilao = {
+        "_id": LEILAO_ID,
+        "valor_inicial": 1000.0,
+        "valor_atual": 1500.0,
+        "valor_minimo_incremento": 100.0,
+        "total_lances": 3,
+        "status": "em_andamento",
+        "ativo": True,
+        "data_inicio": AGORA - timedelta(days=1),
+        "data_fim": AGORA + timedelta(hours=1),
+    }
+    leilao.update(kwargs)
+    return leilao
+
+
+def _lance(valor):
+    return LanceCreate(valor=valor, leilao_id=LEILAO_ID, usuario_id=ObjectId())
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.leiloes.find_one_and_update = AsyncMock()
+    db.leiloes.find_one = AsyncMock()
+    db.lances.insert_one = AsyncMock()
+    db.lances.find_one = AsyncMock(return_value=None)
+    db.lances.insert_many = AsyncMock()
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+@pytest.mark.asyncio
+async def test_lance_aceito_com_update_condicional(mock_db):
+    mock_db.leiloes.find_one_and_update.return_value = _leilao(valor_atual=1600.0, total_lances=4)
+
+    lance = await place_bid(_lance(1600.0), now=AGORA)
+
+    assert lance.status == ACEITO
+    filtro, update = mock_db.leiloes.find_one_and_update.await_args.args
+    assert filtro["_id"] == LEILAO_ID
+    assert filtro["data_inicio"] == {"$lte": AGORA}
+    assert filtro["data_fim"] == {"$gt": AGORA}
+    assert {"$lte": [{"$add": ["$valor_atual", "$valor_minimo_incremento"]}, 1600.0]} in filtro["$expr"]["$and"]
+    assert update["$set"]["ultimo_lance"] == lance.id
+    assert update["$inc"] == {"total_lances": 1}
+    gravado = mock_db.lances.insert_one.await_args.args[0]
+    assert gravado["_id"] == lance.id
+    assert gravado["status"] == ACEITO
+
+
+@pytest.mark.asyncio
+async def test_livro_de_lances_so_recebe_lance_gravado(mock_db):
+    mock_db.leiloes.find_one_and_update.return_value = _leilao(valor_atual=1600.0, total_lances=4)
+    mock_db.lances.insert_one.side_effect = RuntimeError("falha de escrita")
+
+    with patch.object(bid_engine.bid_books, "record") as record, \
+         patch.object(bid_engine.live_feed, "publish", AsyncMock()) as publish:
+        with pytest.raises(RuntimeError):
+            await place_bid(_lance(1600.0), now=AGORA)
+        record.assert_not_called()
+        publish.assert_not_called()
+
+        mock_db.lances.insert_one.side_effect = None
+        lance = await place_bid(_lance(1600.0), now=AGORA)
+        record.assert_called_once_with(LEILAO_ID, 1600.0, lance.usuario_id, AGORA)
+        assert publish.await_args.args[2]["lance_id"] == lance.id
+
+
+@pytest.mark.asyncio
+async def test_lider_anterior_e_avisado_do_lance_superado(mock_db):
+    anterior = ObjectId()
+    mock_db.leiloes.find_one_and_update.return_value = _leilao(valor_atual=1600.0, titulo="Apartamento Centro")
+    mock_db.lances.find_one.return_value = {"usuario_id": anterior}
+
+    anteriores = set(bid_engine._tasks)
+    with patch.object(bid_engine, "notify_users", AsyncMock()) as notify:
+        lance = await place_bid(_lance(1600.0), now=AGORA)
+        await asyncio.gather(*(bid_engine._tasks - anteriores))
+
+    filtro = mock_db.lances.find_one.await_args.args[0]
+    assert filtro["valor"] == {"$lt": 1600.0}
+    template, usuarios, dados = notify.await_args.args
+    assert (template, usuarios) == ("lance_superado", [anterior])
+    assert dados == {"leilao": "Apartamento Centro", "valor": "1.600,00"}
+    assert notify.await_args.kwargs["lance_id"] == lance.id
+
+
+@pytest.mark.asyncio
+async def test_lance_rejeitado_registra_motivo(mock_db):
+    mock_db.leiloes.find_one_and_update.return_value = None
+    mock_db.leiloes.find_one.return_value = _leilao()
+
+    lance = await place_bid(_lance(1550.0), now=AGORA)
+
+    assert lance.status == REJEITADO
+    assert lance.observacao == VALOR_INSUFICIENTE
+    assert mock_db.lances.insert_one.await_args.args[0]["status"] == REJEITADO
+
+
+@pytest.mark.asyncio
+async def test_lance_fora_do_periodo(mock_db):
+    mock_db.leiloes.find_one_and_update.return_value = None
+    mock_db.leiloes.find_one.return_value = _leilao(data_fim=AGORA - timedelta(minutes=1))
+
+    lance = await place_bid(_lance(5000.0), now=AGORA)
+
+    assert lance.observacao == FORA_DO_PERIODO
+
+
+def _aberto(**kwargs):
+    # O sequenciador usa o relógio real
+    agora = datetime.utcnow()
+    return _leilao(**{"data_inicio": agora - timedelta(days=1), "data_fim": agora + timedelta(hours=1), **kwargs})
+
+
+@pytest.mark.asyncio
+async def test_sequenciador_rejeita_localmente_abaixo_do_minimo(mock_db):
+    estados = [_aberto(valor_atual=2000.0, total_lances=4)]
+    mock_db.leiloes.find_one_and_update.side_effect = lambda *a, **k: estados.pop(0) if estados else None
+    mock_db.leiloes.find_one.return_value = _aberto(valor_atual=2000.0)
+    sequencer = BidSequencer(idle_timeout=0.05)
+
+    resultados = await asyncio.gather(
+        sequencer.submit(_lance(2000.0)),
+        sequencer.submit(_lance(1700.0)),
+        sequencer.submit(_lance(1800.0)),
+    )
+    await sequencer.flush()
+
+    assert [r.status for r in resultados] == [ACEITO, REJEITADO, REJEITADO]
+    # Só o primeiro lance chegou ao MongoDB; os demais foram barrados pelo estado em cache
+    assert mock_db.leiloes.find_one_and_update.await_count == 1
+    rejeitados = mock_db.lances.insert_many.await_args.args[0]
+    assert [r["valor"] for r in rejeitados] == [1700.0, 1800.0]
+
+
+@pytest.mark.asyncio
+async def test_sequenciador_apos_encerramento_nao_rejeita_por_valor(mock_db):
+    sequencer = BidSequencer(idle_timeout=0.05)
+    encerrado = _aberto(valor_atual=2000.0, data_fim=datetime.utcnow() - timedelta(seconds=1))
+    mock_db.leiloes.find_one_and_update.return_value = None
+    mock_db.leiloes.find_one.return_value = encerrado
+    sequencer._state[LEILAO_ID] = encerrado
+
+    fora = await sequencer.submit(_lance(1500.0))
+    # Estado em cache desatualizado: quem decide é o banco
+    assert fora.observacao == FORA_DO_PERIODO
+    assert mock_db.leiloes.find_one_and_update.await_count == 1
+
+    sequencer._state[LEILAO_ID] = _aberto(valor_atual=2000.0, status="finalizado")
+    fechado = await sequencer.submit(_lance(1500.0))
+    await sequencer.flush()
+
+    assert fechado.observacao == LEILAO_FECHADO
+    assert mock_db.leiloes.find_one_and_update.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_sequenciador_flush_processa_fila(mock_db):
+    mock_db.leiloes.find_one_and_update.return_value = _leilao(valor_atual=1600.0)
+    sequencer = BidSequencer(idle_timeout=5)
+
+    pendente = asyncio.create_task(sequencer.submit(_lance(1600.0)))
+    await asyncio.sleep(0)
+    await sequencer.flush(timeout=1)
+
+    assert (await pendente).status == ACEITO
+
+
+def test_endpoint_lances(client, mock_db):
+    mock_db.leiloes.find_one_and_update.return_value = _leilao(valor_atual=1600.0)
+    payload = {"valor": 1600.0, "leilao_id": str(LEILAO_ID), "usuario_id": str(ObjectId())}
+
+    with patch.object(bid_engine, "BID_SEQUENCER_ENABLED", False):
+        response = client.post("/api/lances", json=payload)
+
+    assert response.status_code == 201
+    assert response.json()["status"] == ACEITO
+    assert response.json()["leilao_id"] == str(LEILAO_ID)
@@ -0,0 +1,82 @@
+import io
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from config import MongoDB
+from services.caixa_import import import_lines, iter_rows, normalize_row
+
+PLANILHA = """\
+ Lista de Imóveis da Caixa;;;;;;;;;;
+;;;;;;;;;;
+ N° do imóvel;UF;Cidade;Bairro;Endereço;Preço;Valor de avaliação;Desconto;Descrição;Modalidade de venda;Link de acesso
+ 1444400001234;PR;CURITIBA ;CENTRO;RUA XV DE NOVEMBRO, N. 100;180.000,00;300.000,00;40.00;Apartamento, 0.00 de área total, 49.26 de área privativa, 0.00 de área do terreno, 2 qto(s), 1 vaga(s) na garagem.;Venda Online;https://venda-imoveis.caixa.gov.br/sistema/detalhe-imovel.asp?hdnimovel=1444400001234
+ 1444400005678;PR;LONDRINA;GLEBA PALHANO;AV AYRTON SENNA, N. 200;450.500,50;500.000,00;9.90;Casa, 120.00 de área total, 90.00 de área privativa, 200.00 de área do terreno, 3 qto(s).;Licitação Aberta;https://venda-imoveis.caixa.gov.br/sistema/detalhe-imovel.asp?hdnimovel=1444400005678
+;;;;;;;;;;
+ 1444400009999;PR;MARINGA;ZONA 7;RUA A;99.000,00;100.000,00;1.00;Terreno, 300.00 de área total.;Venda Direta Online;
+"""
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _rows():
+    return list(iter_rows(io.StringIO(PLANILHA)))
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.extraction_results.find.return_value = _Cursor([])
+    db.extraction_results.bulk_write = AsyncMock()
+    db.importacoes.update_one = AsyncMock()
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+def test_linha_da_planilha_normalizada():
+    rows = _rows()
+    assert len(rows) == 3
+
+    doc = normalize_row(rows[0])
+
+    assert doc["caixa"]["numero"] == "1444400001234"
+    assert doc["property_type"] == "Apartamento"
+    assert doc["auction_type"] == "Venda Online"
+    assert doc["address"] == "RUA XV DE NOVEMBRO, N. 100, CENTRO - Curitiba - PR"
+    busca = doc["busca"]
+    assert (busca["estado"], busca["cidade"], busca["tipo"]) == ("PR", "curitiba", "apartamento")
+    assert (busca["preco"], busca["avaliacao"], busca["desconto"]) == (18000000, 30000000, 40.0)
+    assert (busca["quartos"], busca["vagas"], busca["area"]) == (2, 1, 49.26)
+    assert normalize_row({"numero": "", "uf": "PR"}) is None
+
+
+@pytest.mark.asyncio
+async def test_importacao_em_blocos_pula_linhas_inalteradas(mock_db):
+    rows = _rows()
+    inalterada, alterada = normalize_row(rows[0]), normalize_row(rows[1])
+    mock_db.extraction_results.find.side_effect = [
+        _Cursor([{"caixa": inalterada["caixa"]}, {"caixa": {**alterada["caixa"], "hash": "antigo"}}]),
+        _Cursor([]),
+    ]
+
+    contagens = await import_lines(io.StringIO(PLANILHA), importacao_id="imp1", chunk_size=2)
+
+    assert contagens == {"inseridos": 1, "atualizados": 1, "inalterados": 1, "invalidos": 0}
+    escritas = [call.args[0] for call in mock_db.extraction_results.bulk_write.call_args_list]
+    assert [[op._filter["caixa.numero"] for op in ops] for ops in escritas] == [["1444400005678"], ["1444400009999"]]
+    assert all(call.kwargs["ordered"] is False for call in mock_db.extraction_results.bulk_write.call_args_list)
+    assert mock_db.importacoes.update_one.await_count == 2
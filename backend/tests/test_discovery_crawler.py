@@ -0,0 +1,168 @@
+import httpx
+import pytest
+from pymongo.errors import BulkWriteError
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from config import MongoDB
+from services.discovery_crawler import (
+    BloomFilter, DiscoveryCrawler, HostPolicy, classify_links, extract_links, load_rules,
+)
+
+DOMINIO = "sodresantoro.com.br"
+SITE = f"https://{DOMINIO}"
+
+PAGINAS = {
+    "/": '<a href="/imoveis">Imóveis</a><a href="/lote/101-apartamento">Lote</a><a href="https://outro.example/lote/1">x</a>',
+    "/imoveis": '<a href="/lote/101-apartamento#fotos">Lote</a><a href="/lote/102-casa?utm_source=x">Lote</a>'
+                '<a href="/imoveis?page=2">2</a><a href="/privado/lote/103">Lote</a>',
+    "/imoveis?page=2": '<a href="/lote/104-terreno">Lote</a><a href="/imoveis">1</a>',
+}
+ROBOTS = "User-agent: *\nDisallow: /privado/\nCrawl-delay: 5\n"
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.fetch_cache.find.side_effect = lambda *args: _Cursor([])
+    db.lotes_descobertos.insert_many = AsyncMock()
+    db.crawler_estado.find_one = AsyncMock(return_value=None)
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+@pytest.fixture
+def http():
+    acessos = []
+
+    def handler(req):
+        caminho = req.url.raw_path.decode()
+        acessos.append(caminho)
+        if caminho == "/robots.txt":
+            return httpx.Response(200, text=ROBOTS)
+        if caminho in PAGINAS:
+            return httpx.Response(200, text=PAGINAS[caminho], headers={"content-type": "text/html"})
+        return httpx.Response(404)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch("services.discovery_crawler.get_http_client", return_value=client):
+        yield acessos
+
+
+def _crawler():
+    crawler = DiscoveryCrawler(policy=HostPolicy(default_delay=0))
+    crawler.enqueue = AsyncMock()
+    # O Crawl-delay do robots.txt é testado à parte
+    crawler.policy.wait_turn = AsyncMock()
+    return crawler
+
+
+def test_filtro_de_bloom_persistido():
+    bloom = BloomFilter(size_bits=1 << 16, hashes=5)
+    urls = [f"https://leilao.example/lote/{i}" for i in range(1000)]
+    for url in urls:
+        bloom.add(url)
+
+    assert all(url in bloom for url in urls)
+    falsos = sum(f"https://leilao.example/outro/{i}" in bloom for i in range(1000))
+    assert falsos < 20
+
+    doc = bloom.to_document()
+    with patch("services.discovery_crawler.CRAWLER_BLOOM_BITS", 1 << 16), \
+         patch("services.discovery_crawler.CRAWLER_BLOOM_HASHES", 5):
+        restaurado = BloomFilter.from_document(doc)
+    assert restaurado.count == 1000 and urls[0] in restaurado
+    # Configuração diferente: recomeça vazio
+    assert urls[0] not in BloomFilter.from_document(doc)
+
+
+def test_regras_padrao_separam_lotes_e_paginacao():
+    regra = load_rules()[DOMINIO]
+    assert regra["seeds"] == [f"{SITE}/"]
+
+    links = extract_links(PAGINAS["/imoveis"], f"https://www.{DOMINIO}/imoveis")
+    lotes, paginas = classify_links(links, DOMINIO, regra)
+
+    assert lotes == [
+        f"https://www.{DOMINIO}/lote/101-apartamento",
+        f"https://www.{DOMINIO}/lote/102-casa?utm_source=x",
+        f"https://www.{DOMINIO}/privado/lote/103",
+    ]
+    assert paginas == [f"https://www.{DOMINIO}/imoveis?page=2"]
+
+
+@pytest.mark.asyncio
+async def test_robots_txt_em_cache_e_crawl_delay(http):
+    policy = HostPolicy(default_delay=1)
+
+    assert not await policy.allowed(f"{SITE}/privado/lote/103")
+    assert await policy.allowed(f"{SITE}/lote/101")
+    assert await policy.delay(f"{SITE}/lote/101") == 5
+    assert http.count("/robots.txt") == 1
+
+
+@pytest.mark.asyncio
+async def test_varredura_segue_paginacao_e_enfileira_lotes_novos(mock_db, http):
+    crawler = _crawler()
+
+    contagens = await crawler.crawl_domain(DOMINIO, load_rules()[DOMINIO])
+
+    assert contagens["paginas"] == 3
+    enfileirados = sorted(c.args[0] for c in crawler.enqueue.call_args_list)
+    assert enfileirados == [
+        f"{SITE}/lote/101-apartamento",
+        f"{SITE}/lote/102-casa?utm_source=x",
+        f"{SITE}/lote/104-terreno",
+    ]
+    # /privado/ é bloqueado pelo robots.txt; página 1 não é revisitada
+    assert "/privado/lote/103" not in http
+    assert http.count("/imoveis") == 1
+
+    # Segunda varredura: tudo já está no filtro de Bloom, sem consultas ao banco
+    crawler.enqueue.reset_mock()
+    mock_db.lotes_descobertos.insert_many.reset_mock()
+    await crawler.crawl_domain(DOMINIO, load_rules()[DOMINIO])
+    crawler.enqueue.assert_not_called()
+    mock_db.lotes_descobertos.insert_many.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_lotes_ja_analisados_ou_registrados_nao_entram_na_fila(mock_db):
+    mock_db.fetch_cache.find.side_effect = lambda *args: _Cursor([{"_id": f"{SITE}/lote/1"}])
+    mock_db.lotes_descobertos.insert_many = AsyncMock(side_effect=BulkWriteError({
+        "writeErrors": [{"index": 0, "code": 11000}],
+    }))
+    crawler = _crawler()
+
+    novos = await crawler.register_lots([f"{SITE}/lote/1", f"{SITE}/lote/2/", f"{SITE}/lote/3"], DOMINIO)
+
+    docs = mock_db.lotes_descobertos.insert_many.call_args.args[0]
+    assert [d["_id"] for d in docs] == [f"{SITE}/lote/2", f"{SITE}/lote/3"]
+    assert novos == [f"{SITE}/lote/3"]
+
+
+@pytest.mark.asyncio
+async def test_analise_do_lote_respeita_o_host_e_se_identifica(mock_db):
+    crawler = _crawler()
+    url = f"{SITE}/lote/101-apartamento"
+
+    with patch("services.analysis_service.analyze_property", AsyncMock()) as analyze:
+        await crawler._analyze(url)
+
+    crawler.policy.wait_turn.assert_awaited_once_with(url)
+    analyze.assert_awaited_once_with(url, user_agent=crawler.policy.user_agent)
@@ -0,0 +1,271 @@
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from config import MongoDB
+from services.document_pipeline import DocumentPipeline, document_urls, normalize_text
+from services.image_pipeline import ContentStore
+
+pytest.importorskip("pypdf")
+
+PAGINAS = [
+    "Edital de leilão",
+    "Lote 01 - Apartamento em Curitiba",
+    "Lote nº 002 - Casa em Londrina",
+    "Condições de pagamento do lote 2: à vista",
+]
+
+
+def _pdf(textos):
+    """Monta um PDF mínimo com uma linha de texto por página."""
+    objetos = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for texto in textos:
+        conteudo = f"BT /F1 12 Tf 72 720 Td ({texto}) Tj ET".encode("latin-1")
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(conteudo) + conteudo + b"\nendstream")
+        objetos.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objetos)} 0 R "
+            "/Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        kids.append(f"{len(objetos)} 0 R")
+    objetos[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    saida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for numero, objeto in enumerate(objetos, start=1):
+        offsets.append(len(saida))
+        corpo = objeto if isinstance(objeto, bytes) else objeto.encode("latin-1")
+        saida += b"%d 0 obj\n" % numero + corpo + b"\nendobj\n"
+    xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    saida += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, xref)
+    return bytes(saida)
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Colecao:
+    """Coleção em memória indexada por _id, com o suficiente de update_one."""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query, projection=None):
+        return self.docs.get(query["_id"])
+
+    async def update_one(self, filtro, update, upsert=False):
+        doc = self.docs.get(filtro["_id"])
+        if doc is None:
+            if not upsert:
+                return
+            doc = self.docs[filtro["_id"]] = {"_id": filtro["_id"], **update.get("$setOnInsert", {})}
+        doc.update(update.get("$set", {}))
+        for key, value in update.get("$addToSet", {}).items():
+            if value not in doc.setdefault(key, []):
+                doc[key].append(value)
+
+
+class _Paginas:
+    def __init__(self):
+        self.docs = {}
+        self.bulk_write = AsyncMock(side_effect=self._bulk_write)
+
+    async def _bulk_write(self, ops, ordered=True):
+        for op in ops:
+            self.docs[(op._filter["hash"], op._filter["pagina"])] = op._doc["$set"]["texto"]
+
+    def find(self, query, projection=None):
+        return _Cursor([
+            {"pagina": pagina, "texto": texto}
+            for (digest, pagina), texto in sorted(self.docs.items()) if digest == query["hash"]
+        ])
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.documento_fontes = _Colecao()
+    db.documentos = _Colecao()
+    db.documento_paginas = _Paginas()
+    db.extraction_results.update_many = AsyncMock()
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+@pytest.fixture
+def http():
+    edital = _pdf(PAGINAS)
+    requests = []
+
+    def handler(req):
+        requests.append(req)
+        if req.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=edital, headers={"content-type": "application/pdf", "etag": '"v1"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch("services.document_pipeline.get_http_client", return_value=client):
+        yield requests
+
+
+def _pipeline(tmp_path):
+    return DocumentPipeline(
+        store=ContentStore(str(tmp_path), public_prefix=""),
+        executor=ThreadPoolExecutor(max_workers=2),
+        pages_per_task=3,
+    )
+
+
+@pytest.mark.asyncio
+async def test_edital_de_varios_lotes_e_extraido_uma_vez(mock_db, http, tmp_path):
+    pipeline = _pipeline(tmp_path)
+    urls = ["https://leiloeiro.example/lote1/edital.pdf", "https://leiloeiro.example/lote2/edital.pdf"]
+
+    documentos = await pipeline.fetch_many(urls)
+
+    assert set(documentos) == set(urls)
+    digest = documentos[urls[0]]["_id"]
+    assert documentos[urls[1]]["_id"] == digest
+    assert documentos[urls[0]]["paginas"] == len(PAGINAS)
+    assert sorted(mock_db.documentos.docs[digest]["fontes"]) == sorted(urls)
+    assert mock_db.documento_paginas.bulk_write.await_count == 1
+    assert (tmp_path / digest[:2] / digest[2:4] / f"{digest}.pdf").exists()
+    assert "Londrina" in mock_db.documento_paginas.docs[(digest, 3)]
+
+
+@pytest.mark.asyncio
+async def test_paginas_do_lote_sem_reprocessar_o_pdf(mock_db, http, tmp_path):
+    pipeline = _pipeline(tmp_path)
+    documento = await pipeline.fetch("https://leiloeiro.example/edital.pdf")
+    digest = documento["_id"]
+
+    assert await pipeline.index.lot_pages(digest, "2") == [3, 4]
+    assert await pipeline.index.lot_pages(digest, "01") == [2]
+    assert await pipeline.index.search(digest, "condicoes a vista") == [4]
+
+
+def test_endpoint_consulta_o_indice_uma_vez(client, mock_db):
+    from services.document_pipeline import document_pipeline
+
+    mock_db.documentos.docs["abc"] = {"_id": "abc", "paginas": len(PAGINAS), "fontes": []}
+    with patch.object(document_pipeline.index, "lot_pages", AsyncMock(return_value=[3, 4])) as lot_pages, \
+         patch.object(document_pipeline.index, "search", AsyncMock(return_value=[4])) as search:
+        response = client.get("/api/documentos/abc/paginas?lote=2&q=vista")
+
+    assert response.json()["paginas"] == [4]
+    assert lot_pages.await_count == 1
+    assert search.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_documento_inalterado_usa_get_condicional(mock_db, http, tmp_path):
+    pipeline = _pipeline(tmp_path)
+    url = "https://leiloeiro.example/edital.pdf"
+    primeiro = await pipeline.fetch(url)
+
+    segundo = await pipeline.fetch(url)
+
+    assert segundo["_id"] == primeiro["_id"]
+    assert http[-1].headers["if-none-match"] == '"v1"'
+    assert mock_db.documento_paginas.bulk_write.await_count == 1
+
+
+class _Interrompido(httpx.AsyncByteStream):
+    def __init__(self, inicio):
+        self.inicio = inicio
+
+    async def __aiter__(self):
+        yield self.inicio
+        raise httpx.ReadError("conexão interrompida")
+
+
+@pytest.mark.asyncio
+async def test_download_interrompido_e_retomado_com_o_proprio_validador(mock_db, tmp_path):
+    edital = _pdf(PAGINAS)
+    url = "https://leiloeiro.example/edital.pdf"
+    # Última versão completa era a v1; a interrompida é a v2
+    mock_db.documento_fontes.docs[url] = {"_id": url, "hash": "antigo", "etag": '"v1"'}
+    pipeline = _pipeline(tmp_path)
+    requests = []
+
+    def handler(req):
+        requests.append(req)
+        if "range" in req.headers:
+            return httpx.Response(206, content=edital[100:], headers={"etag": '"v2"'})
+        return httpx.Response(200, stream=_Interrompido(edital[:100]), headers={"etag": '"v2"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch("services.document_pipeline.get_http_client", return_value=client):
+        assert await pipeline.fetch(url) is None
+        partial = pipeline._partial_path(url)
+        assert partial.stat().st_size == 100
+
+        documento = await pipeline.fetch(url)
+
+    assert requests[1].headers["range"] == "bytes=100-"
+    assert requests[1].headers["if-range"] == '"v2"'
+    assert "if-none-match" not in requests[1].headers
+    assert documento["paginas"] == len(PAGINAS)
+    assert not partial.exists() and not partial.with_suffix(".json").exists()
+
+
+@pytest.mark.asyncio
+async def test_parcial_sem_validador_e_descartado(mock_db, http, tmp_path):
+    url = "https://leiloeiro.example/edital.pdf"
+    pipeline = _pipeline(tmp_path)
+    partial = pipeline._partial_path(url)
+    partial.parent.mkdir(parents=True)
+    partial.write_bytes(b"lixo de outra versao")
+
+    documento = await pipeline.fetch(url)
+
+    assert "range" not in http[0].headers
+    assert documento["paginas"] == len(PAGINAS)
+
+
+@pytest.mark.asyncio
+async def test_buscas_simultaneas_da_mesma_url_compartilham_o_download(mock_db, http, tmp_path):
+    pipeline = _pipeline(tmp_path)
+    url = "https://leiloeiro.example/edital.pdf"
+
+    primeiro, segundo = await asyncio.gather(pipeline.fetch(url), pipeline.fetch(url))
+
+    assert primeiro is not None and segundo["_id"] == primeiro["_id"]
+    assert len(http) == 1
+    armazenado = tmp_path / primeiro["arquivo"]
+    assert hashlib.sha256(armazenado.read_bytes()).hexdigest() == primeiro["_id"]
+    assert not pipeline._partial_path(url).exists()
+
+
+def test_normalizacao_e_urls_do_callback():
+    assert normalize_text("  Matrícula\n Nº 123 ") == "matricula no 123"
+    assert document_urls([{"url": "https://a/edital.pdf"}, {"href": "https://a/matricula.pdf"}, {"nome": "x"}]) == [
+        "https://a/edital.pdf",
+        "https://a/matricula.pdf",
+    ]
@@ -0,0 +1,59 @@
+from services.domain_reputation import (
+    CONFIAVEL, DESCONHECIDO, SUSPEITO, BKTree, assess_domain, find_lookalike, levenshtein, skeleton,
+)
+
+
+def test_esqueleto_normaliza_homoglifos_e_punycode():
+    cirilico = "sodresantоro.com.br".encode("idna").decode()
+    assert cirilico.startswith("xn--")
+    assert skeleton(cirilico) == "sodresantoro"
+    assert skeleton("www.SODRESANT0RO.com") == "sodresantoro"
+    assert skeleton("rnegaleiloes.com.br") == "megaleiloes"
+
+
+def test_arvore_bk_igual_a_busca_linear():
+    palavras = ["sodresantoro", "megaleiloes", "portalzuk", "superbid", "zukerman", "lancenoleilao"]
+    tree = BKTree(palavras)
+    for consulta in ["sodresantor", "megaleilao", "portalzuc", "xyz", "lanceleilao"]:
+        esperado = min(palavras, key=lambda p: levenshtein(consulta, p))
+        resultado = tree.nearest(consulta, 2)
+        if levenshtein(consulta, esperado) <= 2:
+            assert resultado[1] == levenshtein(consulta, esperado)
+        else:
+            assert resultado is None
+
+
+def test_dominio_parecido_aponta_o_leiloeiro_imitado():
+    suspeita = find_lookalike("sodre-santoro.com")
+    assert suspeita.semelhante_a == "sodresantoro.com.br"
+    assert suspeita.distancia == 1
+    assert find_lookalike("portalzuk.com").distancia == 0
+
+    assert find_lookalike("www.sodresantoro.com.br") is None
+    assert find_lookalike("google.com") is None
+
+
+def test_subdominio_de_leiloeiro_confiavel_nao_e_suspeito():
+    assert find_lookalike("m.portalzuk.com.br") is None
+    assert find_lookalike("imoveis.sodresantoro.com.br") is None
+    assert assess_domain("m.portalzuk.com.br")["classificacao"] == DESCONHECIDO
+    # Subdomínio de um domínio imitado continua suspeito
+    assert find_lookalike("m.p0rtalzuk.com.br").semelhante_a == "portalzuk.com.br"
+
+
+def test_avaliacao_do_dominio_para_a_analise():
+    assert assess_domain("sodresant0ro.com.br") == {
+        "classificacao": SUSPEITO, "semelhante_a": "sodresantoro.com.br", "distancia": 0,
+    }
+    assert assess_domain("sodresantoro.com.br")["classificacao"] == CONFIAVEL
+    assert assess_domain("exemplo.com")["classificacao"] == DESCONHECIDO
+
+
+def test_validate_url_rejeita_dominio_parecido(client):
+    response = client.post("/validate-url", json={"url": "https://sodresant0ro.com.br/lote/1"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == {
+        "error": "lookalike_domain", "domain": "sodresant0ro.com.br",
+        "similar_to": "sodresantoro.com.br", "distance": 0,
+    }
@@ -0,0 +1,73 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from config import MongoDB
+from services import warmup
+from services.analysis_cache import analysis_cache
+from services.domain_reputation import CONFIAVEL, DESCONHECIDO, FRAUDE, classify_domain
+from services.warmup import WarmupState, run_warmup
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    WarmupState.reset()
+    MongoDB.connected = False
+    analysis_cache.clear()
+    yield
+    WarmupState.reset()
+    MongoDB.connected = False
+    analysis_cache.clear()
+
+
+def test_liveness(client):
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+def test_readiness_antes_do_aquecimento(client):
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming_up"
+
+
+@pytest.mark.asyncio
+async def test_aquecimento_deixa_worker_pronto():
+    MongoDB.client = MagicMock()
+    MongoDB.client.admin.command = AsyncMock(return_value={"ok": 1})
+    cursor = MagicMock()
+    cursor.sort.return_value.limit.return_value.to_list = AsyncMock(
+        return_value=[{"url": "https://www.sodresantoro.com.br/lote/1", "titulo": "Casa"}]
+    )
+    MongoDB.db = MagicMock()
+    MongoDB.db.extraction_results.find.return_value = cursor
+
+    with patch.object(warmup, "WARMUP_ENABLED", True), \
+         patch("services.warmup.get_http_client"):
+        await run_warmup()
+        await warmup.prefetch_analyses(limit=1)
+
+    assert warmup.is_ready()
+    assert MongoDB.client.admin.command.await_count == warmup.WARMUP_MIN_CONNECTIONS
+    assert set(WarmupState.steps) == {name for name, _ in warmup.WARMUP_STEPS}
+    assert analysis_cache.get("https://www.sodresantoro.com.br/lote/1")["titulo"] == "Casa"
+
+
+@pytest.mark.asyncio
+async def test_falha_no_mongo_nao_fica_pronto():
+    MongoDB.client = MagicMock()
+    MongoDB.client.admin.command = AsyncMock(side_effect=Exception("sem conexão"))
+
+    with patch.object(warmup, "WARMUP_ENABLED", True), \
+         patch("services.warmup.get_http_client"):
+        await run_warmup()
+
+    assert WarmupState.done
+    assert WarmupState.steps["mongo_pool"].startswith("erro")
+    assert not warmup.is_ready()
+
+
+def test_classify_domain():
+    assert classify_domain("www.sodresantoro.com.br") == CONFIAVEL
+    assert classify_domain("Leiloes-Falsos.com.br.") == FRAUDE
+    assert classify_domain("exemplo.com") == DESCONHECIDO
@@ -0,0 +1,148 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from unittest.mock import MagicMock, patch
+
+from config import MongoDB
+from services.image_pipeline import ContentStore, ImagePipeline, _sniff_mime
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def _png(color="red", size=(1200, 900)):
+    buffer = io.BytesIO()
+    PIL.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Arquivos:
+    """Coleção em memória com o suficiente de find/find_one/update_one."""
+
+    def __init__(self):
+        self.docs = {}
+        self.upserts = 0
+
+    def find(self, query):
+        urls = set(query["metadata.fontes"]["$in"])
+        return _Cursor([d for d in self.docs.values() if urls & set(d["metadata"]["fontes"])])
+
+    async def find_one(self, query):
+        return self.docs.get(query["hash"])
+
+    async def update_one(self, filtro, update, upsert=False):
+        doc = self.docs.get(filtro.get("hash")) or next(
+            (d for d in self.docs.values() if d["_id"] == filtro.get("_id")), None
+        )
+        if doc is None and upsert:
+            self.upserts += 1
+            doc = {"hash": filtro["hash"], "metadata": {"fontes": []}}
+            for key, value in update["$setOnInsert"].items():
+                if key.startswith("metadata."):
+                    doc["metadata"][key.split(".", 1)[1]] = value
+                else:
+                    doc[key] = value
+            self.docs[filtro["hash"]] = doc
+        fonte = update.get("$addToSet", {}).get("metadata.fontes")
+        if fonte and fonte not in doc["metadata"]["fontes"]:
+            doc["metadata"]["fontes"].append(fonte)
+
+
+@pytest.fixture
+def arquivos():
+    db = MagicMock()
+    db.arquivos = _Arquivos()
+    MongoDB.db = db
+    yield db.arquivos
+    MongoDB.db = None
+
+
+@pytest.fixture
+def http():
+    fachada, planta = _png("gray"), _png("blue", (600, 600))
+    calls = []
+
+    def handler(req):
+        calls.append(str(req.url))
+        if req.url.path.endswith("planta.png"):
+            return httpx.Response(200, content=planta, headers={"content-type": "image/png"})
+        if req.url.path.endswith(".html"):
+            return httpx.Response(200, content=b"<html></html>", headers={"content-type": "text/html"})
+        return httpx.Response(200, content=fachada, headers={"content-type": "image/png"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch("services.image_pipeline.get_http_client", return_value=client):
+        yield calls
+
+
+def _pipeline(tmp_path):
+    executor = ThreadPoolExecutor(max_workers=2)
+    executor.submit = MagicMock(wraps=executor.submit)
+    return ImagePipeline(store=ContentStore(str(tmp_path)), executor=executor, sizes=(320,))
+
+
+@pytest.mark.asyncio
+async def test_mesma_foto_em_varios_lotes_e_gravada_uma_vez(arquivos, http, tmp_path):
+    pipeline = _pipeline(tmp_path)
+    urls = [
+        "https://cdn-a.example/lote1/fachada.png",
+        "https://cdn-b.example/lote2/fachada.png",
+        "https://cdn-a.example/lote3/planta.png",
+    ]
+
+    result = await pipeline.ingest(urls)
+
+    assert set(result) == set(urls)
+    assert result[urls[0]] is result[urls[1]]
+    assert arquivos.upserts == 2
+    # Uma geração de miniaturas por conteúdo, não por URL
+    assert pipeline.executor.submit.call_count == 2
+
+    fachada = result[urls[0]]
+    assert fachada["mime_type"] == "image/png"
+    assert fachada["tamanho"] > 0
+    assert fachada["url"] == f"/media/{fachada['hash'][:2]}/{fachada['hash'][2:4]}/{fachada['hash']}.png"
+    assert sorted(fachada["metadata"]["fontes"]) == sorted(urls[:2])
+    assert (fachada["metadata"]["largura"], fachada["metadata"]["altura"]) == (1200, 900)
+
+    thumb = tmp_path / "thumbs" / "320" / fachada["hash"][:2] / f"{fachada['hash']}.jpg"
+    with PIL.open(thumb) as image:
+        assert max(image.size) == 320
+
+
+@pytest.mark.asyncio
+async def test_urls_conhecidas_nao_sao_baixadas_de_novo(arquivos, http, tmp_path):
+    pipeline = _pipeline(tmp_path)
+    url = "https://cdn-a.example/lote1/fachada.png"
+    await pipeline.ingest([url])
+    await pipeline.ingest([url])
+
+    assert http == [url]
+
+
+@pytest.mark.asyncio
+async def test_conteudo_que_nao_e_imagem_e_ignorado(arquivos, http, tmp_path):
+    pipeline = _pipeline(tmp_path)
+    assert await pipeline.ingest(["https://leiloeiro.example/pagina.html", "data:image/png;base64,xx"]) == {}
+
+
+def test_sniff_mime_prefere_assinatura_do_conteudo():
+    assert _sniff_mime(b"\xff\xd8\xff\xe0rest", "image/png") == "image/jpeg"
+    assert _sniff_mime(b"????", "image/webp; charset=binary") == "image/webp"
+    assert _sniff_mime(b"<html>", "text/html") is None
@@ -0,0 +1,65 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+
+from utils.json_response import FastJSONResponse, default_encoder, get_dumps
+
+
+@pytest.fixture
+def documento():
+    return {
+        "_id": ObjectId("507f1f77bcf86cd799439011"),
+        "url": "https://www.sodresantoro.com.br/lote/123",
+        "timestamp": datetime(2024, 4, 1, 12, 30),
+        "valor": Decimal128("500000.50"),
+        "lances": Decimal128("3"),
+    }
+
+
+@pytest.mark.parametrize("backend", ["auto", "stdlib"])
+def test_dumps_converte_tipos_do_mongo(backend, documento):
+    dumps = get_dumps(backend)
+    data = json.loads(dumps([documento]))
+
+    assert data[0]["_id"] == "507f1f77bcf86cd799439011"
+    assert data[0]["timestamp"] == "2024-04-01T12:30:00"
+    assert data[0]["valor"] == 500000.5
+    assert data[0]["lances"] == 3
+
+
+def test_dumps_mantem_acentos():
+    data = get_dumps("stdlib")({"titulo": "Leilão"})
+    assert "Leilão".encode("utf-8") in data
+
+
+def test_default_encoder_tipo_desconhecido():
+    with pytest.raises(TypeError):
+        default_encoder(object())
+
+
+def test_default_encoder_decimal():
+    assert default_encoder(Decimal("10")) == 10
+    assert default_encoder(Decimal("10.25")) == 10.25
+
+
+@pytest.mark.parametrize("backend", ["auto", "stdlib"])
+def test_valores_nao_finitos_viram_null(backend):
+    dumps = get_dumps(backend)
+    data = json.loads(dumps({
+        "decimal": Decimal("NaN"),
+        "infinito": Decimal128("Infinity"),
+        "lista": [float("nan"), 1.5, {"float": float("-inf")}],
+    }))
+
+    assert data == {"decimal": None, "infinito": None, "lista": [None, 1.5, {"float": None}]}
+
+
+def test_fast_json_response_renderiza_bytes(documento):
+    response = FastJSONResponse([documento])
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body)[0]["url"] == documento["url"]
@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import pytest
+from bson import ObjectId
+
+from services.live_feed import SLOW_CONSUMER_CLOSE_CODE, LiveFeedHub, Subscriber
+
+LEILAO_ID = ObjectId()
+
+
+class _FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+class _CountingBus:
+    def __init__(self):
+        self.handlers = []
+        self.published = []
+
+    def subscribe(self, handler):
+        self.handlers.append(handler)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        for handler in self.handlers:
+            handler(channel, message)
+
+
+@pytest.mark.asyncio
+async def test_evento_serializado_uma_vez_para_todos_os_inscritos():
+    bus = _CountingBus()
+    hub = LiveFeedHub(bus)
+    sockets = [_FakeWebSocket() for _ in range(3)]
+    subscribers = [Subscriber(ws, max_fps=0) for ws in sockets]
+    for subscriber in subscribers:
+        hub.subscribe(subscriber, [str(LEILAO_ID)])
+
+    await hub.publish(LEILAO_ID, "lance", {"valor": 1500.0})
+
+    assert len(bus.published) == 1
+    frames = {id(s._queue[0]) for s in subscribers}
+    assert len(frames) == 1
+    assert hub.watchers(str(LEILAO_ID)) == 3
+
+
+@pytest.mark.asyncio
+async def test_rajada_agrupada_em_uma_mensagem():
+    hub = LiveFeedHub()
+    ws = _FakeWebSocket()
+    subscriber = Subscriber(ws, max_fps=1000)
+    hub.subscribe(subscriber, [str(LEILAO_ID)])
+
+    for valor in (1000.0, 1100.0, 1200.0):
+        await hub.publish(LEILAO_ID, "lance", {"valor": valor})
+    task = asyncio.create_task(subscriber.run())
+    await asyncio.sleep(0.01)
+    subscriber.close()
+    await task
+
+    assert len(ws.sent) == 1
+    assert [e["data"]["valor"] for e in ws.sent[0]] == [1000.0, 1100.0, 1200.0]
+    assert ws.sent[0][0]["leilao_id"] == str(LEILAO_ID)
+
+
+@pytest.mark.asyncio
+async def test_consumidor_lento_e_desconectado():
+    hub = LiveFeedHub()
+    ws = _FakeWebSocket()
+    subscriber = Subscriber(ws, max_queue=2)
+    hub.subscribe(subscriber, [str(LEILAO_ID)])
+
+    for valor in range(3):
+        await hub.publish(LEILAO_ID, "lance", {"valor": valor})
+
+    assert subscriber.dropped
+    assert hub.watchers(str(LEILAO_ID)) == 0
+    await subscriber.run()
+    assert ws.close_code == SLOW_CONSUMER_CLOSE_CODE
+    assert ws.sent == []
+
+
+def test_websocket_confirma_inscricao(client):
+    with client.websocket_connect(f"/ws/leiloes?leilao_id={LEILAO_ID}&leilao_id=invalido") as websocket:
+        ack = websocket.receive_json()
+    assert ack["tipo"] == "inscrito"
+    assert ack["leiloes"] == [str(LEILAO_ID)]
+    assert "agora" in ack
@@ -0,0 +1,97 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from config import MongoDB
+
+np = pytest.importorskip("numpy")
+
+from services.market_analytics import (  # noqa: E402
+    MarketAnalytics, bargains, build_snapshot, compute_stats, grouped_percentiles,
+)
+
+
+def _doc(i, cidade, tipo, preco, area, desconto=None):
+    return {
+        "url": f"https://leilao.example/{i}",
+        "busca": {"estado": "PR", "cidade": cidade, "tipo": tipo, "preco": preco * 100, "area": area, "desconto": desconto},
+    }
+
+
+DOCS = [
+    _doc(0, "curitiba", "apartamento", 300000, 60, 20.0),
+    _doc(1, "curitiba", "apartamento", 330000, 60, 10.0),
+    _doc(2, "curitiba", "apartamento", 360000, 60, 30.0),
+    _doc(3, "curitiba", "apartamento", 390000, 60),
+    _doc(4, "curitiba", "apartamento", 60000, 60, 70.0),
+    _doc(5, "londrina", "casa", 200000, 100, 40.0),
+    _doc(6, "londrina", "casa", 250000, None, 45.0),
+]
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def test_percentis_por_grupo_iguais_ao_numpy():
+    rng = np.random.default_rng(7)
+    values = rng.normal(100, 20, 500)
+    values[::17] = np.nan
+    codes = rng.integers(0, 6, 500)
+
+    pct, counts = grouped_percentiles(values, codes, 7)
+
+    for g in range(6):
+        grupo = values[(codes == g) & ~np.isnan(values)]
+        assert counts[g] == grupo.size
+        np.testing.assert_allclose(pct[g], np.percentile(grupo, [10, 25, 50, 75, 90]))
+    assert counts[6] == 0 and np.isnan(pct[6]).all()
+
+
+def test_estatisticas_por_cidade_e_tipo():
+    snapshot = build_snapshot((len(DOCS), None), DOCS)
+
+    grupos = {(g["cidade"], g["tipo"]): g for g in compute_stats(snapshot, "cidade_tipo")}
+
+    apto = grupos[("curitiba", "apartamento")]
+    assert apto["total"] == 5
+    assert apto["metricas"]["preco_m2"]["p50"] == 5500.0
+    assert apto["metricas"]["desconto"]["amostras"] == 4
+    assert apto["outliers"] == 1
+    casa = grupos[("londrina", "casa")]
+    assert casa["metricas"]["preco_m2"]["amostras"] == 1
+    assert casa["metricas"]["preco"]["media"] == 225000.0
+
+    oportunidades = bargains(snapshot)
+    assert [o["url"] for o in oportunidades] == ["https://leilao.example/4"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_reaproveitado_enquanto_a_versao_nao_muda():
+    db = MagicMock()
+    db.extraction_results.count_documents = AsyncMock(side_effect=[7, 7, 8])
+    db.extraction_results.find_one = AsyncMock(return_value={"timestamp": 1})
+    db.extraction_results.find.side_effect = lambda *args: _Cursor(DOCS)
+    MongoDB.db = db
+    analytics = MarketAnalytics(version_check=0)
+    try:
+        versao, primeiro = await analytics.stats("cidade")
+        _, segundo = await analytics.stats("cidade")
+        nova_versao, terceiro = await analytics.stats("cidade")
+    finally:
+        MongoDB.db = None
+
+    assert versao == (7, 1)
+    assert segundo is primeiro
+    assert nova_versao == (8, 1) and terceiro is not primeiro
+    assert db.extraction_results.find.call_count == 2
@@ -0,0 +1,81 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pydantic import ValidationError
+
+from app.models.base import PyObjectId, dump_many, dump_many_json, list_adapter, validate_many
+from app.models.lance import LanceInDB
+from app.models.leilao import LeilaoCreate
+from models.url_log import URLLogCreate
+
+
+def _lance(valor=100.0):
+    return {
+        "_id": ObjectId(),
+        "valor": valor,
+        "leilao_id": str(ObjectId()),
+        "usuario_id": ObjectId(),
+    }
+
+
+def test_py_object_id_aceita_string_e_object_id():
+    oid = ObjectId()
+    lance = LanceInDB.model_validate({**_lance(), "_id": str(oid)})
+
+    assert lance.id == oid
+    assert isinstance(lance.leilao_id, ObjectId)
+    assert PyObjectId.validate(oid) is oid
+
+
+def test_py_object_id_invalido():
+    with pytest.raises(ValidationError):
+        LanceInDB.model_validate({**_lance(), "leilao_id": "invalido"})
+
+
+def test_py_object_id_serializa_string_apenas_em_json():
+    lance = LanceInDB.model_validate(_lance())
+
+    assert isinstance(lance.model_dump(by_alias=True)["_id"], ObjectId)
+    assert lance.model_dump(mode="json")["id"] == str(lance.id)
+
+
+def test_json_schema_object_id_string():
+    schema = LanceInDB.model_json_schema()
+    assert schema["properties"]["leilao_id"]["type"] == "string"
+
+
+def test_validador_data_fim_usa_dados_validados():
+    inicio = datetime(2024, 4, 1)
+    with pytest.raises(ValidationError):
+        LeilaoCreate(
+            titulo="Casa",
+            descricao="Casa 3 quartos",
+            valor_inicial=100000,
+            valor_minimo_incremento=1000,
+            data_inicio=inicio,
+            data_fim=inicio - timedelta(days=1),
+            categoria_id=ObjectId(),
+        )
+
+
+def test_timestamp_gerado_por_instancia():
+    primeiro = URLLogCreate(url="https://a.com", dominio="a.com", status="ok")
+    segundo = URLLogCreate(url="https://b.com", dominio="b.com", status="ok")
+
+    assert primeiro.timestamp <= segundo.timestamp
+    assert URLLogCreate.model_fields["timestamp"].default_factory is not None
+
+
+def test_list_adapter_em_cache():
+    assert list_adapter(LanceInDB) is list_adapter(LanceInDB)
+
+
+def test_validate_e_dump_em_lote():
+    documentos = [_lance(valor) for valor in (10.123, 20.0, 30.5)]
+    lances = validate_many(LanceInDB, (doc for doc in documentos))
+
+    assert [lance.valor for lance in lances] == [10.12, 20.0, 30.5]
+    assert dump_many(LanceInDB, lances)[0]["_id"] == documentos[0]["_id"]
+    assert json.loads(dump_many_json(LanceInDB, lances))[0]["_id"] == str(documentos[0]["_id"])
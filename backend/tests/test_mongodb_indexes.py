@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from config import MongoDB
+
+
+def _mock_client(ping=None):
+    client = MagicMock()
+    client.admin.command = ping or AsyncMock(return_value={"ok": 1})
+    db = MagicMock()
+    collections = {}
+
+    def get_collection(name):
+        collections.setdefault(name, MagicMock(create_indexes=AsyncMock()))
+        return collections[name]
+
+    db.__getitem__.side_effect = get_collection
+    client.__getitem__.return_value = db
+    return client, collections
+
+
+@pytest.mark.asyncio
+async def test_connect_nao_bloqueia_e_cria_indices_em_background():
+    client, collections = _mock_client()
+    with patch("config.AsyncIOMotorClient", return_value=client):
+        await MongoDB.connect_to_database("mongodb://teste")
+        assert MongoDB.db is not None
+
+        await MongoDB._index_task
+
+    assert MongoDB.connected
+    assert MongoDB.indexes_ready
+    assert set(collections) == set(MongoDB.INDEXES)
+    for name, collection in collections.items():
+        collection.create_indexes.assert_awaited_once_with(MongoDB.INDEXES[name])
+
+
+@pytest.mark.asyncio
+async def test_falha_no_ping_nao_derruba_o_worker():
+    client, _ = _mock_client(ping=AsyncMock(side_effect=Exception("timeout")))
+    MongoDB.client = client
+    MongoDB.connected = False
+    MongoDB.indexes_ready = False
+
+    await MongoDB.reconcile_indexes(retries=2, delay=0)
+
+    assert client.admin.command.await_count == 2
+    assert not MongoDB.connected
+    assert not MongoDB.indexes_ready
+
+
+@pytest.mark.asyncio
+async def test_close_cancela_reconciliacao_pendente():
+    MongoDB.client = MagicMock()
+    MongoDB._index_task = asyncio.create_task(asyncio.sleep(10))
+
+    await MongoDB.close_database_connection()
+    await asyncio.sleep(0)
+
+    assert MongoDB._index_task.cancelled()
+    assert MongoDB.client is None
+    assert not MongoDB.indexes_ready
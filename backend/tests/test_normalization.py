@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock
+
+from config import MongoDB
+from services.normalization_backfill import backfill_extraction_results
+from utils.normalization import NORMALIZATION_VERSION, normalized_fields, parse_br_datetime, parse_brl_cents
+
+
+def test_precos_em_centavos():
+    assert parse_brl_cents("R$ 500.000,00") == 50000000
+    assert parse_brl_cents("R$ 1.234,5") == 123450
+    assert parse_brl_cents("R$ 999") == 99900
+    assert parse_brl_cents(1500.25) == 150025
+    assert parse_brl_cents("a combinar") is None
+    assert parse_brl_cents(None) is None
+
+
+def test_datas_em_datetime():
+    assert parse_br_datetime("Leilão em 05/04/2024 às 14h30") == datetime(2024, 4, 5, 14, 30)
+    assert parse_br_datetime("2024-04-05") == datetime(2024, 4, 5)
+    assert parse_br_datetime("31/02/2024") is None
+    assert parse_br_datetime("em breve") is None
+
+
+def test_campos_normalizados_da_extracao():
+    campos = normalized_fields({
+        "valor_minimo": "R$ 150.000,00",
+        "evaluated_value": "R$ 200.000,00",
+        "data_leilao": "2024-04-05",
+    })
+
+    assert campos == {
+        "valor_minimo_centavos": 15000000,
+        "valor_avaliacao_centavos": 20000000,
+        "desconto_percentual": 25.0,
+        "data_leilao_em": datetime(2024, 4, 5),
+        "normalizacao": NORMALIZATION_VERSION,
+    }
+
+
+@pytest.mark.asyncio
+async def test_backfill_em_lotes_marca_so_o_mais_recente_como_ativo():
+    antigo, recente = ObjectId(), ObjectId()
+    docs = [
+        {"_id": antigo, "url": "https://leilao.example/1", "valor_minimo": "R$ 100.000,00"},
+        {"_id": recente, "url": "https://leilao.example/1", "valor_minimo": "R$ 90.000,00"},
+    ]
+    db = MagicMock()
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(side_effect=[docs, []])
+    db.extraction_results.find.return_value = cursor
+    db.extraction_results.aggregate.return_value.to_list = AsyncMock(return_value=[{"_id": docs[0]["url"], "ultimo": recente}])
+    db.extraction_results.bulk_write = AsyncMock()
+    MongoDB.db = db
+    try:
+        total = await backfill_extraction_results(batch_size=2)
+    finally:
+        MongoDB.db = None
+
+    assert total == 2
+    ops = db.extraction_results.bulk_write.call_args.args[0]
+    updates = {op._filter["_id"]: op._doc["$set"] for op in ops}
+    assert updates[antigo]["valor_minimo_centavos"] == 10000000
+    assert updates[antigo]["busca"]["ativo"] is False
+    assert updates[recente]["busca"]["ativo"] is True
+    assert updates[recente]["busca"]["preco"] == 9000000
+    # O segundo lote continua depois do último _id processado
+    assert db.extraction_results.find.call_args.args[0]["_id"] == {"$gt": recente}
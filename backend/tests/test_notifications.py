@@ -0,0 +1,141 @@
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.email import EmailCreate
+from app.models.notificacao import NotificacaoCreate
+from app.models.push import PushCreate
+from config import MongoDB
+from services.notifications import (
+    ENVIADO, ERRO, NotificationDispatcher, TokenBucket, _default_channels, compile_template, notify_users,
+)
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    collections = {}
+
+    def collection(name):
+        if name not in collections:
+            collections[name] = MagicMock(bulk_write=AsyncMock(), insert_many=AsyncMock())
+        return collections[name]
+
+    db.__getitem__.side_effect = collection
+    db.notificacoes = collection("notificacoes")
+    MongoDB.db = db
+    yield collections
+    MongoDB.db = None
+
+
+def _dispatcher():
+    return NotificationDispatcher(channels=_default_channels(), batch_wait=0.01)
+
+
+def _push(destinatarios, valor="1.500,00"):
+    return PushCreate(
+        titulo="",
+        mensagem="",
+        destinatarios=destinatarios,
+        template="lance_superado",
+        dados={"leilao": "Apartamento Centro", "valor": valor},
+    )
+
+
+@pytest.mark.asyncio
+async def test_mensagens_iguais_viram_um_envio_em_lote(mock_db):
+    dispatcher = _dispatcher()
+    usuarios = [ObjectId() for _ in range(600)]
+
+    assert await dispatcher.enqueue("push", _push(usuarios[:300]))
+    assert await dispatcher.enqueue("push", _push(usuarios[300:]))
+    await dispatcher.flush()
+
+    provider = dispatcher.channels["push"].provider
+    # 600 destinatários, lotes de 500 por chamada
+    assert [len(r) for r, _ in provider.calls] == [500, 100]
+    assert provider.calls[0][1]["mensagem"] == "Um novo lance de R$ 1.500,00 foi dado no leilão Apartamento Centro."
+
+    ops = mock_db["push"].bulk_write.call_args.args[0]
+    assert len(ops) == 2
+    assert ops[0]._doc["$set"]["status"] == ENVIADO
+    assert "status" not in ops[0]._doc["$setOnInsert"]
+
+
+@pytest.mark.asyncio
+async def test_deduplica_dentro_da_janela(mock_db):
+    dispatcher = _dispatcher()
+    usuario = ObjectId()
+
+    assert await dispatcher.enqueue("push", _push([usuario]))
+    assert not await dispatcher.enqueue("push", _push([usuario]))
+    # Conteúdo diferente não é duplicata
+    assert await dispatcher.enqueue("push", _push([usuario], valor="2.000,00"))
+    await dispatcher.flush()
+
+    assert len(dispatcher.channels["push"].provider.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_falha_do_provedor_marca_erro(mock_db):
+    dispatcher = _dispatcher()
+    dispatcher.channels["email"].provider.send = AsyncMock(side_effect=Exception("SMTP indisponível"))
+
+    await dispatcher.enqueue("email", EmailCreate(
+        assunto="Olá", destinatarios=["ana@example.com"], template="leilao_encerrado",
+        dados={"leilao": "Casa", "valor": "100,00"},
+    ))
+    await dispatcher.flush()
+
+    status = mock_db["emails"].bulk_write.call_args.args[0][0]._doc["$set"]
+    assert status["status"] == ERRO
+    assert status["erro"] == "SMTP indisponível"
+    assert status["enviado_em"] is None
+
+
+@pytest.mark.asyncio
+async def test_notificacao_in_app_gravada_em_lote(mock_db):
+    dispatcher = _dispatcher()
+    for _ in range(3):
+        await dispatcher.enqueue("notificacao", NotificacaoCreate(
+            titulo="Lance superado", mensagem="...", tipo="lance", usuario_id=ObjectId(),
+        ))
+    await dispatcher.flush()
+
+    mock_db["notificacoes"].insert_many.assert_awaited_once()
+    assert len(mock_db["notificacoes"].insert_many.call_args.args[0]) == 3
+
+
+def test_template_compilado_uma_vez_por_locale():
+    compile_template.cache_clear()
+    compile_template("lance_superado", "pt-BR")
+    compile_template("lance_superado", "pt-BR")
+    info = compile_template.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limita_taxa():
+    bucket = TokenBucket(rate=1000, capacity=10)
+    await bucket.acquire(10)
+    assert bucket.tokens < 1
+    await bucket.acquire(5)
+    assert bucket.tokens < 1
+
+
+@pytest.mark.asyncio
+async def test_aviso_vai_por_push_e_in_app(mock_db):
+    from services import notifications
+
+    dispatcher = _dispatcher()
+    usuarios = [ObjectId(), ObjectId()]
+    dados = {"leilao": "Apartamento Centro", "valor": "1.500,00"}
+
+    with patch.object(notifications, "notification_dispatcher", dispatcher):
+        await notify_users("lance_superado", usuarios + usuarios[:1], dados, tipo="lance")
+        await dispatcher.flush()
+
+    assert [len(r) for r, _ in dispatcher.channels["push"].provider.calls] == [2]
+    docs = mock_db["notificacoes"].insert_many.call_args.args[0]
+    assert sorted(d["usuario_id"] for d in docs) == sorted(usuarios)
+    assert docs[0]["titulo"] == "Seu lance foi superado"
@@ -0,0 +1,108 @@
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from config import MongoDB
+from services.page_fetch import body_hash, fetch_page, store_extraction
+from utils.urls import canonical_url
+
+URL = "https://www.sodresantoro.com.br/lote/1?utm_source=email"
+HTML = b"<html><body><h1>Apartamento</h1><p>R$ 150.000,00</p></body></html>"
+EXTRACAO = {"titulo": "Apartamento", "valor_minimo": "R$ 150.000,00"}
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.fetch_cache.find_one = AsyncMock(return_value=None)
+    db.fetch_cache.update_one = AsyncMock()
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+def _http(handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return patch("services.page_fetch.get_http_client", return_value=client)
+
+
+def test_url_canonica():
+    assert canonical_url("HTTPS://Leilao.Example:443/lote/1/?utm_source=x&b=2&a=1&fbclid=y#fotos") == (
+        "https://leilao.example/lote/1?a=1&b=2"
+    )
+    assert canonical_url("http://leilao.example:8080") == "http://leilao.example:8080/"
+
+
+@pytest.mark.asyncio
+async def test_primeira_busca_guarda_validadores_e_extracao(mock_db):
+    with _http(lambda req: httpx.Response(200, content=HTML, headers={"etag": '"v1"'})):
+        page = await fetch_page(URL)
+
+    assert not page.unchanged and page.text == HTML.decode()
+    await store_extraction(page, EXTRACAO)
+
+    filtro, update = mock_db.fetch_cache.update_one.call_args.args
+    assert filtro == {"_id": "https://www.sodresantoro.com.br/lote/1"}
+    assert update["$set"]["etag"] == '"v1"'
+    assert update["$set"]["hash"] == body_hash(HTML)
+    assert update["$set"]["extracao"] == EXTRACAO
+
+
+@pytest.mark.asyncio
+async def test_user_agent_do_crawler_substitui_o_do_navegador(mock_db):
+    enviados = []
+
+    def handler(req):
+        enviados.append(req)
+        return httpx.Response(200, content=HTML)
+
+    with _http(handler):
+        await fetch_page(URL, user_agent="LeilaoInsightsBot/1.0")
+
+    assert enviados[0].headers["user-agent"] == "LeilaoInsightsBot/1.0"
+
+
+@pytest.mark.asyncio
+async def test_304_reaproveita_extracao(mock_db):
+    mock_db.fetch_cache.find_one.return_value = {"etag": '"v1"', "hash": body_hash(HTML), "extracao": EXTRACAO}
+    enviados = []
+
+    def handler(req):
+        enviados.append(req)
+        return httpx.Response(304) if req.headers.get("if-none-match") == '"v1"' else httpx.Response(200, content=HTML)
+
+    with _http(handler):
+        page = await fetch_page(URL)
+
+    assert page.unchanged and page.extracao == EXTRACAO
+    assert enviados[0].headers["if-none-match"] == '"v1"'
+
+
+@pytest.mark.asyncio
+async def test_mesmo_hash_sem_validadores_reaproveita_extracao(mock_db):
+    mock_db.fetch_cache.find_one.return_value = {"hash": body_hash(HTML), "extracao": EXTRACAO}
+
+    with _http(lambda req: httpx.Response(200, content=HTML)):
+        page = await fetch_page(URL)
+    assert page.unchanged
+
+    with _http(lambda req: httpx.Response(200, content=HTML.replace(b"150", b"120"))):
+        page = await fetch_page(URL)
+    assert not page.unchanged
+
+
+@pytest.mark.asyncio
+async def test_analise_de_pagina_inalterada_nao_extrai_de_novo(mock_db):
+    from services import analysis_service
+
+    page = MagicMock(unchanged=True, extracao=EXTRACAO, etag='"v1"', last_modified=None, hash="abc")
+    with patch.object(analysis_service, "fetch_page", AsyncMock(return_value=page)), \
+         patch.object(analysis_service, "extract_basic_data", AsyncMock()) as extract, \
+         patch.object(analysis_service, "save_pre_analysis", AsyncMock()) as save, \
+         patch.object(analysis_service.recrawl_scheduler, "track", AsyncMock()), \
+         patch.object(analysis_service.valuation_engine, "estimate_url", AsyncMock(return_value=None)):
+        await analysis_service.analyze_property(URL)
+
+    extract.assert_not_called()
+    assert save.call_args.kwargs["status"] == "completed"
+    assert save.call_args.kwargs["result"]["titulo"] == "Apartamento"
@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from config import MongoDB
+
+np = pytest.importorskip("numpy")
+
+from services.page_fingerprint import CloneDetector, FingerprintIndex, hamming, simhash  # noqa: E402
+
+
+def _pagina(titulo, lance, rodape="Sodré Santoro Leilões"):
+    condicoes = [
+        "o arrematante paga a comissão de cinco por cento ao leiloeiro",
+        "o pagamento do lance deve ser feito em até vinte e quatro horas",
+        "débitos de condomínio e IPTU anteriores ficam por conta do comprador",
+        "o imóvel é vendido no estado em que se encontra, sem garantia de metragem",
+        "a desocupação é de responsabilidade do arrematante",
+        "lances podem ser parcelados conforme o edital do processo",
+        "a visitação depende de agendamento com a administradora",
+        "o edital completo está disponível para download nesta página",
+    ]
+    itens = "".join(f"<li class='item'>{texto}</li>" for texto in condicoes)
+    return (
+        "<html><head><style>.x{}</style><script>var id = 1;</script></head><body>"
+        f"<div class='lote destaque'><h1>{titulo}</h1><p>Lance mínimo R$ {lance}</p>"
+        f"<ul class='condicoes'>{itens}</ul></div><footer>{rodape} atendimento de segunda a sexta</footer></body></html>"
+    )
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _distancia(a, b):
+    return bin(a ^ b).count("1")
+
+
+def test_simhash_proximo_para_paginas_parecidas():
+    original = simhash(_pagina("Apartamento em Curitiba", "150.000,00"))
+    copia = simhash(_pagina("Apartamento em Curitiba", "180.000,00").replace("var id = 1", "var id = 2"))
+    outra = simhash("<html><body><table><tr><td>Veículo Fiat Uno 2010, placa final 3</td></tr></table></body></html>")
+
+    assert _distancia(original, copia) <= 3
+    assert _distancia(original, outra) > 10
+    assert simhash("<html><script>x()</script></html>") is None
+
+
+def test_indice_igual_a_busca_linear():
+    rng = np.random.default_rng(3)
+    base = rng.integers(-2**63, 2**63 - 1, 5000, dtype=np.int64).view(np.uint64)
+    index = FingerprintIndex(merge_threshold=64)
+    index.extend([f"u{i}" for i in range(4000)], ["a.com"] * 4000, base[:4000])
+    for i in range(4000, 5000):
+        index.add(f"u{i}", "b.com", int(base[i]))
+
+    for alvo in (17, 4321, 4999):
+        consulta = int(base[alvo]) ^ 0b1001
+        esperado = sorted(f"u{i}" for i in np.flatnonzero(hamming(base, consulta) <= 3))
+        assert sorted(url for url, _, _ in index.query(consulta)) == esperado
+
+    # Reindexar uma URL descarta a assinatura anterior
+    index.add("u17", "a.com", int(base[17]) ^ (2**64 - 1))
+    assert "u17" not in [url for url, _, _ in index.query(int(base[17]))]
+    assert len(index) == 5000
+
+
+@pytest.mark.asyncio
+async def test_clone_em_dominio_nao_confiavel():
+    original = _pagina("Apartamento em Curitiba", "150.000,00")
+    db = MagicMock()
+    db.page_fingerprints.find.return_value = _Cursor([])
+    db.page_fingerprints.update_one = AsyncMock()
+    MongoDB.db = db
+    detector = CloneDetector()
+    try:
+        assert await detector.check("https://www.sodresantoro.com.br/lote/1", original) is None
+        clone = await detector.check("https://leiloes-oficiais.net/lote/1", original.replace("150.000", "90.000"))
+        repetida = await detector.check("https://www.sodresantoro.com.br/lote/2", original)
+    finally:
+        MongoDB.db = None
+
+    assert clone["semelhante_a"] == "https://www.sodresantoro.com.br/lote/1"
+    assert clone["dominio"] == "www.sodresantoro.com.br"
+    # Páginas parecidas do próprio leiloeiro confiável não são clones
+    assert repetida is None
+    salvo = db.page_fingerprints.update_one.call_args_list[1].args
+    assert salvo[0] == {"_id": "https://leiloes-oficiais.net/lote/1"}
+    assert salvo[1]["$set"]["confiavel"] is False
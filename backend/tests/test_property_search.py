@@ -0,0 +1,117 @@
+import base64
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from unittest.mock import AsyncMock, MagicMock
+
+from config import MongoDB
+from services.property_search import build_filter, decode_cursor, search_fields, search_properties
+
+DOCS = [
+    {"_id": ObjectId(), "url": f"https://leilao.example/{i}", "busca": {"preco": preco}}
+    for i, preco in enumerate([10000000, 15000000, 15000000])
+]
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(return_value=DOCS)
+    db.extraction_results.find.return_value = cursor
+    db.extraction_results.aggregate.return_value.to_list = AsyncMock(return_value=[{
+        "estado": [{"_id": "PR", "count": 3}],
+        "cidade": [{"_id": "curitiba", "count": 2}, {"_id": None, "count": 1}],
+        "tipo": [],
+        "modalidade": [],
+        "total": [{"total": 3}],
+    }])
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+def test_campos_de_busca_normalizados():
+    busca = search_fields({
+        "valor_minimo": "R$ 300.000,00",
+        "evaluated_value": "R$ 400.000,00",
+        "address": "Rua XV de Novembro, 100 - Centro, São José dos Pinhais - PR",
+        "property_type": "Apartamento",
+        "auction_type": "Venda Online",
+        "quartos": "3 quartos",
+        "area_privada": "72,50 m²",
+        "aceita_fgts": "Sim",
+        "data_leilao": "25/03/2024 às 10:00",
+    })
+
+    assert busca["preco"] == 30000000
+    assert busca["avaliacao"] == 40000000
+    assert busca["desconto"] == 25.0
+    assert (busca["cidade"], busca["estado"]) == ("sao jose dos pinhais", "PR")
+    assert busca["tipo"] == "apartamento"
+    assert busca["quartos"] == 3
+    assert busca["area"] == 72.5
+    assert busca["aceita_fgts"] is True
+    assert busca["data_fim"] == datetime(2024, 3, 25, 10, 0)
+
+
+def test_filtros_da_tela_viram_consulta_sobre_busca():
+    query = build_filter(cidade="São Paulo", estado="sp", preco_min=100000, preco_max=500000.5, quartos=2)
+
+    assert query == {
+        "busca.ativo": True,
+        "busca.estado": "SP",
+        "busca.cidade": "sao paulo",
+        "busca.preco": {"$gte": 10000000, "$lte": 50000050},
+        "busca.quartos": {"$gte": 2},
+    }
+
+
+@pytest.mark.asyncio
+async def test_paginacao_por_cursor_e_facetas(mock_db):
+    resultado = await search_properties({"estado": "PR"}, ordenar="preco", limite=2)
+
+    assert [d["_id"] for d in resultado["resultados"]] == [d["_id"] for d in DOCS[:2]]
+    assert decode_cursor(resultado["proximo_cursor"]) == (15000000, DOCS[1]["_id"])
+    assert resultado["total"] == 3
+    assert resultado["facetas"]["cidade"] == [{"valor": "curitiba", "total": 2}]
+    mock_db.extraction_results.find.return_value.sort.assert_called_with([("busca.preco", 1), ("_id", 1)])
+
+    await search_properties({"estado": "PR"}, ordenar="preco", limite=2, cursor=resultado["proximo_cursor"], facetas=False)
+
+    query = mock_db.extraction_results.find.call_args.args[0]
+    assert query["$and"][0]["busca.preco"] == {"$ne": None}
+    assert query["$and"][-1] == {"$or": [
+        {"busca.preco": {"$gt": 15000000}},
+        {"busca.preco": 15000000, "_id": {"$gt": DOCS[1]["_id"]}},
+    ]}
+    assert mock_db.extraction_results.aggregate.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_total_das_facetas_usa_o_mesmo_filtro_da_ordenacao(mock_db):
+    await search_properties({"estado": "PR", "preco_min": 100000}, ordenar="data_fim")
+
+    match = mock_db.extraction_results.aggregate.call_args.args[0][0]["$match"]
+    resultados = mock_db.extraction_results.find.call_args.args[0]["$and"][0]
+    assert match == resultados
+    assert match["busca.data_fim"] == {"$ne": None}
+    assert match["busca.preco"] == {"$gte": 10000000}
+
+    await search_properties({"preco_min": 100000}, ordenar="preco", facetas=False)
+    assert mock_db.extraction_results.find.call_args.args[0]["$and"][0]["busca.preco"] == {"$gte": 10000000, "$ne": None}
+
+
+def test_ordenacao_invalida_retorna_422(client):
+    response = client.get("/api/imoveis/busca", params={"ordenar": "quartos"})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("conteudo", [b"123", b"[1, 2, 3]", b'{"a": 1}', b"nao e json"])
+def test_cursor_invalido_retorna_422(client, conteudo):
+    cursor = base64.urlsafe_b64encode(conteudo).decode()
+    response = client.get("/api/imoveis/busca", params={"ordenar": "preco", "cursor": cursor})
+    assert response.status_code == 422
@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from config import MongoDB
+from utils.normalization import normalized_fields
+from services.recrawl import (
+    RECRAWL_MAX_INTERVAL, RECRAWL_MIN_INTERVAL, DomainBudget, RecrawlScheduler, body_hash, next_interval,
+)
+
+AGORA = datetime(2024, 4, 1, 12, 0)
+URL = "https://www.sodresantoro.com.br/lote/1"
+HTML = "<html><body><h1>Apartamento</h1><p>R$ 150.000,00</p><span>05/04/2024</span></body></html>"
+
+
+def _doc(**extra):
+    campos = {"titulo": "Apartamento", "valor_minimo": "R$ 150.000,00", "imagem": None, "data_leilao": "2024-04-05"}
+    return {
+        "_id": URL,
+        "dominio": "www.sodresantoro.com.br",
+        "campos": {**campos, **normalized_fields(campos)},
+        "etag": '"v1"',
+        "hash": body_hash(HTML.encode()),
+        "sem_mudanca": 2,
+        "data_leilao_em": datetime(2024, 4, 5),
+        **extra,
+    }
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.monitoramento.update_one = AsyncMock()
+    db.monitoramento_alteracoes.insert_one = AsyncMock()
+    db.pre_analysis_logs.update_one = AsyncMock()
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+def _scheduler(status_code=200, text=HTML, headers=None):
+    scheduler = RecrawlScheduler(horizon=0)
+    response = MagicMock(status_code=status_code, text=text, content=text.encode(), headers=headers or {})
+    scheduler._fetch = AsyncMock(return_value=response)
+    return scheduler
+
+
+def test_intervalo_recua_sem_mudanca_e_aperta_perto_do_leilao():
+    assert next_interval(0, None, AGORA) == RECRAWL_MIN_INTERVAL
+    assert next_interval(3, None, AGORA) == RECRAWL_MIN_INTERVAL * 8
+    assert next_interval(30, None, AGORA) == RECRAWL_MAX_INTERVAL
+    # A dois dias do leilão, mesmo sem mudanças, visita a cada 12 horas
+    assert next_interval(30, AGORA + timedelta(days=2), AGORA) == 12 * 3600
+    assert next_interval(30, AGORA + timedelta(minutes=10), AGORA) == RECRAWL_MIN_INTERVAL
+
+
+def test_orcamento_por_dominio():
+    budget = DomainBudget(per_minute=2)
+
+    assert budget.take("a.com", now=0) == 0
+    assert budget.take("a.com", now=0) == 0
+    assert budget.take("a.com", now=0) == pytest.approx(30)
+    assert budget.take("b.com", now=0) == 0
+    assert budget.take("a.com", now=30) == 0
+
+
+@pytest.mark.asyncio
+async def test_304_nao_grava_alteracoes(mock_db):
+    scheduler = _scheduler(status_code=304)
+
+    alteracoes = await scheduler.refresh(_doc(), AGORA)
+
+    assert alteracoes == {}
+    update = mock_db.monitoramento.update_one.call_args.args[1]["$set"]
+    assert update["sem_mudanca"] == 3
+    assert update["proxima_em"] == AGORA + timedelta(seconds=next_interval(3, datetime(2024, 4, 5), AGORA))
+    mock_db.monitoramento_alteracoes.insert_one.assert_not_called()
+    assert scheduler._fetch.call_args.args[0]["etag"] == '"v1"'
+
+
+@pytest.mark.asyncio
+async def test_grava_so_os_campos_alterados(mock_db):
+    novo = HTML.replace("150.000,00", "120.000,00")
+    scheduler = _scheduler(text=novo, headers={"etag": '"v2"'})
+
+    alteracoes = await scheduler.refresh(_doc(), AGORA)
+
+    assert set(alteracoes) == {"valor_minimo", "valor_minimo_centavos"}
+    assert alteracoes["valor_minimo"] == {"de": "R$ 150.000,00", "para": "R$ 120.000,00"}
+    update = mock_db.monitoramento.update_one.call_args.args[1]["$set"]
+    assert update["campos.valor_minimo"] == "R$ 120.000,00"
+    assert "campos.titulo" not in update
+    assert update["etag"] == '"v2"' and update["hash"] == body_hash(novo.encode())
+    assert update["sem_mudanca"] == 0
+    log = mock_db.pre_analysis_logs.update_one.call_args.args[1]["$set"]
+    assert log["result.valor_minimo_centavos"] == 12000000
+
+
+@pytest.mark.asyncio
+async def test_encerra_monitoramento_depois_do_leilao(mock_db):
+    scheduler = _scheduler(status_code=304)
+
+    await scheduler.refresh(_doc(), datetime(2024, 4, 7))
+
+    update = mock_db.monitoramento.update_one.call_args.args[1]["$set"]
+    assert update["ativo"] is False and update["motivo"] == "leilao_encerrado"
+
+
+@pytest.mark.asyncio
+async def test_visitas_sem_orcamento_sao_adiadas():
+    scheduler = RecrawlScheduler(budget=DomainBudget(per_minute=1))
+    scheduler._visit = AsyncMock()
+    prazo = datetime.utcnow() - timedelta(seconds=1)
+    scheduler.schedule("https://a.com/1", "a.com", prazo)
+    scheduler.schedule("https://a.com/2", "a.com", prazo)
+    scheduler.schedule("https://b.com/1", "b.com", prazo)
+
+    assert scheduler.run_due() == 2
+    vez, _, url, _, when = scheduler._heap[0]
+    assert url == "https://a.com/2" and when == prazo and vez > datetime.utcnow()
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from config import MongoDB
+from services.shutdown import REQUEUED_STATUS, ShutdownCoordinator, resume_requeued_analyses
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.pre_analysis_logs.update_many = AsyncMock()
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+@pytest.mark.asyncio
+async def test_drain_espera_analises_que_terminam_no_prazo(mock_db):
+    coordinator = ShutdownCoordinator(drain_timeout=1)
+    finished = []
+
+    async def job(url):
+        await asyncio.sleep(0.01)
+        finished.append(url)
+
+    coordinator.spawn("https://a.com/lote/1", job)
+    await asyncio.sleep(0)
+
+    requeued = await coordinator.drain()
+
+    assert finished == ["https://a.com/lote/1"]
+    assert requeued == []
+    assert not coordinator.accepting
+    mock_db.pre_analysis_logs.update_many.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_drain_devolve_analises_que_estouram_o_prazo(mock_db):
+    coordinator = ShutdownCoordinator(drain_timeout=0.01)
+    flushed = AsyncMock()
+    coordinator.register_flush(flushed)
+
+    async def job(url):
+        await asyncio.sleep(10)
+
+    task = coordinator.spawn("https://a.com/lote/2", job)
+    await asyncio.sleep(0)
+
+    requeued = await coordinator.drain()
+    await asyncio.sleep(0)
+
+    assert requeued == ["https://a.com/lote/2"]
+    assert task.cancelled()
+    flushed.assert_awaited_once()
+    filtro, update = mock_db.pre_analysis_logs.update_many.await_args.args
+    assert filtro == {"url": {"$in": ["https://a.com/lote/2"]}, "status": "pending"}
+    assert update["$set"]["status"] == REQUEUED_STATUS
+
+
+@pytest.mark.asyncio
+async def test_resume_reivindica_analises_devolvidas(mock_db):
+    mock_db.pre_analysis_logs.find_one_and_update = AsyncMock(
+        side_effect=[{"url": "https://a.com/lote/3"}, None]
+    )
+    job = AsyncMock()
+
+    resumed = await resume_requeued_analyses(job)
+    await asyncio.sleep(0)
+
+    assert resumed == ["https://a.com/lote/3"]
+    job.assert_awaited_once_with("https://a.com/lote/3")
+    filtro, update = mock_db.pre_analysis_logs.find_one_and_update.await_args_list[0].args
+    assert filtro == {"status": REQUEUED_STATUS}
+    assert update["$set"]["status"] == "pending"
+
+
+def test_create_pre_analysis_recusa_durante_drain(client, monkeypatch):
+    from services import shutdown
+
+    monkeypatch.setattr(shutdown.coordinator, "accepting", False)
+    response = client.post("/api/pre-analysis?url=https://a.com/lote/4")
+
+    assert response.status_code == 503
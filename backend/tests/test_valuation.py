@@ -0,0 +1,100 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+pytest.importorskip("numpy")
+
+from config import MongoDB  # noqa: E402
+from services.valuation import CityIndex, ValuationEngine, valuation_engine  # noqa: E402
+
+
+def _busca(preco, area, quartos=2, tipo="apartamento", cidade="curitiba", vagas=1):
+    return {"estado": "PR", "cidade": cidade, "tipo": tipo, "preco": preco * 100, "area": area,
+            "quartos": quartos, "vagas": vagas, "ativo": True}
+
+
+@pytest.fixture
+def engine():
+    engine = ValuationEngine(k=3)
+    engine.loaded = True
+    for i, (preco, area) in enumerate([(300000, 60), (320000, 62), (350000, 65), (900000, 180), (950000, 200)]):
+        engine.add(f"https://leilao.example/apto/{i}", _busca(preco, area, quartos=2 if area < 100 else 4))
+    engine.add("https://leilao.example/casa/0", _busca(200000, 60, tipo="casa"))
+    engine.add("https://leilao.example/londrina/0", _busca(100000, 60, cidade="londrina"))
+    return engine
+
+
+def test_comparaveis_da_mesma_cidade_e_tipo(engine):
+    resultado = engine.estimate(_busca(200000, 61))
+
+    urls = [c["url"] for c in resultado["comparaveis"]]
+    assert sorted(urls) == [f"https://leilao.example/apto/{i}" for i in range(3)]
+    assert 5000 < resultado["preco_m2_referencia"] < 5400
+    assert resultado["razao_preco_estimativa"] < 0.7
+
+
+def test_o_proprio_imovel_nao_e_comparavel(engine):
+    url = "https://leilao.example/apto/0"
+    resultado = engine.estimate(_busca(300000, 60), url=url)
+    assert url not in [c["url"] for c in resultado["comparaveis"]]
+
+
+def test_sem_cidade_indexada_ou_area_nao_estima(engine):
+    assert engine.estimate(_busca(200000, 60, cidade="maringa")) is None
+    assert engine.estimate({**_busca(200000, 60), "area": None}) is None
+
+
+def test_novo_imovel_entra_sem_reconstruir_a_cidade(engine):
+    engine.estimate(_busca(200000, 61))
+    engine.estimate(_busca(100000, 61, cidade="londrina"))
+    curitiba, londrina = engine.cities[("PR", "curitiba")], engine.cities[("PR", "londrina")]
+
+    with patch.object(CityIndex, "rebuild") as rebuild:
+        engine.add("https://leilao.example/londrina/1", _busca(110000, 58, cidade="londrina"))
+        assert len(engine.estimate(_busca(100000, 61, cidade="londrina"))["comparaveis"]) == 2
+
+        # Mudança de cidade desativa a linha no índice anterior
+        engine.add("https://leilao.example/londrina/1", _busca(110000, 58))
+        assert len(londrina) == 1 and len(curitiba) == 7
+        assert len(engine.estimate(_busca(100000, 61, cidade="londrina"))["comparaveis"]) == 1
+    rebuild.assert_not_called()
+
+
+def test_compacta_quando_metade_das_linhas_esta_inativa(engine):
+    curitiba = engine.cities[("PR", "curitiba")]
+    engine.estimate(_busca(200000, 61))
+
+    with patch("services.valuation.COMPACT_MIN_ROWS", 2):
+        for i in range(3):
+            engine.add(f"https://leilao.example/apto/{i}", {**_busca(300000, 60), "ativo": False})
+        assert curitiba.dead == 3 and curitiba.size == 6
+        engine.add("https://leilao.example/apto/3", {**_busca(300000, 60), "ativo": False})
+
+    assert curitiba.dead == 0 and curitiba.size == len(curitiba) == 2
+
+
+def test_linhas_inativas_nao_contam_como_candidatas(engine):
+    curitiba = engine.cities[("PR", "curitiba")]
+    engine.estimate(_busca(200000, 61))
+
+    for i in range(3):
+        engine.add(f"https://leilao.example/apto/{i}", {**_busca(300000, 60), "ativo": False})
+    assert curitiba.dead == 3
+
+    resultado = engine.estimate(_busca(200000, 61))
+    urls = [c["url"] for c in resultado["comparaveis"]]
+    assert sorted(urls) == [
+        "https://leilao.example/apto/3", "https://leilao.example/apto/4", "https://leilao.example/casa/0",
+    ]
+
+
+def test_falha_na_estimativa_nao_derruba_o_callback(client):
+    db = MagicMock()
+    db.extraction_results.insert_one = AsyncMock()
+    db.extraction_results.update_many = AsyncMock()
+    MongoDB.db = db
+
+    with patch.object(valuation_engine, "estimate", side_effect=ValueError("índice inconsistente")):
+        response = client.post("/api/extraction-callback", json={"url": "https://leilao.example/apto/9"})
+
+    assert response.status_code == 200
+    assert db.extraction_results.insert_one.await_args.args[0]["estimativa_comparaveis"] is None
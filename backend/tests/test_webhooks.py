@@ -0,0 +1,151 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from config import MongoDB
+from services.webhooks import ENVIADO, ERRO, WebhookEngine, backoff_delay
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.webhooks.bulk_write = AsyncMock()
+    MongoDB.db = db
+    yield db
+    MongoDB.db = None
+
+
+@pytest.fixture(autouse=True)
+def no_backoff():
+    with patch("services.webhooks.backoff_delay", return_value=0):
+        yield
+
+
+def _subscriptions(db, subs):
+    db.webhook_assinaturas.find.return_value.to_list = AsyncMock(return_value=subs)
+
+
+def _statuses(db):
+    return [op._doc["$set"] for call in db.webhooks.bulk_write.call_args_list for op in call.args[0]]
+
+
+@pytest.mark.asyncio
+async def test_repete_falhas_5xx_e_grava_status_em_lote(mock_db):
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        return httpx.Response(503 if len(attempts) < 3 else 200, json={"ok": True})
+
+    engine = WebhookEngine(transport=httpx.MockTransport(handler))
+    _subscriptions(mock_db, [{"url": "https://parceiro.example/hook"}])
+
+    assert await engine.dispatch("extracao_concluida", {"url": "https://leilao.example/1"}) == 1
+    await engine.flush()
+
+    assert len(attempts) == 3
+    assert json.loads(attempts[0].content) == {"url": "https://leilao.example/1"}
+    assert attempts[0].headers["X-Webhook-Evento"] == "extracao_concluida"
+    [status] = _statuses(mock_db)
+    assert status["status"] == ENVIADO
+    assert status["status_code"] == 200
+    assert status["resposta"] == {"ok": True}
+    assert status["metadata.tentativas"] == 3
+
+
+@pytest.mark.asyncio
+async def test_erro_4xx_nao_e_repetido(mock_db):
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        return httpx.Response(404, text="not found")
+
+    engine = WebhookEngine(transport=httpx.MockTransport(handler))
+    _subscriptions(mock_db, [{"url": "https://parceiro.example/hook"}])
+    await engine.dispatch("extracao_concluida", {})
+    await engine.flush()
+
+    assert len(attempts) == 1
+    [status] = _statuses(mock_db)
+    assert status["status"] == ERRO
+    assert status["erro"] == "HTTP 404"
+    assert status["resposta"] == {"corpo": "not found"}
+
+
+@pytest.mark.asyncio
+async def test_assinatura_em_lote_recebe_um_post(mock_db):
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200)
+
+    engine = WebhookEngine(batch_wait=0.01, transport=httpx.MockTransport(handler))
+    _subscriptions(mock_db, [{"url": "https://parceiro.example/lote", "lote": True}])
+    for i in range(5):
+        await engine.dispatch("extracao_concluida", {"i": i})
+    await asyncio.sleep(0.05)
+    await engine.flush()
+
+    assert len(requests) == 1
+    assert [e["payload"]["i"] for e in requests[0]["eventos"]] == [0, 1, 2, 3, 4]
+    assert len(_statuses(mock_db)) == 5
+    # Assinaturas ficam em cache entre eventos
+    assert mock_db.webhook_assinaturas.find.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_lotes_separados_por_headers_da_assinatura(mock_db):
+    requests = []
+
+    def handler(request):
+        requests.append((request.headers.get("Authorization"), json.loads(request.content)))
+        return httpx.Response(200)
+
+    engine = WebhookEngine(batch_wait=0.01, transport=httpx.MockTransport(handler))
+    _subscriptions(mock_db, [
+        {"url": "https://parceiro.example/lote", "lote": True, "headers": {"Authorization": "Bearer a"}},
+        {"url": "https://parceiro.example/lote", "lote": True, "headers": {"Authorization": "Bearer b"}},
+    ])
+    for i in range(2):
+        await engine.dispatch("extracao_concluida", {"i": i})
+    await asyncio.sleep(0.05)
+    await engine.flush()
+
+    assert sorted(auth for auth, _ in requests) == ["Bearer a", "Bearer b"]
+    assert all([e["payload"]["i"] for e in body["eventos"]] == [0, 1] for _, body in requests)
+
+
+@pytest.mark.asyncio
+async def test_destino_lento_nao_atrasa_os_outros(mock_db):
+    slow_release = asyncio.Event()
+    done = []
+
+    async def handler(request):
+        if request.url.host == "lento.example":
+            await slow_release.wait()
+        done.append(request.url.host)
+        return httpx.Response(200)
+
+    engine = WebhookEngine(concurrency=1, transport=httpx.MockTransport(handler))
+    _subscriptions(mock_db, [
+        {"url": "https://lento.example/hook"},
+        {"url": "https://rapido.example/hook"},
+    ])
+    await engine.dispatch("extracao_concluida", {})
+    await engine.dispatch("extracao_concluida", {})
+    await asyncio.sleep(0.05)
+
+    assert done == ["rapido.example", "rapido.example"]
+    slow_release.set()
+    await engine.flush()
+    assert done.count("lento.example") == 2
+
+
+def test_backoff_cresce_com_jitter():
+    for attempt in range(1, 8):
+        assert 0 <= backoff_delay(attempt, base=0.5, cap=10) <= min(10, 0.5 * 2 ** (attempt - 1))
@@ -0,0 +1,42 @@
+import logging
+import os
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+
+_client: Optional[Any] = None
+
+def get_http_client():
+    """
+    Retorna o httpx.AsyncClient compartilhado pelo worker.
+
+    O cliente mantém o pool de conexões entre requisições; httpx é
+    importado apenas na primeira chamada.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        import httpx
+
+        _client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            ),
+        )
+        logger.info("Cliente HTTP compartilhado criado")
+    return _client
+
+async def close_http_client() -> None:
+    """
+    Fecha o cliente HTTP compartilhado, se existir.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("Cliente HTTP compartilhado fechado")
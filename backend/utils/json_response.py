@@ -0,0 +1,131 @@
+"""
+Serialização JSON de alto desempenho para as respostas da API.
+
+Usa orjson quando disponível e cai para o json da biblioteca padrão caso
+contrário. Em ambos os casos ObjectId, datetime e Decimal128 são
+convertidos nativamente, sem passar pelo jsonable_encoder do FastAPI.
+Valores não finitos (NaN, Infinity) viram null nos dois backends, como o
+orjson faz com float.
+"""
+import json
+import logging
+import math
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# "auto" usa orjson se estiver instalado; "stdlib" força o json padrão
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").lower()
+
+
+def _decimal_to_number(value: Decimal) -> Any:
+    """
+    Converte Decimal em int ou float, como o jsonable_encoder do FastAPI;
+    NaN e Infinity viram None.
+    """
+    if not value.is_finite():
+        return None
+    if value.as_tuple().exponent >= 0:
+        return int(value)
+    return float(value)
+
+
+def default_encoder(obj: Any) -> Any:
+    """
+    Converte tipos não suportados nativamente pelo JSON.
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal128):
+        return _decimal_to_number(obj.to_decimal())
+    if isinstance(obj, Decimal):
+        return _decimal_to_number(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(by_alias=True)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo não serializável em JSON: {type(obj).__name__}")
+
+
+def _finite(content: Any) -> Any:
+    """
+    Copia a estrutura trocando float NaN/Infinity por None.
+    """
+    if isinstance(content, float):
+        return content if math.isfinite(content) else None
+    if isinstance(content, dict):
+        return {key: _finite(value) for key, value in content.items()}
+    if isinstance(content, (list, tuple)):
+        return [_finite(value) for value in content]
+    return content
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    def encode(data: Any) -> str:
+        return json.dumps(
+            data,
+            default=default_encoder,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        )
+
+    try:
+        text = encode(content)
+    except ValueError:
+        # Float não finito: só então percorre o conteúdo para trocá-lo por null
+        text = encode(_finite(content))
+    return text.encode("utf-8")
+
+
+def _orjson_dumps(content: Any) -> bytes:
+    return orjson.dumps(
+        content,
+        default=default_encoder,
+        option=orjson.OPT_NON_STR_KEYS,
+    )
+
+
+def get_dumps(backend: str = JSON_BACKEND) -> Callable[[Any], bytes]:
+    """
+    Retorna a função de serialização para o backend configurado.
+    """
+    if backend == "stdlib":
+        return _stdlib_dumps
+    if orjson is None:
+        if backend == "orjson":
+            logger.warning("orjson não instalado, usando json da biblioteca padrão")
+        return _stdlib_dumps
+    return _orjson_dumps
+
+
+dumps = get_dumps()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Resposta JSON que serializa direto para bytes com o backend mais rápido.
+
+    Retornar uma instância desta classe no endpoint evita o jsonable_encoder
+    e a revalidação por item, o que importa nos endpoints de listagem.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,67 @@
+"""
+Normalização dos valores extraídos das páginas de leilão.
+
+Preços chegam como texto ("R$ 500.000,00") e datas em vários formatos;
+aqui viram centavos inteiros e datetime, que o MongoDB consegue indexar,
+filtrar por faixa e ordenar.
+"""
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# Versão das regras; o backfill reprocessa documentos de versões anteriores
+NORMALIZATION_VERSION = 1
+
+def parse_brl_cents(value: Any) -> Optional[int]:
+    """
+    Converte "R$ 500.000,00" (ou número em reais) em centavos.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value * 100))
+    digits = re.sub(r"[^\d,]", "", str(value))
+    if not digits.strip(","):
+        return None
+    reais, _, centavos = digits.partition(",")
+    return int(reais or 0) * 100 + int((centavos + "00")[:2])
+
+def parse_br_datetime(value: Any) -> Optional[datetime]:
+    """
+    Converte "25/03/2024 10:00" (hora opcional), "2024-03-25" ou ISO em datetime.
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    match = re.search(r"(\d{2})/(\d{2})/(\d{4})(?:\D+(\d{1,2})[:h](\d{2}))?", str(value))
+    if match:
+        dia, mes, ano, hora, minuto = match.groups()
+        try:
+            return datetime(int(ano), int(mes), int(dia), int(hora or 0), int(minuto or 0))
+        except ValueError:
+            return None
+    try:
+        return datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+def discount_percent(preco: Optional[int], avaliacao: Optional[int]) -> Optional[float]:
+    """
+    Desconto do lance mínimo sobre a avaliação, em %.
+    """
+    if preco is None or not avaliacao:
+        return None
+    return round(max(avaliacao - preco, 0) * 100 / avaliacao, 2)
+
+def normalized_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Campos numéricos e de data derivados dos campos de texto da extração.
+    """
+    preco = parse_brl_cents(data.get("valor_minimo"))
+    avaliacao = parse_brl_cents(data.get("evaluated_value"))
+    return {
+        "valor_minimo_centavos": preco,
+        "valor_avaliacao_centavos": avaliacao,
+        "desconto_percentual": discount_percent(preco, avaliacao),
+        "data_leilao_em": parse_br_datetime(data.get("data_leilao")),
+        "normalizacao": NORMALIZATION_VERSION,
+    }
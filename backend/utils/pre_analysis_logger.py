@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Optional, Dict, Any
 from urllib.parse import urlparse
 from models.pre_analysis_log import PreAnalysisLogCreate
-from config import get_database
+from config import MongoDB
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +18,7 @@ async def save_pre_analysis(url: str, status: str, error: Optional[str] = None,
         result: Resultado da análise, se houver
     """
     try:
-        db = get_database()
-        if db is None:
-            raise ValueError("Database connection is not available")
+        db = MongoDB.get_database()
             
         collection = db.pre_analysis_logs
         
@@ -31,7 +29,17 @@ async def save_pre_analysis(url: str, status: str, error: Optional[str] = None,
             result=result
         )
         
-        await collection.insert_one(log_data.dict())
+        # A URL é única em pre_analysis_logs: atualiza o registro "pending"
+        # criado no início da análise em vez de inserir um novo
+        now = datetime.utcnow()
+        await collection.update_one(
+            {"url": url},
+            {
+                "$set": {**log_data.model_dump(), "updated_at": now},
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True
+        )
         logger.info(f"Pré-análise salva com sucesso para URL: {url}")
         
     except Exception as e:
@@ -56,9 +64,7 @@ async def save_pre_analysis_from_url(url: str, dados_extraidos: Dict[str, Any],
         )
         
         # Obtém a conexão com o banco
-        db = get_database()
-        if db is None:
-            raise ValueError("Database connection is not available")
+        db = MongoDB.get_database()
             
         # Atualiza ou insere o documento
         collection = db.pre_analysis_logs
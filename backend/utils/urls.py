@@ -0,0 +1,33 @@
+"""
+Forma canônica das URLs de lotes.
+
+A mesma página chega com variações (maiúsculas no host, porta padrão,
+fragmento, parâmetros de campanha, ordem dos parâmetros); a forma
+canônica é a chave usada para cache e deduplicação.
+"""
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Parâmetros que não mudam o conteúdo da página
+TRACKING_PARAMS = {"fbclid", "gclid", "gclsrc", "dclid", "msclkid", "mc_cid", "mc_eid", "_ga", "ref", "origem"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def canonical_url(url: str) -> str:
+    """
+    "HTTPS://Leilao.example:443/lote/1/?utm_source=x&b=2&a=1#fotos"
+    vira "https://leilao.example/lote/1?a=1&b=2".
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    netloc = host
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))